@@ -2,18 +2,663 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import re
+import functools
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor, wait
 import plotly.express as px
 import plotly.graph_objects as go
-from rapidfuzz import fuzz, process
-from fuzzywuzzy import fuzz as fw
 from io import BytesIO
 from stqdm import stqdm
+from profiler import __version__ as profiler_version, engine
+from profiler.blocking import BLOCKING_METHODS
+from profiler.dependencies import DEFAULT_MAX_LHS
+from profiler.engine import EXACT_STATS
+from profiler.incremental import profile_incrementally, state_path
+from profiler.jobs import (CHECKPOINT_SUFFIX, Cancelled, Checkpoint, start as start_job,
+                           sweep as sweep_checkpoints)
+from profiler.keys import DEFAULT_MAX_KEY_SIZE
+from profiler.loading import UPLOAD_TYPES, read_table, table_columns
+from profiler.parallel import DEFAULT_WORKERS
+from profiler.patterns import pattern_table, quality_table
+from profiler.profiling import is_text_column
+from profiler.rendering import (MAX_CHART_CATEGORIES, MAX_TABLE_ROWS, complete_rows,
+                                top_with_other)
+from profiler.report import to_json
+from profiler.sampling import (DEFAULT_SAMPLE_SIZE, preview_column_profiling,
+                               preview_null_percentages, preview_pattern_analysis,
+                               preview_top_values, sample_rows)
+from profiler.sketches import hll_precision_for, kll_k_for
+from profiler.store import DEFAULT_MAX_BYTES, ResultStore
+from profiler.streaming import DEFAULT_CHUNKSIZE, stream_csv
+from profiler.tracing import Capture, Tracer, span, use as use_tracer
+from profiler.values import PICKLIST_MAX_DISTINCT, value_counts
+
+# Every section reads the same loaded frame. With copy-on-write, anything
+# derived from it (column subsets, assign, ...) is a cheap view, and writing
+# to a derived frame can never modify the shared one.
+pd.set_option("mode.copy_on_write", True)
 
 st.set_page_config(layout="wide", page_title="Data Profiler")
 # st.title("📊 Data Profiler")
 st.markdown("<h1 style='text-align:center;'>📊 Data Profiler</h1>",
             unsafe_allow_html=True)
 
+# ---- Instrumentation ----
+# Sections, loads, background jobs and the matching stages inside them record
+# spans into one tracer per session (profiler.tracing), which the
+# Performance panel at the bottom lists. A run asked for in that panel is
+# also profiled from here to the panel.
+tracer = st.session_state.setdefault("tracer", Tracer())
+tracer.memory = st.session_state.get("trace_memory", False)
+use_tracer(tracer)
+if "capture" in st.session_state:
+    # Left running by a run that stopped before the panel
+    st.session_state.pop("capture").stop()
+if st.session_state.pop("capture_next_run", False):
+    st.session_state["capture"] = Capture().start()
+
+def text_length(series):
+    lengths = series.astype(str).str.len()
+    return lengths.min(), lengths.max(), lengths.mean()
+
+
+# ---- Cached computations ----
+# Streamlit reruns the whole script on every widget change. Everything below
+# is keyed on the upload's content hash plus the parameters each section
+# uses, so a rerun only recomputes the sections whose inputs changed. The
+# DataFrame arguments are underscore-prefixed so Streamlit doesn't re-hash
+# them on every call; the fingerprint stands in for them. Both caches evict
+# least-recently-used entries once max_entries is reached.
+CACHE_MAX_ENTRIES = 32
+DATASET_CACHE_MAX_ENTRIES = 4
+# How long a rerun waits for a background job it just started before
+# drawing its progress instead
+JOB_WAIT_SECONDS = 0.5
+# Background jobs the server runs at once, for all sessions together; the
+# rest wait their turn
+MAX_JOBS_ENV = "PROFILER_MAX_JOBS"
+DEFAULT_MAX_JOBS = 2
+# Where sections 12 and 13 keep their jobs' checkpoints (profiler.jobs)
+CHECKPOINT_DIR = os.path.join(tempfile.gettempdir(), "data-profiler-checkpoints")
+# Matched pairs shown while section 13's job is still running
+PARTIAL_RESULT_ROWS = 30
+# Columns per page in sections 4 and 9, which draw a table per column
+SECTION_PAGE_SIZE = 20
+# Default directory of the persistent result store (profiler.store)
+STORE_DIR_ENV = "PROFILER_STORE_DIR"
+# Set from the "Large files" settings below
+store = None
+
+
+def upload_fingerprint(upload):
+    # Hash each upload once and remember it for the rest of the session.
+    fingerprints = st.session_state.setdefault("upload_fingerprints", {})
+    if upload.file_id not in fingerprints:
+        fingerprints[upload.file_id] = hashlib.sha256(
+            upload.getvalue()).hexdigest()
+    return fingerprints[upload.file_id]
+
+
+def path_fingerprint(path):
+    # Server-side files are identified by path, size and modification time
+    # rather than hashing what may be many GB of content.
+    stat = os.stat(path)
+    return hashlib.sha256(
+        f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()
+
+
+def projected_fingerprint(fingerprint, columns):
+    # A frame loaded with only some columns is a different dataset to every
+    # cache keyed on the fingerprint
+    if not columns:
+        return fingerprint
+    return hashlib.sha256(f"{fingerprint}:{list(columns)}".encode()).hexdigest()
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_table_columns(fingerprint, name, _source):
+    return table_columns(_source, name)
+
+
+# cache_resource hands back the same frame on every rerun instead of
+# unpickling a fresh copy like cache_data would. Files load into Arrow-backed
+# and categorical columns (profiler.loading), only the selected columns for
+# columnar formats; the load time is kept in attrs.
+@st.cache_resource(max_entries=DATASET_CACHE_MAX_ENTRIES, show_spinner="Reading dataset...")
+def load_dataset(fingerprint, name, _source, columns=()):
+    start = time.perf_counter()
+    df = read_table(_source, name, columns)
+    df.attrs["load_seconds"] = time.perf_counter() - start
+    return df
+
+
+@st.cache_resource
+def result_store(directory, max_bytes):
+    return ResultStore(directory, max_bytes)
+
+
+def stored(fingerprint, name, params, compute):
+    # Sections 2-10 also go through the persistent store when one is set, so
+    # new sessions and restarts read them back instead of recomputing
+    if store is None:
+        return compute()
+    return store.get_or_compute(fingerprint, name, params, compute)
+
+
+def store_identity():
+    # The store stored() currently uses, and how often it has been emptied
+    return None if store is None else (store.directory, store.generation)
+
+
+def persisted(show_spinner=False):
+    """st.cache_data for a wrapper that goes through stored(). The memory
+    cache can't see the module-global store, so the wrapper is given
+    ``store_identity()`` as its store_id argument: results cached before a
+    store was set, changed or emptied are then fetched (or computed and
+    written) through the current one."""
+    def decorate(function):
+        cached = st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=show_spinner)(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return cached(*args, store_id=store_identity(), **kwargs)
+        return wrapper
+    return decorate
+
+
+# The section computations live in profiler.engine, shared with the batch
+# CLI; the wrappers below only add caching. Per-column work is spread over
+# _workers processes (profiler.parallel). The results don't depend on the
+# worker count, so it is left out of the keys.
+#
+# stats_mode is (approximate, distinct_error, quantile_error); see
+# profiler.engine.
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner="Sketching columns...")
+def cached_column_sketches(fingerprint, _df, stats_mode):
+    return engine.column_sketches(_df, stats_mode)
+
+
+def column_sketches(fingerprint, df, stats_mode):
+    return cached_column_sketches(fingerprint, df, stats_mode) if stats_mode[0] else None
+
+
+@persisted()
+def cached_value_frequencies(fingerprint, _df, stats_mode, _workers=1, store_id=None):
+    # The one value-count pass per column behind the distinct counts and
+    # sections 3, 4 and 9
+    return stored(fingerprint, "value_frequencies", stats_mode, lambda: engine.value_frequencies(
+        _df, _workers, column_sketches(fingerprint, _df, stats_mode)))
+
+
+@persisted()
+def cached_distinct_counts(fingerprint, _df, stats_mode, _workers=1, store_id=None):
+    return engine.distinct_counts(
+        _df, frequencies=cached_value_frequencies(fingerprint, _df, stats_mode, _workers))
+
+
+@persisted()
+def cached_column_profiling(fingerprint, _df, stats_mode, _workers=1, store_id=None):
+    return stored(fingerprint, "column_profiling", stats_mode, lambda: engine.column_profiling(
+        _df, cached_distinct_counts(fingerprint, _df, stats_mode, _workers), _workers,
+        column_sketches(fingerprint, _df, stats_mode)))
+
+
+@persisted()
+def cached_pattern_hits(fingerprint, _df, _workers=1, store_id=None):
+    return stored(fingerprint, "pattern_hits", (), lambda: engine.pattern_hits(_df, _workers))
+
+
+@persisted()
+def cached_email_domains(fingerprint, _df, email_column, stats_mode, store_id=None):
+    # Only the top domains reach the page; the rest are one "Other" slice
+    return stored(fingerprint, "email_domains", (email_column, stats_mode), lambda: top_with_other(
+        engine.email_domains(_df, email_column, cached_value_frequencies(
+            fingerprint, _df, stats_mode)[email_column]), MAX_CHART_CATEGORIES))
+
+
+@persisted()
+def cached_top_values(fingerprint, _df, stats_mode, _workers=1, store_id=None):
+    return stored(fingerprint, "top_values", stats_mode, lambda: engine.top_value_counts(
+        _df, cached_value_frequencies(fingerprint, _df, stats_mode, _workers)))
+
+
+@persisted()
+def cached_histograms(fingerprint, _df, _workers=1, store_id=None):
+    return stored(fingerprint, "histograms", (), lambda: engine.column_histograms(_df, _workers))
+
+
+@persisted()
+def cached_null_percentages(fingerprint, _df, store_id=None):
+    return stored(fingerprint, "null_percentages", (), lambda: engine.null_percentages(_df))
+
+
+@persisted()
+def cached_table_summary(fingerprint, _df, stats_mode, _workers=1, store_id=None):
+    return stored(fingerprint, "table_summary", stats_mode, lambda: engine.table_summary(
+        _df, cached_distinct_counts(fingerprint, _df, stats_mode, _workers)))
+
+
+@persisted()
+def cached_quality_scores(fingerprint, _df, stats_mode, _workers=1, store_id=None):
+    return stored(fingerprint, "quality_scores", stats_mode, lambda: engine.quality_scores(
+        _df, cached_pattern_hits(fingerprint, _df, _workers),
+        cached_distinct_counts(fingerprint, _df, stats_mode, _workers)))
+
+
+@persisted()
+def cached_primary_keys(fingerprint, _df, max_size, store_id=None):
+    return stored(fingerprint, "primary_keys", max_size, lambda: engine.primary_keys(_df, max_size))
+
+
+@persisted(show_spinner="Finding functional dependencies...")
+def cached_functional_dependencies(fingerprint, _df, max_lhs, store_id=None):
+    return stored(fingerprint, "functional_dependencies", max_lhs,
+                  lambda: engine.functional_dependency_table(_df, max_lhs))
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner="Finding inclusion dependencies...")
+def cached_schema_links(fingerprint1, fingerprint2, _df1, _df2):
+    return engine.schema_links(_df1, _df2)
+
+
+@persisted()
+def cached_picklists(fingerprint, _df, stats_mode, _workers=1, store_id=None):
+    return stored(fingerprint, "picklists", stats_mode, lambda: engine.picklists(
+        _df, cached_value_frequencies(fingerprint, _df, stats_mode, _workers)))
+
+
+@persisted()
+def cached_match_rules(fingerprint, _df, store_id=None):
+    return stored(fingerprint, "match_rules", (), lambda: engine.match_rules(_df))
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_unique_object_columns(fingerprint, _df, stats_mode):
+    return engine.unique_text_columns(
+        _df, cached_distinct_counts(fingerprint, _df, stats_mode), stats_mode)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_exact_duplicates(fingerprint, _df, columns):
+    # (group per row, size per group); columns=() compares every column
+    return engine.exact_duplicates(_df, list(columns) or None)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner="Generating candidate pairs...")
+def cached_blocking_plan(fingerprint1, fingerprint2, _df1, _df2, passes):
+    # passes are (method, column, params) tuples so they hash as cache keys
+    return engine.blocking_plan(_df1, _df2, passes)
+
+
+# Sections 12 and 13 run these as background jobs (see background_result),
+# which pass their own _progress and _checkpoint; stqdm only works on the
+# script thread.
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_fuzzy_duplicates(fingerprint, _df, fuzzy_columns, threshold, passes, _progress=None,
+                            _checkpoint=None):
+    # Duplicate group per row (-1 for none)
+    return engine.fuzzy_duplicates(
+        _df, fuzzy_columns, threshold, cached_blocking_plan(fingerprint, None, _df, None, passes),
+        progress=_progress or (lambda blocks, total: stqdm(blocks, total=total, desc="Scoring Blocks")),
+        checkpoint=_checkpoint)
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_cross_source_matches(fingerprint1, fingerprint2, _df1, _df2,
+                                match_columns, weights, threshold, passes, _progress=None,
+                                _checkpoint=None):
+    return engine.cross_source_matches(
+        _df1, _df2, match_columns, weights, threshold,
+        cached_blocking_plan(fingerprint1, fingerprint2, _df1, _df2, passes),
+        progress=_progress or (lambda blocks, total: stqdm(blocks, total=total, desc="Matching Blocks")),
+        checkpoint=_checkpoint)
+
+
+def find_duplicates(fingerprint, df, exact_columns, fuzzy_columns, threshold, passes,
+                    checkpoint, progress):
+    # Section 12's job: exact and fuzzy duplicate group per row
+    exact, _ = cached_exact_duplicates(fingerprint, df, exact_columns)
+    if passes is None:
+        return exact, pd.Series(-1, index=df.index)
+    return exact, cached_fuzzy_duplicates(fingerprint, df, fuzzy_columns, threshold, passes,
+                                          progress, checkpoint)
+
+
+def match_records(fingerprint1, fingerprint2, df1, df2, match_columns, weights, threshold,
+                  passes, checkpoint, progress):
+    # Section 13's job
+    return cached_cross_source_matches(fingerprint1, fingerprint2, df1, df2, match_columns,
+                                       weights, threshold, passes, progress, checkpoint)
+
+
+INCLUSION_COLUMNS = {
+    'left': "Dataset 1 Column", 'right': "Dataset 2 Column",
+    'left_in_right': "1 ⊆ 2", 'right_in_left': "2 ⊆ 1",
+    'left_distinct': "Distinct (1)", 'right_distinct': "Distinct (2)",
+    'left_unique': "Unique (1)", 'right_unique': "Unique (2)", 'coverage': "Coverage",
+}
+
+
+def blocking_controls(key, columns, default_columns, default_methods):
+    """Blocking column and pass pickers; every method runs on every column
+    and the candidates are the union."""
+    bl_col1, bl_col2 = st.columns(2)
+    with bl_col1:
+        blocking_columns = st.multiselect(
+            "Blocking columns (none compares every pair)", columns,
+            default=default_columns, key=f"{key}_blocking_columns")
+    with bl_col2:
+        methods = st.multiselect(
+            "Blocking passes", list(BLOCKING_METHODS), default=default_methods,
+            format_func=BLOCKING_METHODS.get, key=f"{key}_blocking_methods")
+    params = {method: () for method in methods}
+    with bl_col1:
+        if 'prefix' in methods:
+            params['prefix'] = (('length', st.slider(
+                "Prefix length", 1, 10, 1, key=f"{key}_prefix_length")),)
+        if 'sorted_neighbourhood' in methods:
+            params['sorted_neighbourhood'] = (('window', st.slider(
+                "Sorted neighbourhood window", 2, 50, 5, key=f"{key}_window")),)
+    with bl_col2:
+        if 'qgram_lsh' in methods:
+            params['qgram_lsh'] = (
+                ('bands', st.slider("LSH bands", 1, 50, 25, key=f"{key}_bands")),
+                ('q', st.slider("Q-gram length", 2, 5, 3, key=f"{key}_q")),
+                ('rows', st.slider("LSH rows per band", 1, 10, 4, key=f"{key}_rows")))
+    return tuple((method, col, params[method]) for col in blocking_columns for method in methods)
+
+
+def render_blocking_plan(plan):
+    # Shown before scoring, so a setup can be tightened before it runs
+    bl_col1, bl_col2, bl_col3 = st.columns(3)
+    bl_col1.metric("Candidate pairs", f"{plan.pair_count:,}")
+    bl_col2.metric("All pairs", f"{plan.total_pairs:,}")
+    bl_col3.metric("Reduction ratio", f"{plan.reduction_ratio:.4%}")
+
+
+# One run per dataset version and settings: it reads and rewrites the saved
+# state, and cache_resource keeps the merged profile without pickling it.
+@st.cache_resource(max_entries=DATASET_CACHE_MAX_ENTRIES,
+                   show_spinner="Profiling new partitions...")
+def cached_incremental_profile(fingerprint, _df, name, state_dir, stats_mode):
+    return profile_incrementally(_df, state_path(state_dir, name), stats_mode,
+                                 progress=lambda parts, total: stqdm(parts, total=total,
+                                                                     desc="Partitions"))
+
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRIES, show_spinner="Profiling a sample...")
+def cached_preview(fingerprint, _df, sample_size, stratify_by):
+    # Sections 2-7 estimated from a fixed-seed sample, so reruns and other
+    # sessions see the same preview for the same settings
+    sample = sample_rows(_df, sample_size, stratify_by=stratify_by)
+    rows = len(_df)
+    profiling_df = preview_column_profiling(sample, rows)
+    pattern_analysis, pattern_intervals, hits = preview_pattern_analysis(sample, rows)
+    # Uniqueness % in quality_table is relative to the sample's row count
+    distinct_counts = (profiling_df.set_index('Column Name')['Unique Values']
+                       * len(sample) / rows).to_dict()
+    return {
+        "sample_rows": len(sample),
+        "column_profiling": profiling_df,
+        "pattern_analysis": pattern_analysis,
+        "pattern_intervals": pattern_intervals,
+        "top_values": preview_top_values(sample, rows),
+        "null_percentages": preview_null_percentages(sample, rows),
+        "completeness": 100 - sample.isnull().stack().mean() * 100,
+        "uniqueness": profiling_df['Uniqueness %'].mean(),
+        "quality_scores": quality_table(hits, sample.dtypes.to_dict(), distinct_counts),
+    }
+
+
+@st.cache_resource
+def background_executor():
+    # Shared by all sessions, so jobs past the limit queue up instead of
+    # competing for the CPU
+    return ThreadPoolExecutor(max_workers=int(os.environ.get(MAX_JOBS_ENV, DEFAULT_MAX_JOBS)))
+
+
+def job_checkpoint(name, key):
+    # Saved block results of section 12's or 13's job. The path depends on
+    # the job's arguments, so starting the same job again resumes it. They
+    # stay out of the result store's directory, whose size limit doesn't
+    # count them; files of jobs nobody resumed are swept after a while.
+    sweep_checkpoints(CHECKPOINT_DIR)
+    digest = hashlib.sha256(repr((profiler_version, name, key)).encode()).hexdigest()
+    return Checkpoint(os.path.join(CHECKPOINT_DIR, f"{digest}{CHECKPOINT_SUFFIX}"))
+
+
+def warm_exact_caches(fingerprint, df, stats_mode, workers, progress):
+    # Runs off the script thread; fills the same caches the full view reads,
+    # so the rerun after it finishes renders sections 2-7 straight away
+    steps = [
+        (cached_column_profiling, (fingerprint, df, stats_mode, workers)),
+        (cached_pattern_hits, (fingerprint, df, workers)),
+        (cached_top_values, (fingerprint, df, stats_mode, workers)),
+        (cached_histograms, (fingerprint, df, workers)),
+        (cached_null_percentages, (fingerprint, df)),
+        (cached_table_summary, (fingerprint, df, stats_mode, workers)),
+        (cached_quality_scores, (fingerprint, df, stats_mode, workers)),
+    ]
+    for function, args in progress(steps, len(steps)):
+        function(*args)
+
+
+@st.fragment(run_every=1)
+def job_status(job, name=None, partial=None):
+    # Polls the job without rerunning the page until it is done. A named
+    # job can be cancelled; partial(results) draws its results so far.
+    if job.done():
+        st.rerun()
+    if job.queued():
+        st.progress(0.0, text=f"{job.label}: waiting for a free worker...")
+    else:
+        done = f"{job.completed:,} of {job.total:,}, " if job.total else ""
+        st.progress(job.fraction(), text=f"{job.label}... ({done}{job.elapsed():.0f}s)")
+    if name is not None and st.button("Cancel", key=f"cancel_{name}"):
+        job.cancel()
+        st.rerun()
+    if partial is not None and job.checkpoint is not None and job.checkpoint.parts:
+        partial(job.checkpoint.results())
+
+
+def background_result(name, key, label, function, *args, checkpoint=False, partial=None):
+    """The result of ``function(*args, progress)`` run as a background job,
+    or None while it is still running, with its progress shown in place.
+    A session keeps one job per ``name``; a new ``key`` (whatever identifies
+    the result, i.e. the arguments that aren't frames) cancels and replaces
+    it. With ``checkpoint`` the function is called as
+    ``function(*args, checkpoint, progress)`` and resumes from the blocks
+    saved by an earlier run of the same job; ``partial`` draws the results
+    of the blocks done so far."""
+    jobs = st.session_state.setdefault("jobs", {})
+    job = jobs.get(name)
+    if job is None or job.key != key:
+        if job is not None:
+            # Nothing resumes the replaced job, so its checkpoint goes too
+            job.cancel(discard=True)
+        saved = job_checkpoint(name, key) if checkpoint else None
+        job = jobs[name] = start_job(background_executor(), key, label, function,
+                                     *args, *([saved] if checkpoint else []), checkpoint=saved)
+        # Results already in the cache come back before the page is drawn
+        wait([job.future], timeout=JOB_WAIT_SECONDS)
+    if not job.done():
+        job_status(job, name, partial)
+        return None
+    if isinstance(job.error(), Cancelled):
+        saved = job.checkpoint.blocks if job.checkpoint is not None else 0
+        st.warning(f"{label} cancelled" + (f" after {saved:,} blocks." if saved else "."))
+        if st.button("Resume" if saved else "Restart", key=f"resume_{name}"):
+            del jobs[name]
+            st.rerun()
+        return None
+    if job.error() is not None:
+        st.error(f"{label} failed: {job.error()}")
+        if st.button("Retry", key=f"retry_{name}"):
+            del jobs[name]
+            st.rerun()
+        return None
+    return job.result()
+
+
+def page_of(items, key):
+    """The part of ``items`` on the page picked below, so sections with a
+    table and chart per column draw SECTION_PAGE_SIZE columns at a time."""
+    items = list(items)
+    pages = -(-len(items) // SECTION_PAGE_SIZE)
+    if pages <= 1:
+        return items
+    page = st.number_input(f"Page (of {pages}, {SECTION_PAGE_SIZE} columns each)",
+                           min_value=1, max_value=pages, key=key)
+    return items[(page - 1) * SECTION_PAGE_SIZE:page * SECTION_PAGE_SIZE]
+
+
+class LazySection:
+    """A collapsed expander for one report section. Opening or closing it
+    reruns the script and ``.open`` tells whether it is open, so a section
+    only computes (or reads its cached results) once someone opens it.
+    Drawing it into the expander (``with section:``) runs in a span named
+    after it."""
+
+    def __init__(self, title, key, **counts):
+        self.title, self.counts = title, counts
+        self.expander = st.expander(title, key=key, on_change="rerun")
+        self.open = self.expander.open
+        self.stack = ExitStack()
+
+    def __enter__(self):
+        self.stack.enter_context(self.expander)
+        return self.stack.enter_context(span(self.title, **self.counts))
+
+    def __exit__(self, *exc_info):
+        return self.stack.__exit__(*exc_info)
+
+
+def lazy_section(title, key, **counts):
+    return LazySection(title, key, **counts)
+
+
+def performance_panel():
+    """The session's spans, newest first, with exports and the profile of a
+    captured run; drawn last, so it includes the run that draws it."""
+    capture = st.session_state.pop("capture", None)
+    if capture is not None:
+        capture.stop()
+        st.session_state["captured_profile"] = (capture.tool, capture.file_name,
+                                                capture.text(), capture.dump())
+    with st.expander("⏱️ Performance"):
+        st.toggle("Trace memory allocations (tracemalloc; slows every session down "
+                  "while on)", key="trace_memory")
+        spans = tracer.table()
+        if spans.empty:
+            st.caption("Nothing recorded yet: open a section to time it.")
+        else:
+            st.caption("Wall and CPU seconds per section, load, background job and matching "
+                       "stage. CPU time is the whole process's; Peak RSS is the process's "
+                       "high-water mark when the span ended.")
+            st.dataframe(spans.head(MAX_TABLE_ROWS))
+        export1, export2, clear, profile = st.columns(4)
+        export1.download_button("📥 Spans (JSON)", lambda: to_json(tracer.records()),
+                                "spans.json", key="download_spans")
+        export2.download_button("📥 OpenTelemetry spans", lambda: to_json(tracer.otel()),
+                                "otel_spans.json", key="download_otel_spans")
+        clear.button("Clear spans", on_click=tracer.clear, key="clear_spans")
+        profile.button("Profile the next run", key="capture_run",
+                       on_click=lambda: st.session_state.update(capture_next_run=True),
+                       help="Profiles the script thread only, not background jobs")
+        if "captured_profile" in st.session_state:
+            tool, file_name, text, dump = st.session_state["captured_profile"]
+            st.subheader(f"Last captured run ({tool})")
+            st.code(text)
+            st.download_button(f"📥 {file_name}", dump, file_name, key="download_profile")
+
+
+def render_table_scores(source_name, scores):
+    # Section 6's metrics; scores is profiler.engine.table_scores' dict
+    columns = st.columns(len(scores) + 1)
+    columns[0].metric("Source", f"{source_name}")
+    for column, (name, value) in zip(columns[1:], scores.items()):
+        column.metric(name, f"{value:.2f}%")
+
+
+def render_preview(preview, rows, source_name):
+    st.info(f"Fast preview: {preview['sample_rows']:,} of {rows:,} rows sampled from "
+            f"{source_name}. Counts are scaled to the full table; CI columns show "
+            "95% confidence intervals.")
+
+    st.header('2.Column Profiling')
+    st.dataframe(preview["column_profiling"])
+
+    st.header("3.Pattern Analysis")
+    st.dataframe(preview["pattern_analysis"].merge(preview["pattern_intervals"], on="Column"))
+
+    st.header("4.Top Values per Column")
+    top_values = preview["top_values"]
+    top_cols = st.columns(min(5, max(len(top_values), 1)))
+    for j, (col, count_df) in enumerate(top_values.items()):
+        with top_cols[j % len(top_cols)]:
+            st.markdown(f"**{col}**")
+            st.dataframe(count_df)
+
+    st.header("5.Null % by Column")
+    null_tab, null_plot = st.columns(2, vertical_alignment='center')
+    null_percentages = preview["null_percentages"]
+    with null_tab:
+        st.dataframe(null_percentages)
+    with null_plot:
+        st.bar_chart(null_percentages.set_index("Column")["Null %"])
+
+    st.header("6.Table Summary")
+    pattern_analysis = preview["pattern_analysis"]
+    completeness, uniqueness = preview["completeness"], preview["uniqueness"]
+    render_table_scores(source_name, engine.table_scores(pattern_analysis, completeness, uniqueness))
+
+    st.header("7.Column-wise Summary")
+    st.dataframe(preview["quality_scores"])
+
+
+def render_streaming_profile(profile, source_name, done):
+    # Sections 2-7 from the streaming accumulators. Called after every chunk,
+    # so it sticks to tables and metrics and avoids keyed widgets.
+    status = "Finished" if done else "Reading"
+    st.info(f"{status}: {profile.rows:,} rows in {profile.chunks} chunks from {source_name}. "
+            "Distinct counts, medians and top values are estimates.")
+
+    st.header('2.Column Profiling')
+    st.dataframe(profile.column_profiling())
+
+    st.header("3.Pattern Analysis")
+    pattern_analysis = profile.pattern_analysis()
+    st.dataframe(pattern_analysis)
+
+    st.header("4.Top Values per Column")
+    top_values = profile.top_values()
+    top_cols = st.columns(min(5, max(len(top_values), 1)))
+    for j, (col, count_df) in enumerate(top_values.items()):
+        with top_cols[j % len(top_cols)]:
+            st.markdown(f"**{col}**")
+            st.dataframe(count_df)
+
+    st.header("5.Null % by Column")
+    null_percentages = profile.null_percentages()
+    null_tab, null_plot = st.columns(2, vertical_alignment='center')
+    with null_tab:
+        st.dataframe(null_percentages.rename("Null %").rename_axis("Column"))
+    with null_plot:
+        st.bar_chart(null_percentages)
+
+    st.header("6.Table Summary")
+    completeness, uniqueness = profile.table_summary()
+    render_table_scores(source_name, engine.table_scores(pattern_analysis, completeness, uniqueness))
+
+    st.header("7.Column-wise Summary")
+    st.dataframe(profile.quality_scores())
+
+
 # tab_main, tab_explore, tab_duplicates, tab_download = st.tabs([
 #     "📁 Upload / Load Data", "🔍 Row/Column Counts", "🔁 Duplicate Detection", "⬇️ Export"
 # ])
@@ -24,25 +669,139 @@ dt_1, dt_2 = st.columns(2)
 with dt_1:
     st.markdown("<h3 style='text-align:center;'>Dataset 1</h3>",
                 unsafe_allow_html=True)
-    file1 = st.file_uploader("Upload Dataset 1", type=["csv"], key="file1")
+    file1 = st.file_uploader("Upload Dataset 1", type=UPLOAD_TYPES, key="file1")
 with dt_2:
     st.markdown("<h3 style='text-align:center;'>Dataset 2</h3>",
                 unsafe_allow_html=True)
-    file2 = st.file_uploader("Upload Dataset 2", type=["csv"], key="file2")
+    file2 = st.file_uploader("Upload Dataset 2", type=UPLOAD_TYPES, key="file2")
+
+with st.expander("⚙️ Large files"):
+    streaming_mode = st.toggle(
+        "Streaming mode: profile CSVs chunk by chunk in bounded memory",
+        key="streaming_mode")
+    chunk_size = st.number_input(
+        "Rows per chunk", min_value=1_000, max_value=5_000_000,
+        value=DEFAULT_CHUNKSIZE, step=10_000, key="chunk_size")
+    server_path = st.text_input(
+        "Or load a file already on the server (path; memory-mapped, used as "
+        "Dataset 1 when none is uploaded)", key="server_path")
+    approximate_stats = st.toggle(
+        "Approximate distinct counts and medians (HyperLogLog / KLL sketches)",
+        key="approximate_stats")
+    err_col1, err_col2 = st.columns(2)
+    with err_col1:
+        distinct_error = st.slider(
+            "Distinct count relative error (%)", 0.5, 5.0, 1.0, step=0.5,
+            disabled=not (approximate_stats or streaming_mode),
+            key="distinct_error") / 100
+    with err_col2:
+        quantile_error = st.slider(
+            "Median rank error (%)", 0.5, 5.0, 1.0, step=0.5,
+            disabled=not (approximate_stats or streaming_mode),
+            key="quantile_error") / 100
+    fast_preview = st.toggle(
+        "Fast preview: profile a random sample first, with confidence intervals",
+        key="fast_preview")
+    sample_size = st.number_input(
+        "Preview sample size (rows)", min_value=1_000, max_value=10_000_000,
+        value=DEFAULT_SAMPLE_SIZE, step=10_000, disabled=not fast_preview,
+        key="sample_size")
+    workers = st.number_input(
+        "Worker processes for per-column work", min_value=1,
+        max_value=DEFAULT_WORKERS, value=DEFAULT_WORKERS, key="workers")
+    state_dir = st.text_input(
+        "Incremental profile state directory (sections 2-7 reuse the unchanged "
+        "partitions of a dataset profiled here before)", key="state_dir")
+    store_col1, store_col2 = st.columns(2)
+    with store_col1:
+        store_dir = st.text_input(
+            "Persistent result store directory (sections 2-10 are kept here for every "
+            "session and across restarts)", value=os.environ.get(STORE_DIR_ENV, ""),
+            key="store_dir")
+    with store_col2:
+        store_size = st.number_input(
+            "Result store size limit (MB; least recently used results go first)",
+            min_value=16, value=DEFAULT_MAX_BYTES // 2**20, step=256, key="store_size")
+    if store_dir:
+        try:
+            store = result_store(store_dir, store_size * 2**20)
+        except (OSError, sqlite3.Error) as e:
+            st.error(f"Cannot open the result store in {store_dir}: {e}")
+    if store is not None:
+        usage = store.stats()
+        st.caption(f"Result store: {usage['entries']} results, "
+                   f"{usage['bytes'] / 2**20:,.1f} of {store_size:,} MB.")
+        if st.button("Empty the result store", key="clear_store"):
+            store.clear()
+            st.rerun()
+stats_mode = ((True, distinct_error, quantile_error) if approximate_stats
+              else EXACT_STATS)
+
+# Streaming mode only covers sections 2-7; the rest need the full table
+if streaming_mode:
+    sources = {upload.name: (upload, upload_fingerprint(upload))
+               for upload in (file1, file2) if upload}
+    if server_path:
+        if os.path.isfile(server_path):
+            sources[server_path] = (server_path, path_fingerprint(server_path))
+        else:
+            st.error(f"File not found: {server_path}")
+    for name in [name for name in sources if not name.lower().endswith(".csv")]:
+        st.warning(f"Streaming mode reads CSVs only; skipping {name}.")
+        del sources[name]
+    if not sources:
+        st.info("Upload a CSV or enter a server path to start streaming.")
+        st.stop()
+
+    source_name = st.radio("Select Dataset to Explore", options=list(sources),
+                           horizontal=True)
+    source, fingerprint = sources[source_name]
+    profiles = st.session_state.setdefault("streaming_profiles", {})
+    # Streaming always relies on sketches, sized by the same error sliders
+    profile_key = (fingerprint, chunk_size, distinct_error, quantile_error)
+    streaming_view = st.empty()
+    if profile_key not in profiles:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        for profile in stream_csv(source, chunksize=chunk_size,
+                                  hll_precision=hll_precision_for(distinct_error),
+                                  kll_k=kll_k_for(quantile_error)):
+            with streaming_view.container():
+                render_streaming_profile(profile, source_name, done=False)
+        while len(profiles) >= DATASET_CACHE_MAX_ENTRIES:
+            profiles.pop(next(iter(profiles)))
+        profiles[profile_key] = profile
+    with streaming_view.container():
+        render_streaming_profile(profiles[profile_key], source_name, done=True)
+    performance_panel()
+    st.stop()
 
 # Step 2: Load both files
-df1 = df2 = None
+datasets = {}
 if file1:
-    if file1.name.endswith(".csv"):
-        df1 = pd.read_csv(file1)
-    else:
-        df1 = pd.read_excel(file1)
-
+    datasets["Dataset 1"] = (file1, file1.name, upload_fingerprint(file1))
+elif server_path and os.path.isfile(server_path):
+    datasets["Dataset 1"] = (server_path, server_path, path_fingerprint(server_path))
+elif server_path:
+    st.error(f"File not found: {server_path}")
 if file2:
-    if file2.name.endswith(".csv"):
-        df2 = pd.read_csv(file2)
-    else:
-        df2 = pd.read_excel(file2)
+    datasets["Dataset 2"] = (file2, file2.name, upload_fingerprint(file2))
+
+loaded = {}
+if datasets:
+    with st.expander("🧮 Columns to load"):
+        for label, (source, name, fingerprint) in datasets.items():
+            try:
+                columns = tuple(st.multiselect(
+                    f"{label} ({name}): columns to read, all if none are selected",
+                    cached_table_columns(fingerprint, name, source), key=f"columns_{label}"))
+                loaded[label] = (load_dataset(fingerprint, name, source, columns),
+                                 name, projected_fingerprint(fingerprint, columns))
+            except (ValueError, OSError) as e:
+                st.error(f"Cannot read {name}: {e}")
+
+df1, file_name1, fingerprint1 = loaded.get("Dataset 1", (None, None, None))
+df2, file_name2, fingerprint2 = loaded.get("Dataset 2", (None, None, None))
 
 # Step 3: If both are uploaded, let user choose between them
 if df1 is not None or df2 is not None:
@@ -54,15 +813,52 @@ if df1 is not None or df2 is not None:
     )
 
     df = df1 if dataset_choice == "Dataset 1" else df2
-    file_name = file1.name if dataset_choice == "Dataset 1" else file2.name
+    file_name = file_name1 if dataset_choice == "Dataset 1" else file_name2
+    fingerprint = fingerprint1 if dataset_choice == "Dataset 1" else fingerprint2
     st.success(
         f"Loaded dataset with {df.shape[0]} records and {df.shape[1]} columns.")
+    st.caption(f"Read in {df.attrs.get('load_seconds', 0):.2f}s; "
+               f"{df.memory_usage(deep=True).sum() / 2**20:,.1f} MB in memory.")
+
+    # Fast preview covers sections 1-7 until the exact results are ready
+    exact_jobs = st.session_state.setdefault("exact_jobs", {})
+    job_key = (fingerprint, stats_mode)
+    job = exact_jobs.get(job_key)
+    if job is not None and job.error() is not None:
+        st.error(f"Exact computation failed: {job.error()}")
+        exact_jobs.pop(job_key)
+        job = None
+    if fast_preview and len(df) > sample_size and not (job is not None and job.done()):
+        stratify_by = st.selectbox(
+            "Stratify the sample by", options=[None, *df.columns],
+            format_func=lambda col: "(no stratification)" if col is None else col,
+            key="stratify_by")
+        st.header("1.Record & Column Counts")
+        st.subheader("**Sample rows of the data:**")
+        st.write(complete_rows(df))
+        r_count, c_count = st.columns(2)
+        r_count.metric("Record Count", f"{df.shape[0]}")
+        c_count.metric("Column Count", f"{df.shape[1]}")
+
+        if job is None:
+            if st.button("Compute exact results", key="compute_exact"):
+                exact_jobs[job_key] = start_job(
+                    background_executor(), job_key, "Computing exact results",
+                    warm_exact_caches, fingerprint, df, stats_mode, workers)
+                st.rerun()
+        else:
+            st.info("Computing exact results on the full table in the background. "
+                    "The preview will be replaced when they are ready.")
+            job_status(job)
+        render_preview(cached_preview(fingerprint, df, sample_size, stratify_by),
+                       len(df), file_name)
+        performance_panel()
+        st.stop()
 
 # with tab_explore:
     st.header("1.Record & Column Counts")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
     st.subheader("**Sample rows of the data:**")
-    st.write(df.dropna().head())
+    st.write(complete_rows(df))
     r_count, c_count = st.columns(2)
     with r_count:
         st.metric("Record Count", f"{df.shape[0]}")
@@ -71,576 +867,475 @@ if df1 is not None or df2 is not None:
     # st.write(f"**Record Count:** {df.shape[0]}")
     # st.write(f"**Column Count:** {df.shape[1]}")
 
-    def pattern_percentage(series, pattern):
-        return series.astype(str).str.fullmatch(pattern).mean() * 100
-
-    def text_length(series):
-        lengths = series.astype(str).str.len()
-        return lengths.min(), lengths.max(), lengths.mean()
+    # Sections 2, 3, 5, 6 and 7 from saved per-partition state, if enabled
+    incremental = None
+    if state_dir:
+        incremental, incremental_info = cached_incremental_profile(
+            fingerprint, df, file_name, state_dir, stats_mode)
+        st.caption(f"Incremental profile: {incremental_info['reused']} of "
+                   f"{incremental_info['partitions']} partitions reused from {state_dir}.")
+
+    def section_pattern_analysis():
+        # Sections 3 and 6 both read it
+        return pattern_table(incremental.pattern_hits() if incremental
+                             else cached_pattern_hits(fingerprint, df, workers))
+
+    section = lazy_section("2. Column Profiling", "section_2", rows=len(df))
+    if section.open:
+        with section:
+            # Calculate column profiling data
+            profiling_df = (incremental.column_profiling() if incremental
+                            else cached_column_profiling(fingerprint, df, stats_mode, workers))
+
+            # Integrate the plots into Streamlit
+            st.dataframe(profiling_df)
+            # st.plotly_chart(fig1)
+            # st.plotly_chart(fig2)
+
+            st.subheader("📊 Column Profiling Visualizations")
+
+            # Filter numeric metrics for fig1
+            metrics_to_plot = ['Unique Values', 'Null Count']
+            fig1 = go.Figure()
+            for metric in metrics_to_plot:
+                fig1.add_trace(go.Bar(
+                    x=profiling_df['Column Name'],
+                    y=profiling_df[metric],
+                    name=metric
+                ))
+
+            fig1.update_layout(
+                barmode='group',
+                title='📊 Count & Uniqueness Metrics per Column',
+                xaxis_title='Column Name',
+                yaxis_title='Count',
+                legend_title='Metric',
+                height=500
+            )
 
-    # Function to calculate column profiling data
-    st.header('2.Column Profiling')
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-
-    def column_profiling(df):
-        profiling_data = []
-        for column in df.columns:
-            data_type = df[column].dtype
-            unique_values = df[column].nunique()
-            uniqueness_percentage = (unique_values / len(df)) * 100
-            null_count = df[column].isnull().sum()
-            null_percentage = (null_count / len(df)) * 100
-            min_length = df[column].astype(str).map(len).min()
-            max_length = df[column].astype(str).map(len).max()
-            avg_length = df[column].astype(str).map(len).mean()
-
-            # Calculate min, max, mean, median, and std dev only for numeric columns
-            if np.issubdtype(df[column].dtype, np.number):
-                min_value = df[column].min()
-                max_value = df[column].max()
-                mean_value = df[column].mean()
-                median_value = df[column].median()
-                std_dev_value = df[column].std()
+            st.plotly_chart(fig1, use_container_width=True)
+
+            # Create box plot for only numerical profiling metrics (mean, median, std dev)
+            distribution_metrics = profiling_df[[
+                'Column Name', 'Mean', 'Median', 'Std Dev']].dropna()
+            fig2 = go.Figure()
+            for metric in ['Mean', 'Median', 'Std Dev']:
+                fig2.add_trace(go.Box(
+                    y=distribution_metrics[metric],
+                    name=metric,
+                    boxmean=True
+                ))
+
+            fig2.update_layout(
+                title='📦 Distribution Metrics (Numeric Columns)',
+                xaxis_title='Metrics',
+                yaxis_title='Value',
+                height=500
+            )
+            # st.plotly_chart(fig2, use_container_width=True)
+
+    section = lazy_section("3. Pattern Analysis", "section_3", rows=len(df))
+    if section.open:
+        with section:
+            pattern_analysis = section_pattern_analysis()
+            patt_dict = pattern_analysis.to_dict(orient='records')
+            # st.dataframe(pattern_analysis)
+
+            # Create columns dynamically
+            # columns = st.columns(len(pattern_analysis), border=True)
+
+            # Get the total number of columns in the DataFrame
+            total_columns = len(df.columns)
+            cols_per_row = 5
+
+            # Display descriptive text in each column
+            for i in range(0, len(patt_dict), cols_per_row):
+                cols = st.columns(min(cols_per_row, len(patt_dict) - i), border=True)
+                for j, item in enumerate(patt_dict[i:i + cols_per_row]):
+                    column = item['Column']
+                    descriptions = []
+                    if item['Alphanumeric %'] > 0:
+                        descriptions.append(
+                            f"Alphanumeric: {round(item['Alphanumeric %'], 2)}%")
+                    if item['Numeric %'] > 0:
+                        descriptions.append(f"Numeric: {round(item['Numeric %'], 2)}%")
+                    if item['Phone %'] > 0:
+                        descriptions.append(f"Phone: {round(item['Phone %'], 2)}%")
+                    if item['Date %'] > 0:
+                        descriptions.append(f"Date: {round(item['Date %'], 2)}%")
+                    # if item['Email %'] > 0:
+                    #     descriptions.append(f"Email: {round(item['Email %'], 2)}%")
+
+                    if descriptions:
+                        cols[j].write(f"**{column}**")
+                        cols[j].write(" ".join(descriptions))
+                    else:
+                        cols[j].write(f"**{column}**")
+                        cols[j].write("No significant percentage in any category")
+
+            # print(pattern_analysis)
+            i = 0
+            for email_column in engine.email_columns(pattern_analysis):
+                i += 1
+                st.subheader("Email Patterns")
+                counts_table, counts_plot = st.columns(
+                    2, vertical_alignment='center')
+                domain_counts = cached_email_domains(fingerprint, df, email_column, stats_mode)
+                domain_counts_df = pd.DataFrame(domain_counts)
+
+                fig = px.pie(
+                    names=domain_counts.index,
+                    values=domain_counts.values,
+                    # title='Email Domain Distribution',
+                    hole=0.3
+                )
+
+                with counts_table:
+                    domain_counts_df
+                with counts_plot:
+                    st.plotly_chart(fig, key=f'{str(i)}_test')
+
+    section = lazy_section("4. Top Values per Column", "section_4", rows=len(df))
+    if section.open:
+        with section:
+            top_values = cached_top_values(fingerprint, df, stats_mode, workers)
+            # Numeric columns are charted from server-side bins, not their values
+            histograms = cached_histograms(fingerprint, df, workers)
+            for col in page_of(top_values, "top_values_page"):
+                count_df = top_values[col]
+                st.subheader(f"**{col}**")
+                tab_col, plot_col = st.columns(2, vertical_alignment='center')
+                with tab_col:
+                    st.dataframe(count_df)
+                if col in histograms:
+                    fig = px.bar(data_frame=histograms[col], x="Bin", y="Count")
+                else:
+                    fig = px.histogram(
+                        data_frame=count_df,
+                        y="Count",
+                        x="Value"
+                    )
+                fig.update_xaxes(type='category')
+                with plot_col:
+                    st.plotly_chart(fig, key=f'top_values_{col}')
+
+    section = lazy_section("5. Null % by Column", "section_5", rows=len(df))
+    if section.open:
+        with section:
+            null_tab, null_plot = st.columns(2, vertical_alignment='center')
+            null_percentages = (incremental.null_percentages() if incremental
+                                else cached_null_percentages(fingerprint, df))
+            with null_tab:
+                st.dataframe(null_percentages.reset_index().rename(
+                    columns={"index": "Column", 0: "Null %"}))
+            null_percent_df = null_percentages.to_frame(name="Percent")
+            fig = px.bar(
+                data_frame=null_percent_df,
+                x=null_percent_df.index,
+                y="Percent",
+                range_y=[0, 100]
+            )
+            with null_plot:
+                st.plotly_chart(fig)
+
+    section = lazy_section("6. Table Summary", "section_6", rows=len(df))
+    if section.open:
+        with section:
+            completeness, uniqueness = (incremental.table_summary() if incremental
+                                        else cached_table_summary(fingerprint, df, stats_mode, workers))
+            render_table_scores(file_name, engine.table_scores(
+                section_pattern_analysis(), completeness, uniqueness))
+
+    section = lazy_section("7. Column-wise Summary", "section_7", rows=len(df))
+    if section.open:
+        with section:
+            st.dataframe(incremental.quality_scores() if incremental
+                         else cached_quality_scores(fingerprint, df, stats_mode, workers))
+
+    section = lazy_section("8. Primary Key Identification", "section_8", rows=len(df))
+    if section.open:
+        with section:
+            max_key_size = st.number_input("Most columns per key", min_value=1, max_value=6,
+                                           value=DEFAULT_MAX_KEY_SIZE, key="max_key_size")
+            potential_keys = cached_primary_keys(fingerprint, df, max_key_size)
+            if potential_keys:
+                st.success(f"Potential Primary Key(s): {', '.join(' + '.join(key) for key in potential_keys)}")
             else:
-                min_value = None
-                max_value = None
-                mean_value = None
-                median_value = None
-                std_dev_value = None
-
-            profiling_data.append({
-                'Column Name': column,
-                'Data Type': data_type,
-                'Unique Values': unique_values,
-                'Uniqueness %': uniqueness_percentage,
-                'Null Count': null_count,
-                'Null %': null_percentage,
-                'Min Length': min_length,
-                'Max Length': max_length,
-                'Avg Length': avg_length,
-                'Min Value': min_value,
-                'Max Value': max_value,
-                'Mean': mean_value,
-                'Median': median_value,
-                'Std Dev': std_dev_value
-            })
-
-        return pd.DataFrame(profiling_data)
-
-    # Calculate column profiling data
-    profiling_df = column_profiling(df)
-
-    # Integrate the plots into Streamlit
-    st.dataframe(profiling_df)
-    # st.plotly_chart(fig1)
-    # st.plotly_chart(fig2)
-
-    st.subheader("📊 Column Profiling Visualizations")
-
-    # Filter numeric metrics for fig1
-    metrics_to_plot = ['Unique Values', 'Null Count']
-    fig1 = go.Figure()
-    for metric in metrics_to_plot:
-        fig1.add_trace(go.Bar(
-            x=profiling_df['Column Name'],
-            y=profiling_df[metric],
-            name=metric
-        ))
-
-    fig1.update_layout(
-        barmode='group',
-        title='📊 Count & Uniqueness Metrics per Column',
-        xaxis_title='Column Name',
-        yaxis_title='Count',
-        legend_title='Metric',
-        height=500
-    )
-
-    st.plotly_chart(fig1, use_container_width=True)
-
-    # Create box plot for only numerical profiling metrics (mean, median, std dev)
-    distribution_metrics = profiling_df[[
-        'Column Name', 'Mean', 'Median', 'Std Dev']].dropna()
-    fig2 = go.Figure()
-    for metric in ['Mean', 'Median', 'Std Dev']:
-        fig2.add_trace(go.Box(
-            y=distribution_metrics[metric],
-            name=metric,
-            boxmean=True
-        ))
-
-    fig2.update_layout(
-        title='📦 Distribution Metrics (Numeric Columns)',
-        xaxis_title='Metrics',
-        yaxis_title='Value',
-        height=500
-    )
-    # st.plotly_chart(fig2, use_container_width=True)
-
-    st.header("3.Pattern Analysis")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    pattern_analysis = pd.DataFrame({
-        "Column": df.columns,
-        "Email %": [pattern_percentage(df[col], r"[^@]+@[^@]+\.[^@]+") for col in df.columns],
-        "Phone %": [pattern_percentage(df[col], r"^\+\d{1,3}\s?\d{9,}$") for col in df.columns],
-        "Date %": [pd.to_datetime(df[col], errors='coerce').notna().mean() * 100 if df[col].dtype in ['object', 'datetime64'] else 0 for col in df.columns],
-        "Numeric %": [pattern_percentage(df[col], r"^\d+(\.\d+)?$") for col in df.columns],
-        # "Alphanumeric %": [df[col].astype(str).str.isalnum().mean() * 100 if df[col].dtype == object else 0 for col in df.columns],
-        "Alphanumeric %": [df[col].dropna().astype(str).str.isalnum().sum() / len(df[col]) * 100 if df[col].dtype == object else 0 for col in df.columns],
-    })
-    patt_dict = pattern_analysis.to_dict(orient='records')
-    # st.dataframe(pattern_analysis)
-
-    # Create columns dynamically
-    # columns = st.columns(len(pattern_analysis), border=True)
-
-    # Get the total number of columns in the DataFrame
-    total_columns = len(df.columns)
-    cols_per_row = 5
-
-    # Display descriptive text in each column
-    for i in range(0, len(patt_dict), cols_per_row):
-        cols = st.columns(min(cols_per_row, len(patt_dict) - i), border=True)
-        for j, item in enumerate(patt_dict[i:i + cols_per_row]):
-            column = item['Column']
-            descriptions = []
-            if item['Alphanumeric %'] > 0:
-                descriptions.append(
-                    f"Alphanumeric: {round(item['Alphanumeric %'], 2)}%")
-            if item['Numeric %'] > 0:
-                descriptions.append(f"Numeric: {round(item['Numeric %'], 2)}%")
-            if item['Phone %'] > 0:
-                descriptions.append(f"Phone: {round(item['Phone %'], 2)}%")
-            if item['Date %'] > 0:
-                descriptions.append(f"Date: {round(item['Date %'], 2)}%")
-            # if item['Email %'] > 0:
-            #     descriptions.append(f"Email: {round(item['Email %'], 2)}%")
-
-            if descriptions:
-                cols[j].write(f"**{column}**")
-                cols[j].write(" ".join(descriptions))
+                st.warning(f"No primary key of up to {max_key_size} columns found.")
+
+            st.subheader("Functional Dependencies")
+            max_lhs = st.number_input("Most determinant columns", min_value=1, max_value=4,
+                                      value=DEFAULT_MAX_LHS, key="max_lhs")
+            dependencies = cached_functional_dependencies(fingerprint, df, max_lhs)
+            if dependencies.empty:
+                st.info("No functional dependencies between non-key columns found.")
             else:
-                cols[j].write(f"**{column}**")
-                cols[j].write("No significant percentage in any category")
-
-    # print(pattern_analysis)
-    i = 0
-    for item in pattern_analysis[["Column", "Email %"]].to_dict(orient='records'):
-        i += 1
-        column = item.get('Column')
-        email_match = item.get('Email %')
-        if email_match > 50:
-            st.subheader("Email Patterns")
-            counts_table, counts_plot = st.columns(
-                2, vertical_alignment='center')
-            email_column = column
-            email_df = df.copy()
-            email_df['Email_Domain'] = email_df[email_column].astype(
-                str).str.extract(r'@(.+)$')
-            domain_counts = email_df['Email_Domain'].value_counts()
-            domain_counts_df = pd.DataFrame(domain_counts)
-
-            fig = px.pie(
-                names=domain_counts.index,
-                values=domain_counts.values,
-                # title='Email Domain Distribution',
-                hole=0.3
-            )
-
-            with counts_table:
-                domain_counts_df
-            with counts_plot:
-                st.plotly_chart(fig, key=f'{str(i)}_test')
-
-    st.header("4.Top Values per Column")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    df = df.select_dtypes(exclude='bool')
-    for col in df.columns:
-        i += 1
-        st.subheader(f"**{col}**")
-        count_df = df[col].dropna().value_counts().head(
-        ).rename_axis("Value").reset_index(name="Count")
-        tab_col, plot_col = st.columns(2, vertical_alignment='center')
-        with tab_col:
-            st.dataframe(count_df)
-        fig = px.histogram(
-            data_frame=count_df,
-            y="Count",
-            x="Value"
-        )
-        fig.update_xaxes(type='category')
-        with plot_col:
-            st.plotly_chart(fig, key=f'{str(i)}_test')
-
-    st.header("5.Null % by Column")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    null_tab, null_plot = st.columns(2, vertical_alignment='center')
-    null_percentages = df.isnull().mean() * 100
-    with null_tab:
-        st.dataframe(null_percentages.reset_index().rename(
-            columns={"index": "Column", 0: "Null %"}))
-    null_percent_df = null_percentages.to_frame(name="Percent")
-    fig = px.bar(
-        data_frame=null_percent_df,
-        x=null_percent_df.index,
-        y="Percent",
-        range_y=[0, 100]
-    )
-    with null_plot:
-        st.plotly_chart(fig)
-
-    st.header("6.Table Summary")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    completeness = 100 - df.isnull().stack().mean() * 100
-    validity = pattern_analysis[['Email %', 'Phone %', 'Date %']].mean().mean()
-    uniqueness = df.nunique().mean() / len(df) * 100
-    consistency = pattern_analysis[['Alphanumeric %']].mean().mean()
-    overall_score = np.mean([completeness, validity, uniqueness, consistency])
-
-    # Create columns
-    col0, col1, col2, col3, col4, col5 = st.columns(6)
-
-    # Display metrics in columns
-    with col0:
-        st.metric("Source", f"{file_name}")
-    with col1:
-        st.metric("Completeness", f"{completeness:.2f}%")
-    with col2:
-        st.metric("Validity", f"{validity:.2f}%")
-    with col3:
-        st.metric("Uniqueness", f"{uniqueness:.2f}%")
-    with col4:
-        st.metric("Consistency", f"{consistency:.2f}%")
-    with col5:
-        st.metric("Overall Score", f"{overall_score:.2f}%")
+                st.caption("Each Determinant's values fix the Dependent's value in every row.")
+                st.dataframe(dependencies.head(MAX_TABLE_ROWS))
+
+    section = lazy_section("9. Picklist Value Extraction (Categoricals)", "section_9", rows=len(df))
+    if section.open:
+        with section:
+            # pick_cols = st.columns(sum(1 for col in df.columns if df[col].dtype == object))
+            # _i = 0
+            # for col in df.columns:
+            #     if df[col].dtype == object:# and df[col].nunique() < 20:
+            #         with pick_cols[_i]:
+            #             st.markdown(f"**{col}** (Picklist values: {df[col].nunique()})")
+            #             st.dataframe(df[col].value_counts().rename_axis(
+            #                 "Value").reset_index(name="Count"))
+            #         _i += 1
+
+            # Define the maximum number of columns per row
+            max_columns_per_row = 5
+
+            # Create rows of columns dynamically
+            picklists = cached_picklists(fingerprint, df, stats_mode, workers)
+            object_columns = page_of(picklists, "picklists_page")
+            total_columns = len(object_columns)
+
+            for i in range(0, total_columns, max_columns_per_row):
+                cols = st.columns(min(max_columns_per_row, total_columns - i))
+                for j in range(min(max_columns_per_row, total_columns - i)):
+                    col_index = i + j
+                    col = object_columns[col_index]
+                    picklist_size, picklist_df = picklists[col]
+                    with cols[j]:
+                        st.markdown(
+                            f"**{col}** (Picklist values: {picklist_size})")
+                        st.dataframe(picklist_df)
+
+            # Text columns past the cutoff aren't picklists; they get no table
+            distinct = cached_distinct_counts(fingerprint, df, stats_mode, workers)
+            skipped = [f"{col} ({distinct[col]:,})" for col in df.columns
+                       if is_text_column(df[col].dtype) and distinct[col] > PICKLIST_MAX_DISTINCT]
+            if not picklists:
+                st.info(f"No text column has {PICKLIST_MAX_DISTINCT} or fewer distinct values.")
+            if skipped:
+                st.caption(f"Not picklists (more than {PICKLIST_MAX_DISTINCT} distinct values): "
+                           + ", ".join(skipped))
+
+    section = lazy_section("10. Suggested Match & Merge Rules", "section_10", rows=len(df))
+    if section.open:
+        with section:
+            st.dataframe(cached_match_rules(fingerprint, df))
+
+    section = lazy_section("11. Survivorship Rules (Suggestions)", "section_11", rows=len(df))
+    if section.open:
+        with section:
+            def calculate_survivorship_df(df, status_column="status", active_value="active"):
+                if status_column not in df.columns:
+                    return 0.0  # If column doesn't exist
+                total_records = len(df)
+                if total_records == 0:
+                    return 0.0
+                surviving_records = df[status_column].str.lower().eq(
+                    active_value).sum()
+                return (surviving_records / total_records) * 100
+
+            # surv_rules = []
+            # for col in df.columns:
+            #     if "date" in col.lower():
+            #         rule = "Most Recent"
+            #     elif df[col].dtype == object:
+            #         rule = "Longest Text"
+            #     elif df[col].dtype in [int, float]:
+            #         rule = "Max Value"
+            #     else:
+            #         rule = "Most Frequent"
+            #     surv_rules.append({"Column": col, "Survivorship Rule": rule})
+            # st.dataframe(pd.DataFrame(surv_rules))
+            # Survivorship Rate from DataFrame
+            # survivorship_rate = calculate_survivorship_df(df, status_column="status", active_value="active")
+
+            st.subheader("Survivorship Rate")
+            # st.metric(label="Rate of Active Records", value=f"{survivorship_rate:.2f}%")
+
+            if not df.empty:
+                col1, col2 = st.columns(2)
+
+                with col1:
+                    # Select column to use for survivorship status
+                    status_col = st.selectbox(
+                        "Select Status Column", df.columns, key="status_col")
+
+                with col2:
+                    # Select active value that signifies a "surviving" record
+                    if status_col:
+                        # Most frequent first, as many as a table would show
+                        unique_values = value_counts(df[status_col]).index[:MAX_TABLE_ROWS]
+                        active_value = st.selectbox(
+                            "Select Active Value", unique_values, key="active_value")
+
+                # Function to calculate survivorship rate
+                def calculate_survivorship(df, status_col, active_value):
+                    total_records = len(df)
+                    surviving_records = df[status_col].eq(active_value).sum()
+                    if total_records == 0:
+                        return 0
+                    return (surviving_records / total_records) * 100
+
+                # Calculate and display the rate
+                survivorship_rate = calculate_survivorship(
+                    df, status_col, active_value)
+                st.metric("Survivorship Rate", f"{survivorship_rate:.2f}%")
+
+    section = lazy_section("12. Duplicate Detection", "section_12", rows=len(df))
+    if section.open:
+        with section:
+            # df = df1.copy() if dataset_dup_detec == "Dataset 1" else df2.copy()
+            # duplicates = df[df.duplicated()]
+            # st.write(f"🔍 Found {len(duplicates)} duplicate records.")
+            # st.write(f"🔍 Found {round(len(duplicates)/len(df)*100, ndigits=2)} percent of duplicate records.")
+            # if not duplicates.empty:
+            #     st.dataframe(duplicates.head(10))
+            # ---- Streamlit UI for Fuzzy Matching Columns ----
+            all_categorical = engine.text_columns(df)
+            # ['ID', 'UniqueID']
+            exclude_cols = cached_unique_object_columns(fingerprint, df, stats_mode)
+            default_cols = [col for col in all_categorical if col not in exclude_cols]
+
+            dd_col1, dd_col2 = st.columns(2)
+            with dd_col1:
+                exact_columns = st.multiselect(
+                    "Columns compared for exact duplicates (all if none are selected)",
+                    options=df.columns, key="exact_columns")
+                fuzzy_columns = st.multiselect(
+                    "Select columns for fuzzy matching", options=all_categorical, default=default_cols)
+            with dd_col2:
+                threshold = st.slider("Fuzzy match threshold",
+                                      min_value=50, max_value=100, value=90, step=5)
+
+            # ---- Blocking: which pairs of rows get scored ----
+            passes = blocking_controls("dedup", all_categorical, fuzzy_columns[:1], ["prefix"])
+            try:
+                render_blocking_plan(cached_blocking_plan(fingerprint, None, df, None, passes))
+            except ValueError as e:
+                st.error(f"Fuzzy duplicates skipped: {e}")
+                passes = None
+
+            # ---- Exact and fuzzy (blocked) duplicates, in the background ----
+            def show_partial_duplicates(parts):
+                st.caption(f"{sum(len(part[0]) for part in parts):,} pairs of duplicate "
+                           "rows found so far.")
+
+            found = background_result(
+                "duplicates", (fingerprint, tuple(exact_columns), tuple(fuzzy_columns),
+                               threshold, passes),
+                "Detecting duplicates", find_duplicates,
+                fingerprint, df, tuple(exact_columns), tuple(fuzzy_columns), threshold, passes,
+                checkpoint=True, partial=show_partial_duplicates)
+            if found is not None:
+                exact_groups, fuzzy_clusters = found
+
+                # ---- Classify Duplicates by Type ----
+                duplicate_types = engine.duplicate_types(exact_groups, fuzzy_clusters)
+                duplicate_summary = engine.duplicate_summary(
+                    duplicate_types, exact_groups, fuzzy_clusters, len(df))
+
+                # Only the displayed sample is materialized, not every duplicate row
+                positions = np.flatnonzero((exact_groups >= 0) | (fuzzy_clusters.to_numpy() >= 0))[:10]
+                duplicates_sample = df.iloc[positions].assign(
+                    DuplicateType=duplicate_types.iloc[:10].to_numpy(),
+                    ExactGroup=pd.Series(exact_groups[positions]).where(
+                        lambda group: group >= 0).astype("Int64").to_numpy(),
+                    FuzzyGroup=fuzzy_clusters.iloc[positions].where(
+                        lambda group: group >= 0).astype("Int64").to_numpy())
+
+                # ---- Display Summary ----
+                st.subheader("🔍 Duplicate Detection Summary")
+                st.write(f"✅ Exact duplicates: **{duplicate_summary['exact']}**")
+                st.write(f"🧬 Exact duplicate groups: **{duplicate_summary['exact_groups']}**")
+                st.write(f"🔁 Fuzzy duplicates: **{duplicate_summary['fuzzy']}**")
+                st.write(f"🧩 Fuzzy duplicate groups: **{duplicate_summary['fuzzy_groups']}**")
+                st.write(f"🔂 Both: **{duplicate_summary['both']}**")
+                st.write(f"📊 Total: **{duplicate_summary['total']}** "
+                         f"({duplicate_summary['total_percent']}%)")
+
+                if not duplicates_sample.empty:
+                    st.subheader("🧾 Sample Duplicate Records")
+                    st.dataframe(duplicates_sample)
+
+            # # ---- Export Buttons ----
+            # def to_csv_download(df, file_name):
+            #     buffer = BytesIO()
+            #     df.to_csv(buffer, index=False)
+            #     return buffer.getvalue()
+
+            # if not duplicates_combined.empty:
+            #     st.subheader("⬇️ Download Duplicates")
+
+            #     col1, col2, col3 = st.columns(3)
+            #     with col1:
+            #         st.download_button("Download Exact", to_csv_download(df.loc[list(only_exact)]), file_name="exact_duplicates.csv")
+            #     with col2:
+            #         st.download_button("Download Fuzzy", to_csv_download(df.loc[list(only_fuzzy)]), file_name="fuzzy_duplicates.csv")
+            #     with col3:
+            #         st.download_button("Download Both", to_csv_download(df.loc[list(both)]), file_name="both_duplicates.csv")
+
+    section = lazy_section("13. Cross-Source Matching", "section_13")
+    if section.open:
+        with section:
+            # Columns for layout
+            csm_col1, csm_col2 = st.columns(2)
+
+            if df1 is not None and df2 is not None:
+                common_columns = list(set(df1.columns) & set(df2.columns))
+
+                # Columns of one dataset whose values all appear in the other's
+                links = cached_schema_links(fingerprint1, fingerprint2, df1, df2)
+                with st.expander(f"Inclusion dependencies ({len(links['inclusions'])})"):
+                    st.dataframe(pd.DataFrame(links['inclusions']).rename(columns=INCLUSION_COLUMNS))
+                if links['join_keys']:
+                    st.info("Suggested join keys: " + ", ".join(
+                        f"{left} = {right}" for left, right in links['join_keys']))
+                shared_keys = [left for left, right in links['join_keys'] if left == right]
+
+                with csm_col1:
+                    match_columns = st.multiselect(
+                        "Select matching columns", common_columns,
+                        default=shared_keys[:2] or common_columns[:2])
+
+                with csm_col2:
+                    threshold = st.slider("Similarity threshold", 0, 100, 85)
+
+                weights = {}
+                for col in match_columns:
+                    with csm_col1:
+                        weights[col] = st.slider(f"Weight for '{col}'", 1, 10, 5)
+
+                passes = blocking_controls("match", common_columns, shared_keys[:1], ["exact"])
+                try:
+                    render_blocking_plan(cached_blocking_plan(fingerprint1, fingerprint2, df1, df2, passes))
+                except ValueError as e:
+                    st.error(f"Matching skipped: {e}")
+                    passes = None
+
+                if passes is not None:
+                    st.subheader("Results")
+
+                    def show_partial_matches(parts):
+                        found = engine.partial_matches(df1, df2, match_columns, parts)
+                        st.caption(f"{len(found):,} matched pairs so far; the best of them:")
+                        st.dataframe(found.head(PARTIAL_RESULT_ROWS))
+
+                    results_df = background_result(
+                        "matches", (fingerprint1, fingerprint2, tuple(match_columns),
+                                    tuple(weights.items()), threshold, passes),
+                        "Matching records", match_records,
+                        fingerprint1, fingerprint2, df1, df2, tuple(match_columns),
+                        weights, threshold, passes, checkpoint=True, partial=show_partial_matches)
+
+                    # Display results, once the job is done
+                    if results_df is not None and not results_df.empty:
+                        st.success(f"✅ Found {len(results_df)} matched pairs")
+                        st.dataframe(results_df.head(30))
+                        st.download_button("📥 Download Matched Pairs",
+                                           lambda: results_df.to_csv(index=False),
+                                           "matched_pairs.csv")
+                    elif results_df is not None:
+                        st.warning("No matches found based on current configuration.")
+            else:
+                st.info("Please upload both datasets to enable matching.")
 
-    st.header("7.Column-wise Summary")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    quality_scores = []
-    for col in df.columns:
-        non_null = df[col].notnull().mean() * 100
-        if df[col].dtype == object and col.lower() == "email":
-            valid = pattern_percentage(df[col], r"[^@]+@[^@]+\.[^@]+")
-        elif df[col].dtype == object and "phone" in col.lower():
-            valid = pattern_percentage(df[col], r"\d{10}")
-        elif np.issubdtype(df[col].dtype, np.datetime64):
-            valid = df[col].notnull().mean() * 100
-        else:
-            valid = 100
-        unique = df[col].nunique() / len(df) * 100
-        consistent = df[col].astype(str).str.isalnum(
-        ).mean() * 100 if df[col].dtype == object else 100
-        quality_scores.append({
-            "Column": col,
-            "Completeness %": non_null,
-            "Validity %": valid,
-            "Uniqueness %": unique,
-            "Consistency %": consistent
-        })
-    st.dataframe(pd.DataFrame(quality_scores))
-
-    st.header("8.Primary Key Identification")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    potential_keys = []
-    for col in df.columns:
-        if df[col].is_unique and df[col].notnull().all():
-            potential_keys.append(col)
-    if potential_keys:
-        st.success(f"Potential Primary Key(s): {', '.join(potential_keys)}")
-    else:
-        st.warning("No single-column primary key found.")
-
-    st.header("9. Picklist Value Extraction (Categoricals)")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    # pick_cols = st.columns(sum(1 for col in df.columns if df[col].dtype == object))
-    # _i = 0
-    # for col in df.columns:
-    #     if df[col].dtype == object:# and df[col].nunique() < 20:
-    #         with pick_cols[_i]:
-    #             st.markdown(f"**{col}** (Picklist values: {df[col].nunique()})")
-    #             st.dataframe(df[col].value_counts().rename_axis(
-    #                 "Value").reset_index(name="Count"))
-    #         _i += 1
-
-    # Define the maximum number of columns per row
-    max_columns_per_row = 5
-
-    # Create rows of columns dynamically
-    object_columns = [col for col in df.columns if df[col].dtype == object]
-    total_columns = len(object_columns)
-
-    for i in range(0, total_columns, max_columns_per_row):
-        cols = st.columns(min(max_columns_per_row, total_columns - i))
-        for j in range(min(max_columns_per_row, total_columns - i)):
-            col_index = i + j
-            col = object_columns[col_index]
-            with cols[j]:
-                st.markdown(
-                    f"**{col}** (Picklist values: {df[col].nunique()})")
-                st.dataframe(df[col].value_counts().rename_axis(
-                    "Value").reset_index(name="Count"))
-
-    st.header("10. Suggested Match & Merge Rules")
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    match_rules = []
-    for col in df.columns:
-        if col.lower() in ["email", "id", "phone"]:
-            match_type = "ExactMatch"
-        elif df[col].dtype == object and df[col].str.len().mean() > 10:
-            match_type = "FuzzyMatch"
-        elif df[col].dtype == object:
-            match_type = "CompositeMatch"
-        else:
-            match_type = "ExactMatch"
-        match_rules.append({"Column": col, "Suggested Match Rule": match_type})
-    st.dataframe(pd.DataFrame(match_rules))
-
-    st.header("11. Survivorship Rules (Suggestions)")
-
-    def calculate_survivorship_df(df, status_column="status", active_value="active"):
-        if status_column not in df.columns:
-            return 0.0  # If column doesn't exist
-        total_records = len(df)
-        if total_records == 0:
-            return 0.0
-        surviving_records = df[status_column].str.lower().eq(
-            active_value).sum()
-        return (surviving_records / total_records) * 100
-
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-    # surv_rules = []
-    # for col in df.columns:
-    #     if "date" in col.lower():
-    #         rule = "Most Recent"
-    #     elif df[col].dtype == object:
-    #         rule = "Longest Text"
-    #     elif df[col].dtype in [int, float]:
-    #         rule = "Max Value"
-    #     else:
-    #         rule = "Most Frequent"
-    #     surv_rules.append({"Column": col, "Survivorship Rule": rule})
-    # st.dataframe(pd.DataFrame(surv_rules))
-    # Survivorship Rate from DataFrame
-    # survivorship_rate = calculate_survivorship_df(df, status_column="status", active_value="active")
-
-    st.subheader("Survivorship Rate")
-    # st.metric(label="Rate of Active Records", value=f"{survivorship_rate:.2f}%")
-
-    if not df.empty:
-        col1, col2 = st.columns(2)
-
-        with col1:
-            # Select column to use for survivorship status
-            status_col = st.selectbox(
-                "Select Status Column", df.columns, key="status_col")
-
-        with col2:
-            # Select active value that signifies a "surviving" record
-            if status_col:
-                unique_values = df[status_col].dropna().unique()
-                active_value = st.selectbox(
-                    "Select Active Value", unique_values, key="active_value")
-
-        # Function to calculate survivorship rate
-        def calculate_survivorship(df, status_col, active_value):
-            total_records = len(df)
-            surviving_records = df[status_col].eq(active_value).sum()
-            if total_records == 0:
-                return 0
-            return (surviving_records / total_records) * 100
-
-        # Calculate and display the rate
-        survivorship_rate = calculate_survivorship(
-            df, status_col, active_value)
-        st.metric("Survivorship Rate", f"{survivorship_rate:.2f}%")
-
-    st.header("12.Duplicate Detection")
-    # df = df1.copy() if dataset_dup_detec == "Dataset 1" else df2.copy()
-    # duplicates = df[df.duplicated()]
-    # st.write(f"🔍 Found {len(duplicates)} duplicate records.")
-    # st.write(f"🔍 Found {round(len(duplicates)/len(df)*100, ndigits=2)} percent of duplicate records.")
-    # if not duplicates.empty:
-    #     st.dataframe(duplicates.head(10))
-    # ---- Load Data ----
-    df = df1.copy() if dataset_choice == "Dataset 1" else df2.copy()
-
-    # ---- Streamlit UI for Fuzzy Matching Columns ----
-    all_categorical = df.select_dtypes(include='object').columns.tolist()
-    # ['ID', 'UniqueID']
-    exclude_cols = [
-        col for col in all_categorical if df[col].nunique() == len(df)]
-    default_cols = [col for col in all_categorical if col not in exclude_cols]
-
-    dd_col1, dd_col2 = st.columns(2)
-    with dd_col1:
-        fuzzy_columns = st.multiselect(
-            "Select columns for fuzzy matching", options=all_categorical, default=default_cols)
-    with dd_col2:
-        threshold = st.slider("Fuzzy match threshold",
-                              min_value=50, max_value=100, value=90, step=5)
-
-    # ---- Exact Duplicate Detection ----
-    exact_dupes = df[df.duplicated(keep=False)].copy()
-    exact_dupe_indices = set(exact_dupes.index)
-
-    # ---- Fuzzy Duplicate Detection (with blocking optimization) ----
-    matched_indices = set()
-    if fuzzy_columns:
-        # Create a blocking key (e.g., first character of name or phone)
-        df['__fuzzy_key__'] = df[fuzzy_columns].fillna(
-            '').agg(' '.join, axis=1)
-        df['__block_key__'] = df[fuzzy_columns[0]].str[0].fillna('')
-
-        for _, block_df in df.groupby('__block_key__'):
-            keys = block_df['__fuzzy_key__'].tolist()
-            indices = block_df.index.tolist()
-
-            for i in range(len(keys)):
-                if indices[i] in matched_indices:
-                    continue
-                matches = process.extract(
-                    keys[i], keys, scorer=fuzz.token_sort_ratio, limit=None)
-                for match_text, score, match_idx in matches:
-                    idx_j = indices[match_idx]
-                    if score >= threshold and indices[i] != idx_j:
-                        matched_indices.add(indices[i])
-                        matched_indices.add(idx_j)
-
-        fuzzy_dupe_indices = matched_indices
-        df.drop(columns=['__fuzzy_key__', '__block_key__'], inplace=True)
-    else:
-        fuzzy_dupe_indices = set()
-
-    fuzzy_dupes = df.loc[list(fuzzy_dupe_indices)].copy()
-
-    # ---- Classify Duplicates by Type ----
-    only_exact = exact_dupe_indices - fuzzy_dupe_indices
-    only_fuzzy = fuzzy_dupe_indices - exact_dupe_indices
-    both = exact_dupe_indices & fuzzy_dupe_indices
-
-    # Map duplicate types
-    duplicate_types = {}
-    for idx in only_exact:
-        duplicate_types[idx] = "Exact"
-    for idx in only_fuzzy:
-        duplicate_types[idx] = "Fuzzy"
-    for idx in both:
-        duplicate_types[idx] = "Both"
-
-    duplicates_combined = df.loc[list(duplicate_types.keys())].copy()
-    duplicates_combined["DuplicateType"] = duplicates_combined.index.map(
-        duplicate_types)
-
-    # ---- Display Summary ----
-    st.subheader("🔍 Duplicate Detection Summary")
-    st.write(f"✅ Exact duplicates: **{len(only_exact)}**")
-    st.write(f"🔁 Fuzzy duplicates: **{len(only_fuzzy)}**")
-    st.write(f"🔂 Both: **{len(both)}**")
-    st.write(f"📊 Total: **{len(duplicates_combined)}** "
-             f"({round(len(duplicates_combined)/len(df)*100, 2)}%)")
-
-    if not duplicates_combined.empty:
-        st.subheader("🧾 Sample Duplicate Records")
-        st.dataframe(duplicates_combined.head(10))
-
-    # # ---- Export Buttons ----
-    # def to_csv_download(df, file_name):
-    #     buffer = BytesIO()
-    #     df.to_csv(buffer, index=False)
-    #     return buffer.getvalue()
-
-    # if not duplicates_combined.empty:
-    #     st.subheader("⬇️ Download Duplicates")
-
-    #     col1, col2, col3 = st.columns(3)
-    #     with col1:
-    #         st.download_button("Download Exact", to_csv_download(df.loc[list(only_exact)]), file_name="exact_duplicates.csv")
-    #     with col2:
-    #         st.download_button("Download Fuzzy", to_csv_download(df.loc[list(only_fuzzy)]), file_name="fuzzy_duplicates.csv")
-    #     with col3:
-    #         st.download_button("Download Both", to_csv_download(df.loc[list(both)]), file_name="both_duplicates.csv")
-
-        # Header
-    st.header("13. Cross-Source Matching")
-
-    # Columns for layout
-    csm_col1, csm_col2 = st.columns(2)
-
-    if df1 and df2:
-        common_columns = list(set(df1.columns) & set(df2.columns))
-
-        with csm_col1:
-            match_columns = st.multiselect(
-                "Select matching columns", common_columns, default=common_columns[:2])
-
-        with csm_col2:
-            threshold = st.slider("Similarity threshold", 0, 100, 85)
-
-        weights = {}
-        for col in match_columns:
-            with csm_col1:
-                weights[col] = st.slider(f"Weight for '{col}'", 1, 10, 5)
-
-        with csm_col2:
-            block_col = st.selectbox("Select a blocking column (optional)", [
-                                    None] + common_columns)
-
-        st.subheader("Results")
-
-        def compute_similarity(row1, row2, cols, weights):
-            score = 0
-            total_weight = 0
-            for col in cols:
-                val1 = str(row1.get(col, '')).strip().lower()
-                val2 = str(row2.get(col, '')).strip().lower()
-                s = fw.token_sort_ratio(val1, val2)
-                score += s * weights[col]
-                total_weight += weights[col]
-            return round(score / total_weight, 2) if total_weight > 0 else 0
-
-        matches = []
-        if block_col:
-            df1_blocks = df1.groupby(block_col)
-            df2_blocks = df2.groupby(block_col)
-            common_keys = set(df1[block_col].dropna()) & set(
-                df2[block_col].dropna())
-            for key in stqdm(common_keys, desc="Matching Blocks"):
-                block1 = df1_blocks.get_group(key)
-                block2 = df2_blocks.get_group(key)
-                for i1, row1 in block1.iterrows():
-                    for i2, row2 in block2.iterrows():
-                        sim = compute_similarity(
-                            row1, row2, match_columns, weights)
-                        if sim >= threshold:
-                            matches.append({
-                                "DF1_Index": i1,
-                                "DF2_Index": i2,
-                                "Score": sim,
-                                **{f"{col}_1": row1[col] for col in match_columns},
-                                **{f"{col}_2": row2[col] for col in match_columns},
-                            })
-        else:
-            for i1, row1 in df1.iterrows():
-                for i2, row2 in df2.iterrows():
-                    sim = compute_similarity(row1, row2, match_columns, weights)
-                    if sim >= threshold:
-                        matches.append({
-                            "DF1_Index": i1,
-                            "DF2_Index": i2,
-                            "Score": sim,
-                            **{f"{col}_1": row1[col] for col in match_columns},
-                            **{f"{col}_2": row2[col] for col in match_columns},
-                        })
-
-        # Display results
-        if matches:
-            results_df = pd.DataFrame(matches).sort_values(
-                by="Score", ascending=False)
-            st.success(f"✅ Found {len(results_df)} matched pairs")
-            st.dataframe(results_df.head(30))
-            st.download_button("📥 Download Matched Pairs",
-                            results_df.to_csv(index=False), "matched_pairs.csv")
-        else:
-            st.warning("No matches found based on current configuration.")
-    else:
-        st.info("Please upload both datasets to enable matching.")
+performance_panel()
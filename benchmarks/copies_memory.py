@@ -0,0 +1,125 @@
+"""Peak RSS of app.py's per-section DataFrame handling, before and after
+removing the per-section ``df1.copy()`` calls.
+
+    python benchmarks/copies_memory.py --rows 5000000
+
+Each mode runs in its own subprocess. On Linux the peak RSS (VmHWM) is reset
+after the data is generated, so the reported peak covers the sections only.
+"""
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+SECTIONS = 12
+
+
+def generate(rows: int, seed: int = 0) -> pd.DataFrame:
+    # Same columns as dataset.py's generated_dataset1.csv, built with NumPy
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    user = letters[rng.integers(0, 26, size=(rows, 6))].astype(object).sum(axis=1)
+    domains = np.array(["@gmail.com", "@yahoo.com", "@hotmail.com"], dtype=object)
+    return pd.DataFrame({
+        "UniqueID": pd.Series(rng.permutation(rows)).map("U{:08d}".format),
+        "Name": np.array(["Alice", "Bob", "Charlie", "David", "Eve"], dtype=object)[rng.integers(0, 5, rows)],
+        "Age": rng.integers(18, 71, rows),
+        "Email": user + domains[rng.integers(0, 3, rows)],
+        "Phone": pd.Series(rng.integers(10**9, 10**10, rows)).map("+91 {}".format),
+        "JoinDate": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1096, rows), unit="D"),
+        "Flag": rng.integers(0, 2, rows).astype(bool),
+    })
+
+
+def run_before(df: pd.DataFrame):
+    # Old app.py: a fresh deep copy at the top of every section, plus the
+    # extra copies and helper columns in sections 3 and 12.
+    for section in range(1, SECTIONS + 1):
+        frame = df.copy()
+        if section == 3:
+            email_df = frame.copy()
+            email_df["Email_Domain"] = email_df["Email"].astype(str).str.extract(r"@(.+)$")
+            email_df["Email_Domain"].value_counts()
+            del email_df
+        if section == 12:
+            frame["__fuzzy_key__"] = frame[["Name", "Email"]].fillna("").agg(" ".join, axis=1)
+            frame["__block_key__"] = frame["Name"].str[0].fillna("")
+            frame.drop(columns=["__fuzzy_key__", "__block_key__"], inplace=True)
+    return frame
+
+
+def run_after(df: pd.DataFrame):
+    # Current app.py: every section reads the shared frame; sections 3 and 12
+    # build their own side series instead of adding columns.
+    pd.set_option("mode.copy_on_write", True)
+    for section in range(1, SECTIONS + 1):
+        frame = df
+        if section == 3:
+            frame["Email"].astype(str).str.extract(r"@(.+)$", expand=False).value_counts()
+        if section == 12:
+            pd.DataFrame({
+                "__fuzzy_key__": frame[["Name", "Email"]].fillna("").agg(" ".join, axis=1),
+                "__block_key__": frame["Name"].str[0].fillna(""),
+            })
+    return frame
+
+
+def _status_kib(field: str):
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+
+
+def reset_peak_rss() -> int:
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux only);
+    # elsewhere the peak also includes data generation.
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+        return _status_kib("VmRSS")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss() -> int:
+    try:
+        return _status_kib("VmHWM")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def measure(mode: str, rows: int):
+    df = generate(rows)
+    baseline = reset_peak_rss()
+    start = time.perf_counter()
+    (run_before if mode == "before" else run_after)(df)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss()
+    print(f"{mode}\t{baseline / 1024:.0f}\t{peak / 1024:.0f}\t"
+          f"{(peak - baseline) / 1024:.0f}\t{elapsed:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--mode", choices=["before", "after"])
+    args = parser.parse_args()
+
+    if args.mode:
+        measure(args.mode, args.rows)
+        return
+
+    print(f"rows={args.rows:,}")
+    print("mode\tloaded MiB\tpeak MiB\tabove loaded MiB\tseconds")
+    for mode in ("before", "after"):
+        subprocess.run([sys.executable, __file__, "--rows", str(args.rows), "--mode", mode],
+                       check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Time of functional dependency discovery on a wide table and inclusion
+dependency discovery between two tables (profiler.dependencies).
+
+    python benchmarks/dependencies.py --rows 5000000 --columns 50
+
+The wide table is benchmarks/keys.py's, plus two planted dependencies:
+store -> store_group and (store, day) -> shift. The second table has one
+row per account with its own columns and a reference to the first table's
+region, so account (first) is included in account_id (second) and the
+other way round, and region in home_region.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.keys import generate  # noqa: E402
+from profiler.dependencies import (DEFAULT_MAX_LHS, functional_dependencies,  # noqa: E402
+                                   inclusion_dependencies, join_keys)
+
+PLANTED = [(('store',), 'store_group'), (('store', 'day'), 'shift')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--columns', type=int, default=50)
+    parser.add_argument('--max-lhs', type=int, default=DEFAULT_MAX_LHS)
+    args = parser.parse_args()
+    df = generate(args.rows, args.columns - 2)
+    df['store_group'] = (df['store'] % 7).astype(np.int16)
+    df['shift'] = ((df['day'] * 3 + df['store']) % 11).astype(np.int16)
+    accounts = df['account'].unique()
+    rng = np.random.default_rng(1)
+    other = pd.DataFrame({
+        'account_id': rng.permutation(accounts),
+        'home_region': df['region'].cat.categories[rng.integers(0, 50, len(accounts))],
+        'balance': rng.normal(1000, 300, len(accounts)).round(2),
+        'tier': rng.integers(0, 4, len(accounts)),
+    })
+
+    start = time.perf_counter()
+    fds = functional_dependencies(df, args.max_lhs)
+    print(f"rows={args.rows:,} columns={df.shape[1]} determinants of up to {args.max_lhs}")
+    print(f"  functional dependencies  {time.perf_counter() - start:7.2f}s  {len(fds)} found, "
+          f"planted ones {'found' if all(fd in fds for fd in PLANTED) else 'MISSING'}")
+    start = time.perf_counter()
+    inclusions = inclusion_dependencies(df, other)
+    print(f"  inclusion dependencies   {time.perf_counter() - start:7.2f}s  "
+          f"{len(df.columns)} x {len(other.columns)} column pairs, {len(inclusions)} found")
+    print(f"  join keys: {', '.join(f'{left} = {right}' for left, right in join_keys(inclusions))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Speed of section 12's exact duplicates and Exact/Fuzzy/Both
+classification: ``duplicated`` with Python sets and dicts, as before,
+against row hashes and array operations (profiler.engine), checking that
+both flag the same rows with the same types.
+
+    python benchmarks/exact_duplicates.py --rows 2000000 --duplicates 0.3
+
+A ``--duplicates`` share of the rows are copies of others. The fuzzy
+groups are random, a third of the rows in groups of about ten.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiler.engine import duplicate_summary, duplicate_types, exact_duplicates  # noqa: E402
+
+
+def legacy_duplicate_types(df, fuzzy_clusters):
+    # profiler.engine before row hashing
+    exact = set(df[df.duplicated(keep=False)].index)
+    fuzzy = set(fuzzy_clusters.index[fuzzy_clusters >= 0])
+    types = {idx: "Exact" for idx in exact - fuzzy}
+    types.update({idx: "Fuzzy" for idx in fuzzy - exact})
+    types.update({idx: "Both" for idx in exact & fuzzy})
+    counts = pd.Series(list(types.values()), dtype=object).value_counts()
+    return types, counts
+
+
+def generate(rows: int, duplicates: float, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    copies = int(rows * duplicates)
+    unique = rows - copies
+    df = pd.DataFrame({
+        'id': rng.integers(0, 1_000, unique),
+        'name': rng.choice(np.array([f'name {i}' for i in range(5_000)], dtype=object), unique),
+        'amount': rng.random(unique).round(3),
+        'email': rng.choice(np.array([f'x{i}@mail.com' for i in range(100_000)] + [None],
+                                     dtype=object), unique),
+        'tier': pd.Categorical.from_codes(rng.integers(0, 4, unique), ['a', 'b', 'c', 'd']),
+    })
+    rows_copied = rng.integers(0, unique, copies)
+    return pd.concat([df, df.iloc[rows_copied]], ignore_index=True).iloc[rng.permutation(rows)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--duplicates', type=float, default=0.3)
+    args = parser.parse_args()
+    df = generate(args.rows, args.duplicates)
+    rng = np.random.default_rng(1)
+    fuzzy_clusters = pd.Series(np.where(rng.random(args.rows) < 1 / 3,
+                                        rng.integers(0, args.rows // 30 + 1, args.rows), -1),
+                               index=df.index)
+
+    start = time.perf_counter()
+    legacy, legacy_counts = legacy_duplicate_types(df, fuzzy_clusters)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    exact_groups, sizes = exact_duplicates(df)
+    types = duplicate_types(exact_groups, fuzzy_clusters)
+    summary = duplicate_summary(types, exact_groups, fuzzy_clusters, len(df))
+    engine_time = time.perf_counter() - start
+    assert legacy == dict(zip(types.index, types.astype(str)))
+    assert summary['exact'] == legacy_counts.get('Exact', 0)
+    print(f"rows={args.rows:,} duplicates={args.duplicates:.0%}")
+    print(f"legacy {legacy_time:.2f}s  engine {engine_time:.2f}s  "
+          f"speedup {legacy_time / engine_time:.1f}x (same {len(legacy):,} rows; "
+          f"{len(sizes):,} exact groups, largest {sizes.max(initial=0):,})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Load time and memory of the same dataset stored as CSV, Parquet and
+Feather, read whole and with column projection through
+profiler.loading.read_table.
+
+    python benchmarks/formats.py --rows 1000000 --columns Name Email
+
+Files are read from disk, so Parquet and Feather are memory-mapped.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.copies_memory import generate  # noqa: E402
+from profiler.loading import read_table  # noqa: E402
+
+WRITERS = {
+    'generated.csv': lambda df, path: df.to_csv(path, index=False),
+    'generated.parquet': lambda df, path: df.to_parquet(path, index=False),
+    'generated.feather': lambda df, path: df.to_feather(path, compression='uncompressed'),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--columns', nargs='+', default=['Name', 'Email'])
+    args = parser.parse_args()
+    df = generate(args.rows)
+    print(f"rows={args.rows:,} projection={args.columns}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, write in WRITERS.items():
+            path = os.path.join(directory, name)
+            write(df, path)
+            for columns in (None, args.columns):
+                start = time.perf_counter()
+                loaded = read_table(path, name, columns)
+                load_time = time.perf_counter() - start
+                memory = loaded.memory_usage(deep=True).sum() / 2**20
+                label = 'projected' if columns else 'all columns'
+                print(f"  {name:18} {os.path.getsize(path) / 2**20:8,.1f} MB on disk  {label:11}  "
+                      f"load {load_time:6.2f}s  memory {memory:8,.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Speed of section 12's fuzzy duplicate detection: the original
+process.extract loop against profiler.duplicates.duplicate_clusters, checking
+that both flag the same rows.
+
+    python benchmarks/fuzzy_duplicates.py --rows 20000 --scale-rows 1000000
+
+The original loop only runs at --rows; the new engine is also timed alone at
+--scale-rows.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiler.duplicates import duplicate_clusters  # noqa: E402
+
+FIRST_NAMES = np.array(['alice', 'bob', 'carol', 'dave', 'eve', 'frank', 'grace', 'heidi',
+                        'ivan', 'judy', 'mallory', 'oscar', 'peggy', 'trent', 'victor', 'walter'])
+
+
+def legacy_fuzzy_duplicates(_df, fuzzy_columns, threshold):
+    # app.py's cached_fuzzy_duplicates before the clustering engine
+    matched_indices = set()
+    fuzzy_df = pd.DataFrame({
+        '__fuzzy_key__': _df[fuzzy_columns].fillna('').agg(' '.join, axis=1),
+        '__block_key__': _df[fuzzy_columns[0]].str[0].fillna(''),
+    })
+    for _, block_df in fuzzy_df.groupby('__block_key__'):
+        keys = block_df['__fuzzy_key__'].tolist()
+        indices = block_df.index.tolist()
+        for i in range(len(keys)):
+            if indices[i] in matched_indices:
+                continue
+            matches = process.extract(
+                keys[i], keys, scorer=fuzz.token_sort_ratio, limit=None)
+            for match_text, score, match_idx in matches:
+                idx_j = indices[match_idx]
+                if score >= threshold and indices[i] != idx_j:
+                    matched_indices.add(indices[i])
+                    matched_indices.add(idx_j)
+    return matched_indices
+
+
+def generate(rows: int, seed: int = 0) -> pd.DataFrame:
+    # Names drawn from a pool with single-character typos, so near
+    # duplicates exist at every threshold
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    surnames = letters[rng.integers(0, 26, size=(max(rows // 10, 1), 7))].astype(object).sum(axis=1)
+    names = pd.Series(FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), rows)]) + ' ' \
+        + surnames[rng.integers(0, len(surnames), rows)]
+    typo = rng.random(rows) < 0.2
+    position = rng.integers(0, 5, rows)
+    names[typo] = [name[:p] + letter + name[p + 1:] for name, p, letter in
+                   zip(names[typo], position[typo], letters[rng.integers(0, 26, typo.sum())])]
+    return pd.DataFrame({
+        'Name': names,
+        'City': rng.choice(np.array(['london', 'paris', 'rome', 'madrid', None], dtype=object), rows),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--scale-rows', type=int, default=0)
+    parser.add_argument('--threshold', type=int, default=90)
+    args = parser.parse_args()
+    columns = ['Name', 'City']
+
+    df = generate(args.rows)
+    start = time.perf_counter()
+    legacy = legacy_fuzzy_duplicates(df, columns, args.threshold)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    clusters = duplicate_clusters(df, columns, args.threshold)
+    engine_time = time.perf_counter() - start
+    assert legacy == set(clusters.index[clusters >= 0])
+    print(f"rows={args.rows:,} threshold={args.threshold}")
+    print(f"legacy {legacy_time:.2f}s  engine {engine_time:.2f}s  "
+          f"speedup {legacy_time / engine_time:.1f}x (same {len(legacy):,} rows, "
+          f"{clusters.max() + 1:,} groups)")
+
+    if args.scale_rows:
+        df = generate(args.scale_rows)
+        start = time.perf_counter()
+        clusters = duplicate_clusters(df, columns, args.threshold)
+        print(f"rows={args.scale_rows:,} engine {time.perf_counter() - start:.1f}s "
+              f"({(clusters >= 0).sum():,} rows in {clusters.max() + 1:,} groups)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Cost of re-profiling a table after appending rows, incrementally
+(profiler.incremental) against a full recompute (profiler.engine), and a
+check that sections 2, 3, 5, 6 and 7 agree.
+
+    python benchmarks/incremental.py --rows 2000000 --append 0.03
+
+The table is written as CSV and loaded with profiler.loading, so both runs
+see the same Arrow-backed frame the app would. The check is then repeated
+with a column of mixed Python objects added and the categorical Name column
+loaded as plain strings in the second version: every old partition should
+still be reused.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.copies_memory import generate  # noqa: E402
+from profiler import engine  # noqa: E402
+from profiler.incremental import DEFAULT_PARTITION_ROWS, profile_incrementally  # noqa: E402
+from profiler.loading import read_table  # noqa: E402
+from profiler.patterns import pattern_table  # noqa: E402
+
+# Combined per partition, so equal up to floating-point rounding
+ROUNDED = {'Mean', 'Std Dev'}
+
+
+def full_sections(df: pd.DataFrame) -> dict:
+    distinct = engine.distinct_counts(df)
+    hits = engine.pattern_hits(df)
+    return {
+        'column_profiling': engine.column_profiling(df, distinct),
+        'pattern_analysis': pattern_table(hits),
+        'null_percentages': engine.null_percentages(df),
+        'table_summary': pd.Series(engine.table_summary(df, distinct)),
+        'quality_scores': engine.quality_scores(df, hits, distinct),
+    }
+
+
+def incremental_sections(profile) -> dict:
+    return {
+        'column_profiling': profile.column_profiling(),
+        'pattern_analysis': profile.pattern_analysis(),
+        'null_percentages': profile.null_percentages(),
+        'table_summary': pd.Series(profile.table_summary()),
+        'quality_scores': profile.quality_scores(),
+    }
+
+
+def differences(full: dict, incremental: dict) -> list:
+    found = []
+    for name, expected in full.items():
+        actual = incremental[name]
+        if isinstance(expected, pd.Series):
+            expected, actual = expected.to_frame(), actual.to_frame()
+        for col in expected.columns:
+            left, right = expected[col].astype(str), actual[col].astype(str)
+            if col in ROUNDED:
+                left = pd.to_numeric(expected[col]).to_numpy(dtype=float)
+                right = pd.to_numeric(actual[col]).to_numpy(dtype=float)
+                if not np.allclose(left, right, rtol=1e-9, equal_nan=True):
+                    found.append(f'{name}.{col}')
+            elif not left.equals(right):
+                found.append(f'{name}.{col}')
+    return found
+
+
+def with_mixed_column(df: pd.DataFrame) -> pd.DataFrame:
+    # Booleans and strings, which Arrow can't put in one array (and neither
+    # parses as a date, so Date % stays exact)
+    return df.assign(Mixed=np.array([True, 'yes', False], dtype=object)[np.arange(len(df)) % 3])
+
+
+def compare(old: pd.DataFrame, df: pd.DataFrame, state: str, partition_rows: int):
+    start = time.perf_counter()
+    profile_incrementally(old, state, partition_rows=partition_rows)
+    print(f"  first run (builds state) {time.perf_counter() - start:7.2f}s  "
+          f"state {os.path.getsize(state) / 2**20:,.1f} MB")
+    start = time.perf_counter()
+    profile, info = profile_incrementally(df, state, partition_rows=partition_rows)
+    incremental = incremental_sections(profile)
+    incremental_time = time.perf_counter() - start
+    print(f"  incremental              {incremental_time:7.2f}s  "
+          f"({info['reused']} of {info['partitions']} partitions reused)")
+    start = time.perf_counter()
+    full = full_sections(df)
+    full_time = time.perf_counter() - start
+    print(f"  full recompute           {full_time:7.2f}s")
+    mismatched = differences(full, incremental)
+    print(f"  sections 2, 3, 5, 6, 7: {'identical' if not mismatched else 'differ in ' + ', '.join(mismatched)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--append', type=float, default=0.03, help="share of rows appended")
+    parser.add_argument('--partition-rows', type=int, default=DEFAULT_PARTITION_ROWS)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'generated.csv')
+        generate(args.rows).to_csv(path, index=False)
+        df = read_table(path, path)
+        state = os.path.join(directory, 'generated.profile-state')
+        old = df.iloc[:int(len(df) / (1 + args.append))]
+        print(f"rows={len(old):,} + {len(df) - len(old):,} appended, "
+              f"partitions of {args.partition_rows:,}")
+
+        compare(old, df, state, args.partition_rows)
+
+        print("mixed-type column; Name categorical, then plain strings")
+        os.remove(state)
+        compare(with_mixed_column(old),
+                with_mixed_column(df.astype({'Name': df['Name'].dtype.categories.dtype})),
+                state, args.partition_rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Time of section 8's composite key discovery (profiler.keys) on a wide
+table, against checking every column combination with ``duplicated``.
+
+    python benchmarks/keys.py --rows 5000000 --columns 50
+
+The table has one three-column key (store, day, till), one two-column key
+(region, account) and filler columns of 2 to 1,000 distinct values, some
+with nulls. The naive search is timed on ``--naive-rows`` rows, where the
+two are also checked to agree.
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiler.keys import DEFAULT_MAX_KEY_SIZE, unique_column_combinations  # noqa: E402
+
+
+def generate(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(rows).astype(np.int32)
+    tills = 10
+    days = -(-rows // (tills * 100))
+    data = {
+        'store': order // (days * tills),
+        'day': order // tills % days,
+        'till': order % tills,
+        'region': pd.Categorical.from_codes(order % 50, [f'R{i:02d}' for i in range(50)]),
+        'account': order // 50,
+    }
+    for i in range(columns - len(data)):
+        cardinality = [2, 7, 30, 200, 1_000][i % 5]
+        values = rng.integers(0, cardinality, rows, dtype=np.int16)
+        if i % 4 == 1:
+            values[rng.random(rows, dtype=np.float32) < 0.01] = -1
+        if i % 3 == 0:
+            data[f'filler{i}'] = pd.Categorical.from_codes(
+                values, [f'v{j}' for j in range(cardinality)])
+        elif i % 4 == 1:
+            data[f'filler{i}'] = pd.array(values, dtype='Int16', copy=False)
+            data[f'filler{i}'][values < 0] = pd.NA
+        else:
+            data[f'filler{i}'] = values
+    return pd.DataFrame(data)
+
+
+def naive_keys(df: pd.DataFrame, max_size: int) -> list:
+    keys = []
+    for size in range(1, max_size + 1):
+        for combination in itertools.combinations(df.columns, size):
+            if any(set(key) <= set(combination) for key in keys):
+                continue
+            subset = df[list(combination)]
+            if subset.notna().all().all() and not subset.duplicated().any():
+                keys.append(combination)
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--columns', type=int, default=50)
+    parser.add_argument('--max-size', type=int, default=DEFAULT_MAX_KEY_SIZE)
+    parser.add_argument('--naive-rows', type=int, default=20_000)
+    args = parser.parse_args()
+
+    small = generate(args.naive_rows, args.columns)
+    start = time.perf_counter()
+    expected = naive_keys(small, args.max_size)
+    naive_time = time.perf_counter() - start
+    start = time.perf_counter()
+    found = unique_column_combinations(small, args.max_size)
+    print(f"rows={args.naive_rows:,} columns={args.columns} max size={args.max_size}")
+    print(f"  every combination  {naive_time:7.2f}s")
+    print(f"  profiler.keys      {time.perf_counter() - start:7.2f}s  "
+          f"({'same keys' if found == expected else 'keys differ'})")
+
+    df = generate(args.rows, args.columns)
+    start = time.perf_counter()
+    found = unique_column_combinations(df, args.max_size)
+    print(f"rows={args.rows:,}")
+    print(f"  profiler.keys      {time.perf_counter() - start:7.2f}s  "
+          f"keys: {', '.join(' + '.join(key) for key in found)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Load time and memory of the default pd.read_csv against
+profiler.loading.read_csv (pyarrow engine, Arrow-backed dtypes and
+automatic categoricals).
+
+    python benchmarks/loading.py path/to/file.csv [...]
+    python benchmarks/loading.py --rows 5000000
+
+Without paths a CSV shaped like dataset.py's output is generated. Memory is
+the frame's deep memory_usage; each loader also runs the section 2 profiling
+records on its frame to show the downstream cost.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.copies_memory import generate  # noqa: E402
+from profiler.loading import read_csv  # noqa: E402
+from profiler.profiling import profiling_records  # noqa: E402
+
+LOADERS = {
+    'pd.read_csv': pd.read_csv,
+    'pyarrow, no categoricals': lambda path: read_csv(path, categories=False),
+    'pyarrow + categoricals': read_csv,
+}
+
+
+def report(path: str):
+    print(f"{path} ({os.path.getsize(path) / 2**20:,.1f} MB)")
+    for name, loader in LOADERS.items():
+        start = time.perf_counter()
+        df = loader(path)
+        load_time = time.perf_counter() - start
+        memory = df.memory_usage(deep=True).sum() / 2**20
+        start = time.perf_counter()
+        profiling_records(df)
+        profile_time = time.perf_counter() - start
+        print(f"  {name:26} load {load_time:7.2f}s  memory {memory:9,.1f} MB  "
+              f"section 2 {profile_time:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+    if args.paths:
+        for path in args.paths:
+            report(path)
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'generated.csv')
+        generate(args.rows).to_csv(path, index=False)
+        report(path)
+
+
+if __name__ == '__main__':
+    main()
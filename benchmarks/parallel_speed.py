@@ -0,0 +1,65 @@
+"""Speed of the column-parallel backend (profiler.parallel) against the
+serial path for sections 2, 3, 4 and 9, checking that both give the same
+results.
+
+    python benchmarks/parallel_speed.py --rows 1000000 --columns 100 --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.profiling_speed import generate  # noqa: E402
+from profiler.parallel import DEFAULT_WORKERS, map_columns  # noqa: E402
+from profiler.patterns import pattern_hits_by_column  # noqa: E402
+from profiler.profiling import profiling_records  # noqa: E402
+from profiler.values import picklist_counts, top_values  # noqa: E402
+
+TASKS = [
+    ('column profiling', profiling_records),
+    ('pattern hits', pattern_hits_by_column),
+    ('top values', top_values),
+    ('picklists', picklist_counts),
+]
+
+
+def assert_same(serial, parallel):
+    if isinstance(serial, list):
+        pd.testing.assert_frame_equal(pd.DataFrame(serial), pd.DataFrame(parallel), check_exact=True)
+    elif isinstance(serial, dict):
+        assert list(serial) == list(parallel)
+        for key, value in serial.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(value, parallel[key], check_exact=True)
+            else:
+                assert value == parallel[key], key
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--columns', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    df = generate(args.rows, args.columns)
+    print(f"rows={args.rows:,} columns={args.columns} workers={args.workers}")
+    # The first parallel call also starts the pool; keep that out of the timings
+    map_columns(pd.DataFrame.nunique, df, args.workers)
+    for name, func in TASKS:
+        start = time.perf_counter()
+        serial = func(df)
+        serial_time = time.perf_counter() - start
+        start = time.perf_counter()
+        parallel = map_columns(func, df, args.workers)
+        parallel_time = time.perf_counter() - start
+        assert_same(serial, parallel)
+        print(f"{name:<17} serial {serial_time:6.2f}s  parallel {parallel_time:6.2f}s  "
+              f"speedup {serial_time / parallel_time:4.1f}x (identical)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Speed of profiler.profiling.column_profiling against the original
+per-column loop from app.py, checking that both produce the same frame.
+
+    python benchmarks/profiling_speed.py --rows 1000000 --columns 100
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiler.profiling import column_profiling  # noqa: E402
+
+
+def legacy_column_profiling(df):
+    # app.py's column_profiling before the profiling engine
+    profiling_data = []
+    for column in df.columns:
+        data_type = df[column].dtype
+        unique_values = df[column].nunique()
+        uniqueness_percentage = (unique_values / len(df)) * 100
+        null_count = df[column].isnull().sum()
+        null_percentage = (null_count / len(df)) * 100
+        min_length = df[column].astype(str).map(len).min()
+        max_length = df[column].astype(str).map(len).max()
+        avg_length = df[column].astype(str).map(len).mean()
+
+        if np.issubdtype(df[column].dtype, np.number):
+            min_value = df[column].min()
+            max_value = df[column].max()
+            mean_value = df[column].mean()
+            median_value = df[column].median()
+            std_dev_value = df[column].std()
+        else:
+            min_value = None
+            max_value = None
+            mean_value = None
+            median_value = None
+            std_dev_value = None
+
+        profiling_data.append({
+            'Column Name': column,
+            'Data Type': data_type,
+            'Unique Values': unique_values,
+            'Uniqueness %': uniqueness_percentage,
+            'Null Count': null_count,
+            'Null %': null_percentage,
+            'Min Length': min_length,
+            'Max Length': max_length,
+            'Avg Length': avg_length,
+            'Min Value': min_value,
+            'Max Value': max_value,
+            'Mean': mean_value,
+            'Median': median_value,
+            'Std Dev': std_dev_value
+        })
+
+    return pd.DataFrame(profiling_data)
+
+
+def generate(rows: int, columns: int, seed: int = 0) -> pd.DataFrame:
+    # Cycles through the kinds of columns dataset.py produces
+    rng = np.random.default_rng(seed)
+    names = np.array(['Alice', 'Bob', 'Charlie', 'David', 'Eve', None], dtype=object)
+    emails = pd.Series(rng.integers(0, rows, rows)).map('user{}@gmail.com'.format).to_numpy()
+    dates = pd.Series(pd.Timestamp('2020-01-01') + pd.to_timedelta(
+        rng.integers(0, 1096, rows), unit='D')).astype(str).to_numpy()
+    makers = [
+        lambda: names[rng.integers(0, 6, rows)],
+        lambda: np.where(rng.random(rows) < 0.2, np.nan, rng.integers(18, 71, rows)),
+        lambda: emails,
+        lambda: rng.integers(0, 10**9, rows),
+        lambda: np.where(rng.random(rows) < 0.2, np.nan, rng.random(rows) * 100),
+        lambda: dates,
+        lambda: rng.integers(0, 2, rows).astype(bool),
+    ]
+    return pd.DataFrame({f'col{i}': makers[i % len(makers)]() for i in range(columns)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--columns', type=int, default=100)
+    args = parser.parse_args()
+
+    df = generate(args.rows, args.columns)
+    timings = {}
+    results = {}
+    for name, func in (('engine', column_profiling), ('legacy', legacy_column_profiling)):
+        start = time.perf_counter()
+        results[name] = func(df)
+        timings[name] = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(results['engine'], results['legacy'])
+    print(f"rows={args.rows:,} columns={args.columns}")
+    print(f"legacy {timings['legacy']:.2f}s  engine {timings['engine']:.2f}s  "
+          f"speedup {timings['legacy'] / timings['engine']:.1f}x (outputs identical)")
+
+
+if __name__ == '__main__':
+    main()
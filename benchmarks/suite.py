@@ -0,0 +1,187 @@
+"""Time and peak memory of every profiler section and matcher on generated
+datasets, with a history to catch regressions.
+
+    python benchmarks/suite.py --rows 10000 1000000 10000000
+    python benchmarks/suite.py --rows 10000 --steps top_values picklists --no-memory
+
+The data is dataset.py's (5% exact and 5% fuzzy duplicates, 80% of dataset
+2 overlapping dataset 1), stored as profiler.loading would load it. Each
+step runs on the results of the steps before it, as profile_table chains
+them. Memory is measured in a second pass under tracemalloc, which slows
+the code down; it sees NumPy and Python allocations but not Arrow's.
+
+Every run is appended to a JSON-lines history. A step is reported as a
+regression when it takes more than ``--tolerance`` longer (and at least
+MIN_REGRESSION_SECONDS more) than the median of the last HISTORY_RUNS runs
+of the same rows on the same host; the script then exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dataset  # noqa: E402
+from profiler.engine import (blocking_plan, column_profiling, cross_source_matches,  # noqa: E402
+                             default_fuzzy_columns, distinct_counts, exact_duplicates,
+                             functional_dependency_table, fuzzy_duplicates, match_rules,
+                             null_percentages, pattern_hits, picklists, primary_keys,
+                             quality_scores, schema_links, table_summary, top_value_counts,
+                             value_frequencies)
+from profiler.loading import categorize  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+DEFAULT_HISTORY = os.path.join(ROOT, 'benchmarks', 'history.jsonl')
+HISTORY_RUNS = 5
+DEFAULT_TOLERANCE = 0.25
+MIN_REGRESSION_SECONDS = 0.05
+FUZZY_THRESHOLD = 90
+MATCH_THRESHOLD = 80
+
+# (name, function of the results so far); each result is stored under name
+STEPS = [
+    ('value_frequencies', lambda r: value_frequencies(r['df'])),
+    ('distinct_counts', lambda r: distinct_counts(r['df'], frequencies=r['value_frequencies'])),
+    ('column_profiling', lambda r: column_profiling(r['df'], r['distinct_counts'])),
+    ('pattern_hits', lambda r: pattern_hits(r['df'])),
+    ('top_values', lambda r: top_value_counts(r['df'], r['value_frequencies'])),
+    ('null_percentages', lambda r: null_percentages(r['df'])),
+    ('table_summary', lambda r: table_summary(r['df'], r['distinct_counts'])),
+    ('quality_scores', lambda r: quality_scores(r['df'], r['pattern_hits'], r['distinct_counts'])),
+    ('primary_keys', lambda r: primary_keys(r['df'])),
+    ('functional_dependencies', lambda r: functional_dependency_table(r['df'])),
+    ('picklists', lambda r: picklists(r['df'], r['value_frequencies'])),
+    ('match_rules', lambda r: match_rules(r['df'])),
+    ('exact_duplicates', lambda r: exact_duplicates(r['df'])),
+    ('fuzzy_duplicates', lambda r: fuzzy_duplicates(
+        r['df'], default_fuzzy_columns(r['df'], r['distinct_counts']), FUZZY_THRESHOLD,
+        blocking_plan(r['df'], None, (('sorted_neighbourhood', 'Email', (('window', 5),)),)))),
+    ('schema_links', lambda r: schema_links(r['df'], r['df2'])),
+    ('cross_source_matches', lambda r: cross_source_matches(
+        r['df'], r['df2'], ['UniqueID', 'ID'], {'UniqueID': 5.0, 'ID': 5.0}, MATCH_THRESHOLD,
+        blocking_plan(r['df'], r['df2'], (('exact', 'UniqueID', ()),)))),
+]
+STEP_NAMES = [name for name, _ in STEPS]
+# Earlier results a step reads, run (and timed) along with it
+REQUIRES = {
+    'distinct_counts': ['value_frequencies'],
+    'column_profiling': ['value_frequencies', 'distinct_counts'],
+    'top_values': ['value_frequencies'],
+    'table_summary': ['value_frequencies', 'distinct_counts'],
+    'quality_scores': ['pattern_hits', 'value_frequencies', 'distinct_counts'],
+    'picklists': ['value_frequencies'],
+    'fuzzy_duplicates': ['value_frequencies', 'distinct_counts'],
+}
+
+
+def load(rows: int) -> dict:
+    df, df2 = dataset.generate(rows, exact_duplicates=0.05, fuzzy_duplicates=0.05, overlap=0.8)
+    return {'df': categorize(df), 'df2': categorize(df2)}
+
+
+def run_steps(results: dict, steps: list, memory: bool) -> dict:
+    """{step: seconds}, or {step: peak MB} under tracemalloc if ``memory``."""
+    measured = {}
+    if memory:
+        tracemalloc.start()
+    try:
+        for name, function in STEPS:
+            if name not in steps:
+                continue
+            if memory:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            results[name] = function(results)
+            if memory:
+                measured[name] = round((tracemalloc.get_traced_memory()[1] - before) / 2 ** 20, 1)
+            else:
+                measured[name] = round(time.perf_counter() - start, 4)
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return measured
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True,
+                              capture_output=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_history(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path) as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def regressions(run: dict, history: list, tolerance: float) -> list:
+    """(step, seconds, baseline) of steps slower than the median of the
+    last HISTORY_RUNS comparable runs."""
+    previous = [old for old in history
+                if old['host'] == run['host'] and old['rows'] == run['rows']][-HISTORY_RUNS:]
+    slower = []
+    for step, seconds in run['seconds'].items():
+        times = [old['seconds'][step] for old in previous if step in old['seconds']]
+        if not times:
+            continue
+        baseline = float(np.median(times))
+        if seconds > baseline * (1 + tolerance) and seconds - baseline > MIN_REGRESSION_SECONDS:
+            slower.append((step, seconds, baseline))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--steps', nargs='+', choices=STEP_NAMES, default=STEP_NAMES)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--history', default=DEFAULT_HISTORY)
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--no-save', action='store_true', help="compare without recording")
+    args = parser.parse_args()
+    steps = set(args.steps).union(*(REQUIRES.get(step, []) for step in args.steps))
+    history = read_history(args.history)
+    found = []
+    for rows in args.rows:
+        start = time.perf_counter()
+        results = load(rows)
+        print(f"rows={rows:,} generated in {time.perf_counter() - start:.1f}s")
+        seconds = run_steps(results, steps, memory=False)
+        peaks = {} if args.no_memory else run_steps(results, steps, memory=True)
+        run = {
+            'time': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': git_commit(), 'host': platform.node(), 'rows': rows,
+            'python': platform.python_version(), 'pandas': pd.__version__,
+            'numpy': np.__version__, 'seconds': seconds, 'peak_mb': peaks,
+        }
+        slower = regressions(run, history, args.tolerance)
+        flagged = {step for step, _, _ in slower}
+        for step in seconds:
+            peak = f" {peaks[step]:9.1f} MB" if step in peaks else ""
+            print(f"  {step:<24} {seconds[step]:8.3f}s{peak}"
+                  f"{'  REGRESSION' if step in flagged else ''}")
+        for step, took, baseline in slower:
+            print(f"  {step} took {took:.3f}s against a median of {baseline:.3f}s")
+        found += slower
+        history.append(run)
+        if not args.no_save:
+            with open(args.history, 'a') as handle:
+                handle.write(json.dumps(run) + '\n')
+    sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,108 +1,288 @@
-import pandas as pd
-import numpy as np
-import random
+"""Synthetic customer datasets for trying out and benchmarking the profiler.
+
+    python dataset.py                     # the 1,000-row sample CSVs
+    python dataset.py --rows 10000000 --format parquet --out data/ \\
+        --exact-duplicates 0.05 --fuzzy-duplicates 0.05 --overlap 0.8
+
+Writes generated_dataset (UniqueID, Name, Age, Email, Phone, JoinDate,
+Score, ID, Flag), generated_dataset1 (the same without Score) and
+generated_dataset2 (UniqueID, ID, Score) as CSV or Parquet.
+
+Columns are built with NumPy and Arrow a chunk of rows at a time, never a
+Python object per row, and each chunk is appended to the files before the
+next one is made, so memory stays flat up to 100M rows and beyond:
+
+- Strings are fixed-width byte matrices (random letters and digits, or
+  digits of an integer) viewed as NumPy bytes and cast to Arrow strings;
+  shorter values are padded with zero bytes, which the view drops.
+- UniqueIDs are row numbers scattered by a multiplication modulo 36^length
+  and written in base 36, so they are unique without a set of the ones
+  drawn so far.
+- Exact duplicates copy other rows of their chunk; fuzzy duplicates copy
+  them under a new UniqueID and ID with one letter of the email changed.
+- Dataset 2 rows outside the ``overlap`` share get UniqueIDs past the last
+  row's and new IDs, so they match nothing in dataset 1.
+"""
+import argparse
+import os
 import string
-import uuid
 
-range_value = 1000
-
-
-def generate_random_email(null_percent: float = 20):
-    domains = ["gmail.com", "yahoo.com", "hotmail.com"]
-    if random.random() * 100 < null_percent:
-        return None
-    return ''.join(random.choices(string.ascii_lowercase, k=random.randint(5, 7))) + '@' + random.choice(domains)
-
-
-def generate_random_phone(null_percent: float = 20):
-    if random.random() * 100 < null_percent:
-        return None
-    country_code = f"+{random.choice(['91', '01', '44', '81', '61'])}"
-    phone_number = ''.join(random.choices(string.digits, k=10))
-    return f"{country_code} {phone_number}"
-
-
-def generate_random_date(null_percent: float = 20):
-    if random.random() * 100 < null_percent:
-        return None
-    start_date = pd.to_datetime('2020-01-01')
-    end_date = pd.to_datetime('2023-01-01')
-    return start_date + (end_date - start_date) * random.random()
-
-
-def generate_random_alphanumeric(length=8, null_percent: float = 20):
-    if random.random() * 100 < null_percent:
-        return None
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
-
-
-def generate_random_name(null_percent: float = 20):
-    if random.random() * 100 < null_percent:
-        return None
-    return random.choice(['Alice', 'Bob', 'Charlie', 'David', 'Eve'])
-
-
-def generate_random_age(null_percent: float = 20):
-    if random.random() * 100 < null_percent:
-        return None
-    return random.randint(18, 70)
-
-
-def generate_random_score(null_percent: float = 20):
-    if random.random() * 100 < null_percent:
-        return None
-    return random.randint(0, 100)
-
-
-def generate_random_boolean():
-    return random.choice([True, False])
-
-def generate_unique_ids(count, length=5):
-    unique_ids = set()
-    while len(unique_ids) < count:
-        uid = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-        unique_ids.add(uid)
-    return list(unique_ids)
-
-
-data = {
-    'UniqueID': generate_unique_ids(range_value),
-    'Name': [generate_random_name() for _ in range(range_value)],
-    'Age': [generate_random_age() for _ in range(range_value)],
-    'Email': [generate_random_email() for _ in range(range_value)],
-    'Phone': [generate_random_phone() for _ in range(range_value)],
-    'JoinDate': [generate_random_date() for _ in range(range_value)],
-    'Score': [generate_random_score() for _ in range(range_value)],
-    'ID': [uuid.uuid4() for _ in range(range_value)],
-    'Flag': [generate_random_boolean() for _ in range(range_value)],
-}
-
-df = pd.DataFrame(data)
-
-n = 270
-# sampled_rows = df.sample(n=n, replace=False)
-# df_updated = pd.concat([df, sampled_rows], ignore_index=True)
-
-# df_updated.to_csv('generated_dataset.csv', index=False)
-df.to_csv('generated_dataset.csv', index=False)
-
-data1 = {
-    'UniqueID': data['UniqueID'],
-    'ID': data['ID'],
-    'Name': data['Name'],
-    'Age': data['Age'],
-    'Email': data['Email'],
-    'Phone': data['Phone'],
-    'JoinDate': data['JoinDate'],
-    'Flag': data['Flag'],
-}
-df1 = pd.DataFrame(data1)
-df1.to_csv('generated_dataset1.csv', index=False)
-
-data2 = {
-    'UniqueID': data['UniqueID'],
-    'ID': data['ID'],
-    'Score': data['Score'],
-}
-df2 = pd.DataFrame(data2)
-df2.to_csv('generated_dataset2.csv', index=False)
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+NAMES = ['Alice', 'Bob', 'Charlie', 'David', 'Eve']
+DOMAINS = ['gmail.com', 'yahoo.com', 'hotmail.com']
+COUNTRY_CODES = ['91', '01', '44', '81', '61']
+START_DATE = np.datetime64('2020-01-01', 'ns')
+END_DATE = np.datetime64('2023-01-01', 'ns')
+
+COLUMNS = ['UniqueID', 'Name', 'Age', 'Email', 'Phone', 'JoinDate', 'Score', 'ID', 'Flag']
+DATASET1_COLUMNS = ['UniqueID', 'ID', 'Name', 'Age', 'Email', 'Phone', 'JoinDate', 'Flag']
+DATASET2_COLUMNS = ['UniqueID', 'ID', 'Score']
+NULLABLE = ['Name', 'Age', 'Email', 'Phone', 'JoinDate', 'Score']
+OUTPUT_NAMES = {'generated_dataset': COLUMNS, 'generated_dataset1': DATASET1_COLUMNS,
+                'generated_dataset2': DATASET2_COLUMNS}
+
+DEFAULT_ROWS = 1000
+DEFAULT_NULL_RATE = 0.2
+DEFAULT_CHUNK_ROWS = 1_000_000
+UNIQUE_ID_LENGTH = 5
+# Odd and not a multiple of 3, so it is invertible modulo any power of 36
+UNIQUE_ID_MULTIPLIER = 1_000_000_007
+
+_ID_ALPHABET = np.frombuffer((string.ascii_uppercase + string.digits).encode(), dtype=np.uint8)
+_LOWERCASE = np.frombuffer(string.ascii_lowercase.encode(), dtype=np.uint8)
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def byte_strings(codes: np.ndarray) -> pa.Array:
+    """Arrow strings from an (n, width) uint8 matrix, zero bytes dropped
+    from the end of each row."""
+    codes = np.ascontiguousarray(codes, dtype=np.uint8)
+    return pa.array(codes.view(f'S{codes.shape[1]}').ravel()).cast(pa.string())
+
+
+def unique_ids(rows: np.ndarray, length: int) -> pa.Array:
+    """Distinct base-36 IDs of distinct row numbers below 36**length."""
+    values = (rows.astype(np.uint64) * np.uint64(UNIQUE_ID_MULTIPLIER)) % np.uint64(36 ** length)
+    digits = np.empty((len(rows), length), dtype=np.uint8)
+    for position in range(length - 1, -1, -1):
+        digits[:, position] = _ID_ALPHABET[values % np.uint64(36)]
+        values //= np.uint64(36)
+    return byte_strings(digits)
+
+
+def unique_id_length(rows: int) -> int:
+    """The original five characters, or more when 36**5 IDs (about 60M) run
+    out; dataset 2 uses numbers up to twice ``rows``."""
+    length = UNIQUE_ID_LENGTH
+    while 36 ** length < 2 * rows:
+        length += 1
+    return length
+
+
+def uuids(rng, n: int) -> pa.Array:
+    """Random version-4 UUIDs in their 36-character text form."""
+    raw = rng.integers(0, 256, (n, 16), dtype=np.uint8)
+    raw[:, 6] = raw[:, 6] & 0x0F | 0x40
+    raw[:, 8] = raw[:, 8] & 0x3F | 0x80
+    hex_digits = np.empty((n, 32), dtype=np.uint8)
+    hex_digits[:, 0::2] = _HEX[raw >> 4]
+    hex_digits[:, 1::2] = _HEX[raw & 0x0F]
+    text = np.full((n, 36), ord('-'), dtype=np.uint8)
+    for start, stop, at in ((0, 8, 0), (8, 12, 9), (12, 16, 14), (16, 20, 19), (20, 32, 24)):
+        text[:, at:at + stop - start] = hex_digits[:, start:stop]
+    return byte_strings(text)
+
+
+def names(rng, n: int, cardinality: int = None) -> pa.Array:
+    """The five original names, or ``cardinality`` variants of them."""
+    pool = NAMES if cardinality is None else [
+        NAMES[i % len(NAMES)] + ('' if i < len(NAMES) else f' {i // len(NAMES)}')
+        for i in range(cardinality)]
+    return pa.array(pool).take(rng.integers(0, len(pool), n))
+
+
+def emails(rng, n: int) -> pa.Array:
+    """5 to 7 random lowercase letters at one of three domains."""
+    letters = _LOWERCASE[rng.integers(0, 26, (n, 7))]
+    letters[np.arange(7) >= rng.integers(5, 8, n)[:, None]] = 0
+    return pc.binary_join_element_wise(
+        byte_strings(letters), pa.array(DOMAINS).take(rng.integers(0, len(DOMAINS), n)), '@')
+
+
+def phones(rng, n: int) -> pa.Array:
+    """"+CC" and ten random digits."""
+    text = np.empty((n, 14), dtype=np.uint8)
+    text[:, 0] = ord('+')
+    codes = np.frombuffer(''.join(COUNTRY_CODES).encode(), dtype=np.uint8).reshape(-1, 2)
+    text[:, 1:3] = codes[rng.integers(0, len(codes), n)]
+    text[:, 3] = ord(' ')
+    text[:, 4:] = rng.integers(ord('0'), ord('9') + 1, (n, 10), dtype=np.uint8)
+    return byte_strings(text)
+
+
+def join_dates(rng, n: int) -> np.ndarray:
+    span = (END_DATE - START_DATE).astype(np.int64)
+    return START_DATE + (rng.random(n) * span).astype(np.int64).astype('timedelta64[ns]')
+
+
+def column_values(column: str, rng, n: int, cardinality: int = None):
+    """``n`` values of a column. With ``cardinality``, they are drawn from
+    that many distinct ones."""
+    if column == 'Name':
+        return names(rng, n, cardinality)
+    if cardinality is not None:
+        pool = column_values(column, rng, cardinality)
+        return pool.take(pa.array(rng.integers(0, cardinality, n))) if isinstance(pool, pa.Array) \
+            else pool[rng.integers(0, cardinality, n)]
+    if column == 'Age':
+        return rng.integers(18, 71, n)
+    if column == 'Score':
+        return rng.integers(0, 101, n)
+    if column == 'Email':
+        return emails(rng, n)
+    if column == 'Phone':
+        return phones(rng, n)
+    if column == 'JoinDate':
+        return join_dates(rng, n)
+    raise ValueError(f"{column} has no cardinality setting")
+
+
+def with_nulls(values, rng, null_rate: float) -> pa.Array:
+    mask = rng.random(len(values)) < null_rate
+    if isinstance(values, pa.Array):
+        return pc.if_else(pa.array(mask), pa.nulls(len(values), values.type), values)
+    return pa.array(values, mask=mask)
+
+
+def email_typos(rng, emails_: pa.Array) -> pa.Array:
+    """Each email with its second letter replaced by a random one."""
+    letters = byte_strings(_LOWERCASE[rng.integers(0, 26, (len(emails_), 1))])
+    return pc.binary_join_element_wise(
+        pc.utf8_slice_codeunits(emails_, 0, 1), letters, pc.utf8_slice_codeunits(emails_, 2), '')
+
+
+def generate_chunk(first_row: int, n: int, total_rows: int, rng, null_rate: float = DEFAULT_NULL_RATE,
+                   cardinality: dict = None, exact_duplicates: float = 0.0,
+                   fuzzy_duplicates: float = 0.0, overlap: float = 1.0) -> tuple:
+    """Rows ``first_row`` to ``first_row + n`` of a ``total_rows`` dataset,
+    as Arrow tables of every column and of dataset 2's columns."""
+    cardinality = cardinality or {}
+    length = unique_id_length(total_rows)
+    columns = {'UniqueID': unique_ids(np.arange(first_row, first_row + n), length)}
+    for column in NULLABLE:
+        columns[column] = with_nulls(column_values(column, rng, n, cardinality.get(column)),
+                                     rng, null_rate)
+    columns['ID'] = uuids(rng, n)
+    columns['Flag'] = pa.array(rng.random(n) < 0.5)
+    table = pa.table({column: columns[column] for column in COLUMNS})
+
+    # The last rows of the chunk become copies of the others
+    copies = int(n * exact_duplicates)
+    near = int(n * fuzzy_duplicates)
+    originals = n - copies - near
+    if originals <= 0 and (copies or near):
+        raise ValueError("exact_duplicates + fuzzy_duplicates must be below 1")
+    if copies or near:
+        source = rng.integers(0, originals, copies + near)
+        exact = table.take(source[:copies])
+        fuzzy = table.take(source[copies:])
+        fuzzy = fuzzy.set_column(COLUMNS.index('UniqueID'), 'UniqueID', table['UniqueID'][originals + copies:])
+        fuzzy = fuzzy.set_column(COLUMNS.index('ID'), 'ID', table['ID'][originals + copies:])
+        fuzzy = fuzzy.set_column(COLUMNS.index('Email'), 'Email', email_typos(rng, fuzzy['Email']))
+        table = pa.concat_tables([table.slice(0, originals), exact, fuzzy])
+        table = table.take(rng.permutation(n))
+
+    # Dataset 2 rows outside the overlap get IDs dataset 1 never uses
+    other = table.select(DATASET2_COLUMNS)
+    fresh = rng.random(n) >= overlap
+    if fresh.any():
+        rows = np.flatnonzero(fresh)
+        new_ids = unique_ids(total_rows + first_row + rows, length)
+        other = other.set_column(0, 'UniqueID', pc.replace_with_mask(
+            other['UniqueID'].combine_chunks(), pa.array(fresh), new_ids))
+        other = other.set_column(1, 'ID', pc.replace_with_mask(
+            other['ID'].combine_chunks(), pa.array(fresh), uuids(rng, len(rows))))
+    return table, other
+
+
+def generate_chunks(rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS, seed: int = 0, **options):
+    """(every column, dataset 2) Arrow tables of ``rows`` rows, a chunk at
+    a time; ``options`` are generate_chunk's."""
+    for number, first_row in enumerate(range(0, rows, chunk_rows)):
+        rng = np.random.default_rng([seed, number])
+        yield generate_chunk(first_row, min(chunk_rows, rows - first_row), rows, rng, **options)
+
+
+def generate(rows: int = DEFAULT_ROWS, seed: int = 0, **options) -> tuple:
+    """Datasets 1 and 2 as DataFrames with Arrow-backed columns, as
+    profiler.loading reads them."""
+    tables, others = zip(*generate_chunks(rows, seed=seed, **options)) if rows else ((), ())
+    frames = []
+    for parts, columns in ((tables, DATASET1_COLUMNS), (others, DATASET2_COLUMNS)):
+        if not parts:
+            frames.append(pd.DataFrame(columns=columns))
+            continue
+        frames.append(pa.concat_tables(parts).select(columns).to_pandas(types_mapper=pd.ArrowDtype))
+    return tuple(frames)
+
+
+def write(rows: int, directory: str = '.', file_format: str = 'csv',
+          chunk_rows: int = DEFAULT_CHUNK_ROWS, seed: int = 0, **options) -> list:
+    """Write the three datasets into ``directory``; returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {name: os.path.join(directory, f'{name}.{file_format}') for name in OUTPUT_NAMES}
+    writers = {}
+    try:
+        for table, other in generate_chunks(rows, chunk_rows, seed, **options):
+            for name, columns in OUTPUT_NAMES.items():
+                part = other if name == 'generated_dataset2' else table.select(columns)
+                if name not in writers:
+                    writers[name] = (pq.ParquetWriter(paths[name], part.schema) if file_format == 'parquet'
+                                     else pa_csv.CSVWriter(paths[name], part.schema))
+                writers[name].write_table(part)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return list(paths.values())
+
+
+def cardinality_option(text: str) -> tuple:
+    column, _, count = text.partition('=')
+    if column not in NULLABLE or not count.isdigit() or int(count) < 1:
+        raise argparse.ArgumentTypeError(f"expected COLUMN=COUNT with COLUMN one of {NULLABLE}")
+    return column, int(count)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--out', default='.', help="output directory")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--null-rate', type=float, default=DEFAULT_NULL_RATE,
+                        help=f"share of nulls in {', '.join(NULLABLE)}")
+    parser.add_argument('--cardinality', type=cardinality_option, action='append', default=[],
+                        help="COLUMN=COUNT: draw the column from COUNT distinct values (repeatable)")
+    parser.add_argument('--exact-duplicates', type=float, default=0.0,
+                        help="share of rows that copy another row")
+    parser.add_argument('--fuzzy-duplicates', type=float, default=0.0,
+                        help="share of rows that copy another with a typo in Email and new IDs")
+    parser.add_argument('--overlap', type=float, default=1.0,
+                        help="share of dataset 2 rows whose UniqueID and ID are in dataset 1")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    for path in write(args.rows, args.out, args.format, args.chunk_rows, args.seed,
+                      null_rate=args.null_rate, cardinality=dict(args.cardinality),
+                      exact_duplicates=args.exact_duplicates,
+                      fuzzy_duplicates=args.fuzzy_duplicates, overlap=args.overlap):
+        print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3 @@
+"""Computation engine behind the Streamlit data profiler in app.py."""
+
+__version__ = "0.1.0"
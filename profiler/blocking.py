@@ -0,0 +1,361 @@
+"""Blocking (candidate generation) for sections 12 and 13 of app.py.
+
+A blocking setup is a list of passes. Each pass proposes candidate pairs
+from one column:
+
+- ``exact``: equal values (nulls never match)
+- ``prefix``: equal first ``length`` characters
+- ``soundex`` / ``metaphone``: equal phonetic codes of the value
+- ``sorted_neighbourhood``: rows within ``window`` places of each other
+  once sorted on the lower-cased value
+- ``qgram_lsh``: MinHash-LSH over character ``q``-grams. Rows share a
+  bucket when all ``rows`` hashes of one of ``bands`` bands agree, which
+  happens for most pairs with high q-gram Jaccard similarity.
+
+Candidates of all passes are unioned. A setup that is a single exact,
+prefix or phonetic pass is a partition of the rows, and is handed to the
+scorers as block keys so they can score each block as a matrix. Any other
+setup is turned into an explicit, sorted list of pairs.
+
+Pairs are within one frame (i < j) for duplicate detection, or from the
+left to the right frame for cross-source matching.
+"""
+import numpy as np
+import pandas as pd
+
+from profiler.profiling import text_values
+
+BLOCKING_METHODS = {
+    'prefix': "First characters",
+    'exact': "Exact value",
+    'soundex': "Soundex",
+    'metaphone': "Metaphone",
+    'sorted_neighbourhood': "Sorted neighbourhood",
+    'qgram_lsh': "Q-gram MinHash-LSH",
+}
+PARTITION_METHODS = {'exact', 'prefix', 'soundex', 'metaphone'}
+
+# Refuse to materialize more candidate pairs than this (800 MB of pair codes)
+MAX_CANDIDATE_PAIRS = 100_000_000
+
+_SOUNDEX_CODES = {letter: digit for letters, digit in (
+    ("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6"))
+    for letter in letters}
+_VOWELS = set("aeiou")
+_FRONT_VOWELS = set("eiy")
+
+
+def soundex(value: str) -> str:
+    """American Soundex code, e.g. "Robert" -> "R163"; "" for no letters."""
+    letters = [c for c in value.lower() if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous:
+            code += digit
+        # h and w don't separate letters with the same code; vowels do
+        if letter not in 'hw':
+            previous = digit
+    return (code + '000')[:4]
+
+
+def metaphone(value: str) -> str:
+    """Original (1990) Metaphone code, e.g. "Catherine" and "Kathryn" -> "K0RN"."""
+    word = ''.join(c for c in value.lower() if 'a' <= c <= 'z')
+    if not word:
+        return ''
+    # Adjacent duplicates collapse, except "cc"
+    word = ''.join(c for i, c in enumerate(word) if i == 0 or c != word[i - 1] or c == 'c')
+    if word[:2] in ('kn', 'gn', 'pn', 'ae', 'wr'):
+        word = word[1:]
+    elif word[0] == 'x':
+        word = 's' + word[1:]
+    elif word[:2] == 'wh':
+        word = 'w' + word[2:]
+
+    code = []
+    for i, c in enumerate(word):
+        before = word[i - 1] if i else ''
+        after = word[i + 1] if i + 1 < len(word) else ''
+        after2 = word[i + 2] if i + 2 < len(word) else ''
+        if c in _VOWELS:
+            if i == 0:
+                code.append(c.upper())
+        elif c == 'b':
+            if not (before == 'm' and not after):
+                code.append('B')
+        elif c == 'c':
+            if after == 'i' and after2 == 'a' or after == 'h':
+                code.append('K' if before == 's' else 'X')
+            elif after in _FRONT_VOWELS:
+                if before != 's':
+                    code.append('S')
+            else:
+                code.append('K')
+        elif c == 'd':
+            code.append('J' if after == 'g' and after2 in _FRONT_VOWELS else 'T')
+        elif c == 'g':
+            if after == 'h' and after2 and after2 not in _VOWELS:
+                continue
+            if after == 'n' and (not after2 or word[i + 1:] == 'ned'):
+                continue
+            if before == 'd' and after in _FRONT_VOWELS:
+                continue
+            code.append('J' if after in _FRONT_VOWELS and before != 'g' else 'K')
+        elif c == 'h':
+            if before in 'cgpst' and before:
+                continue
+            if before in _VOWELS and after not in _VOWELS:
+                continue
+            code.append('H')
+        elif c == 'k':
+            if before != 'c':
+                code.append('K')
+        elif c == 'p':
+            code.append('F' if after == 'h' else 'P')
+        elif c == 'q':
+            code.append('K')
+        elif c == 's':
+            code.append('X' if after == 'h' or (after == 'i' and after2 in 'oa' and after2) else 'S')
+        elif c == 't':
+            if after == 'i' and after2 in 'oa' and after2:
+                code.append('X')
+            elif after == 'h':
+                code.append('0')
+            elif not (after == 'c' and after2 == 'h'):
+                code.append('T')
+        elif c == 'v':
+            code.append('F')
+        elif c in 'wy':
+            if after in _VOWELS and after:
+                code.append(c.upper())
+        elif c == 'x':
+            code.append('KS')
+        elif c == 'z':
+            code.append('S')
+        else:
+            code.append(c.upper())
+    return ''.join(code)
+
+
+def _text(series: pd.Series) -> pd.Series:
+    # Object columns as they are; anything else as str() objects, keeping nulls
+    if series.dtype == object:
+        return series
+    return pd.Series(text_values(series), index=series.index).where(series.notna())
+
+
+def _minhash_bands(values: pd.Series, q: int, bands: int, rows: int, seed: int = 0):
+    """One bucket key per row and band (-1 for rows with no q-grams)."""
+    strings = _text(values).fillna('').astype(str).str.lower().str.strip().to_numpy()
+    grams, owners = [], []
+    for position, value in enumerate(strings):
+        if not value:
+            continue
+        value_grams = {value[i:i + q] for i in range(max(len(value) - q + 1, 1))}
+        grams.extend(value_grams)
+        owners.extend([position] * len(value_grams))
+    keys = np.full((len(strings), bands), -1, dtype=np.int64)
+    if not grams:
+        return keys
+    hashes = pd.util.hash_array(np.array(grams, dtype=object))
+    owners = np.array(owners)
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    present = owners[starts]
+
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2 ** 63, size=bands * rows, dtype=np.uint64) | np.uint64(1)
+    offsets = rng.integers(0, 2 ** 63, size=bands * rows, dtype=np.uint64)
+    for band in range(bands):
+        signature = np.empty((len(present), rows), dtype=np.uint64)
+        for row in range(rows):
+            k = band * rows + row
+            # Universal hashing mod 2**64: each k acts as a random permutation
+            permuted = hashes * multipliers[k] + offsets[k]
+            signature[:, row] = np.minimum.reduceat(permuted, starts)
+        band_keys = pd.util.hash_pandas_object(pd.DataFrame(signature), index=False).to_numpy()
+        keys[present, band] = pd.factorize(band_keys)[0]
+    return keys
+
+
+class BlockingPass:
+    """One blocking pass: ``method`` applied to ``column``."""
+
+    def __init__(self, method: str, column, **params):
+        if method not in BLOCKING_METHODS:
+            raise ValueError(f"Unknown blocking method {method!r}")
+        self.method = method
+        self.column = column
+        self.params = params
+
+    @property
+    def partitions(self) -> bool:
+        return self.method in PARTITION_METHODS
+
+    def raw_keys(self, series: pd.Series) -> pd.Series:
+        """Block key per row for the partition methods (null = no block)."""
+        if self.method == 'exact':
+            return series
+        text = _text(series)
+        if self.method == 'prefix':
+            # As section 12 always did: null and empty values share the "" block
+            return text.str[:self.params.get('length', 1)].fillna('')
+        code = soundex if self.method == 'soundex' else metaphone
+        codes = text.map(code, na_action='ignore')
+        return codes.where(codes != '')
+
+    def block_keys(self, left: pd.DataFrame, right: pd.DataFrame = None):
+        """Integer block ids per row on each side, shared across the sides;
+        -1 for rows that are in no block."""
+        keys = [self.raw_keys(left[self.column])]
+        if right is not None:
+            keys.append(self.raw_keys(right[self.column]))
+        codes = pd.factorize(pd.concat(keys, ignore_index=True))[0]
+        if right is None:
+            return codes, None
+        return codes[:len(left)], codes[len(left):]
+
+    def pairs(self, left: pd.DataFrame, right: pd.DataFrame = None,
+              max_pairs: int = MAX_CANDIDATE_PAIRS):
+        """Candidate pairs as sorted codes ``i * n_right + j``."""
+        n_right = len(left) if right is None else len(right)
+        if self.method == 'sorted_neighbourhood':
+            return _sorted_neighbourhood(left[self.column], None if right is None else right[self.column],
+                                         self.params.get('window', 5), n_right)
+        if self.method == 'qgram_lsh':
+            params = {'q': self.params.get('q', 3), 'bands': self.params.get('bands', 25),
+                      'rows': self.params.get('rows', 4)}
+            keys = _minhash_bands(left[self.column], **params)
+            right_keys = None if right is None else _minhash_bands(right[self.column], **params)
+            codes = np.empty(0, dtype=np.int64)
+            for band in range(keys.shape[1]):
+                band_codes = _block_pairs(keys[:, band], None if right_keys is None else right_keys[:, band],
+                                          n_right, max_pairs)
+                codes = _union(codes, band_codes, max_pairs)
+            return codes
+        keys, right_keys = self.block_keys(left, right)
+        return _block_pairs(keys, right_keys, n_right, max_pairs)
+
+
+def block_groups(keys: np.ndarray) -> dict:
+    """Row positions of every block, by block id (rows in no block left out)."""
+    present = keys >= 0
+    positions = np.flatnonzero(present)
+    if not len(positions):
+        return {}
+    groups = pd.Series(positions).groupby(keys[present], sort=True).indices
+    return {key: positions[within] for key, within in groups.items()}
+
+
+def _union(codes: np.ndarray, more: np.ndarray, max_pairs: int) -> np.ndarray:
+    codes = np.union1d(codes, more)
+    if len(codes) > max_pairs:
+        raise ValueError(f"Blocking produced more than {max_pairs:,} candidate pairs; "
+                         "choose a more selective setup")
+    return codes
+
+
+def block_pair_count(keys: np.ndarray, right_keys: np.ndarray = None) -> int:
+    """Pairs compared when scoring every block in full."""
+    sizes = np.bincount(keys[keys >= 0]).astype(np.int64)
+    if right_keys is None:
+        return int((sizes * (sizes - 1) // 2).sum())
+    right_sizes = np.bincount(right_keys[right_keys >= 0], minlength=len(sizes)).astype(np.int64)
+    return int((sizes * right_sizes[:len(sizes)]).sum())
+
+
+def _block_pairs(keys: np.ndarray, right_keys, n_right: int, max_pairs: int) -> np.ndarray:
+    count = block_pair_count(keys, right_keys)
+    if count > max_pairs:
+        raise ValueError(f"Blocking would produce {count:,} candidate pairs (limit "
+                         f"{max_pairs:,}); choose a more selective setup")
+    # Blocks that yield no pair are dropped before grouping; with LSH that
+    # is most of them
+    sizes = np.bincount(keys[keys >= 0])
+    if right_keys is None:
+        paired = np.flatnonzero(sizes > 1)
+    else:
+        right_sizes = np.bincount(right_keys[right_keys >= 0], minlength=len(sizes))[:len(sizes)]
+        paired = np.flatnonzero((sizes > 0) & (right_sizes > 0))
+        right_keys = np.where(np.isin(right_keys, paired), right_keys, -1)
+    keys = np.where(np.isin(keys, paired), keys, -1)
+    left_groups = block_groups(keys)
+    codes = []
+    if right_keys is None:
+        for positions in left_groups.values():
+            i, j = np.triu_indices(len(positions), 1)
+            codes.append(positions[i] * n_right + positions[j])
+    else:
+        right_groups = block_groups(right_keys)
+        for key, positions in left_groups.items():
+            if key in right_groups:
+                others = right_groups[key]
+                codes.append((positions[:, None] * n_right + others[None, :]).ravel())
+    return np.unique(np.concatenate(codes)) if codes else np.empty(0, dtype=np.int64)
+
+
+def _sorted_neighbourhood(left: pd.Series, right, window: int, n_right: int) -> np.ndarray:
+    sides = [_text(left).fillna('').astype(str).str.lower().to_numpy()]
+    if right is not None:
+        sides.append(_text(right).fillna('').astype(str).str.lower().to_numpy())
+    values = np.concatenate(sides)
+    side = np.repeat(np.arange(len(sides)), [len(s) for s in sides])
+    position = np.concatenate([np.arange(len(s)) for s in sides])
+    order = np.argsort(values, kind='stable')
+    side, position = side[order], position[order]
+
+    codes = []
+    for offset in range(1, window):
+        a, b = slice(None, -offset), slice(offset, None)
+        if right is None:
+            i, j = np.minimum(position[a], position[b]), np.maximum(position[a], position[b])
+        else:
+            cross = side[a] != side[b]
+            first_left = side[a][cross] == 0
+            i = np.where(first_left, position[a][cross], position[b][cross])
+            j = np.where(first_left, position[b][cross], position[a][cross])
+        codes.append(i * n_right + j)
+    return np.unique(np.concatenate(codes)) if codes else np.empty(0, dtype=np.int64)
+
+
+class BlockingPlan:
+    """What the scorers compare: ``blocks`` (block ids per row on each side)
+    for a single partitioning pass, otherwise explicit ``candidates``
+    (left and right row positions)."""
+
+    def __init__(self, pair_count: int, total_pairs: int, blocks=None, candidates=None):
+        self.pair_count = pair_count
+        self.total_pairs = total_pairs
+        self.blocks = blocks
+        self.candidates = candidates
+
+    @property
+    def reduction_ratio(self) -> float:
+        """Share of all possible pairs that blocking rules out."""
+        return 1 - self.pair_count / self.total_pairs if self.total_pairs else 0.0
+
+
+def plan_blocking(passes: list, left: pd.DataFrame, right: pd.DataFrame = None,
+                  max_pairs: int = MAX_CANDIDATE_PAIRS) -> BlockingPlan:
+    """Candidates for deduplicating ``left``, or for matching it to ``right``.
+
+    No passes means no blocking: every pair is a candidate.
+    """
+    n_right = len(left) if right is None else len(right)
+    total_pairs = len(left) * (len(left) - 1) // 2 if right is None else len(left) * len(right)
+    if not passes:
+        keys = np.zeros(len(left), dtype=np.int64)
+        right_keys = None if right is None else np.zeros(len(right), dtype=np.int64)
+        return BlockingPlan(total_pairs, total_pairs, blocks=(keys, right_keys))
+    if len(passes) == 1 and passes[0].partitions:
+        keys, right_keys = passes[0].block_keys(left, right)
+        return BlockingPlan(block_pair_count(keys, right_keys), total_pairs,
+                            blocks=(keys, right_keys))
+
+    codes = np.empty(0, dtype=np.int64)
+    for blocking_pass in passes:
+        codes = _union(codes, blocking_pass.pairs(left, right, max_pairs), max_pairs)
+    return BlockingPlan(len(codes), total_pairs, candidates=(codes // n_right, codes % n_right))
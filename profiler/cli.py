@@ -0,0 +1,295 @@
+"""Batch profiling from the command line.
+
+    python -m profiler run tables/*.parquet --out report/ --jobs 8
+    python -m profiler match crm.csv erp.parquet --columns Name Email --out report/
+
+``run`` profiles every file with profiler.engine.profile_table, several
+files at a time on a process pool (``--jobs``), and writes one report
+directory per file plus an ``index.json`` listing every file's outcome. A
+file that fails to load or profile is recorded in the index with its error
+and doesn't stop the others; the exit status is 1 if any failed.
+
+With ``--state-dir`` each file's profile state is kept between runs
+(profiler.incremental), so a file that only gained rows since the last run
+is re-profiled from its new partitions.
+
+``match`` runs section 13's cross-source matching of two files and writes
+the matched pairs to ``matches.parquet``. Without ``--columns`` it matches on
+the join keys that inclusion dependencies between the files suggest
+(profiler.dependencies), which ``matches.json`` lists.
+
+``--trace`` adds each section's wall time, CPU time, peak memory and
+row/pair counts to the report directory as OpenTelemetry JSON spans
+(``spans.json``, profiler.tracing); ``--profile`` adds a cProfile (or
+pyinstrument) profile of the whole run.
+
+Blocking passes are given as METHOD:COLUMN[:PARAM=VALUE,...], e.g.
+``--block soundex:Name --block sorted_neighbourhood:Name:window=10``.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import traceback
+
+from profiler import __version__
+from profiler.blocking import BLOCKING_METHODS
+from profiler.dependencies import DEFAULT_MAX_LHS
+from profiler.engine import (DEFAULT_FUZZY_THRESHOLD, EXACT_STATS, blocking_plan,
+                             cross_source_matches, profile_table, schema_links)
+from profiler.incremental import DEFAULT_PARTITION_ROWS, profile_incrementally, state_path
+from profiler.keys import DEFAULT_MAX_KEY_SIZE
+from profiler.loading import read_table
+from profiler.parallel import DEFAULT_WORKERS, get_pool
+from profiler.report import parquet_safe, to_json, write_report
+from profiler.tracing import Capture, Tracer, use
+
+INDEX_FILE = 'index.json'
+SPANS_FILE = 'spans.json'
+
+
+def _number(text: str):
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def blocking_pass(spec: str) -> tuple:
+    """A (method, column, params) tuple from METHOD:COLUMN[:PARAM=VALUE,...]."""
+    method, _, rest = spec.partition(':')
+    column, _, params = rest.partition(':')
+    if method not in BLOCKING_METHODS or not column:
+        raise argparse.ArgumentTypeError(
+            f"expected METHOD:COLUMN with METHOD one of {', '.join(BLOCKING_METHODS)}, got {spec!r}")
+    pairs = [param.partition('=') for param in params.split(',') if param]
+    return method, column, tuple((name, _number(value)) for name, _, value in pairs)
+
+
+def weight(spec: str) -> tuple:
+    column, _, value = spec.rpartition('=')
+    if not column:
+        raise argparse.ArgumentTypeError(f"expected COLUMN=WEIGHT, got {spec!r}")
+    return column, float(value)
+
+
+def expand_paths(patterns: list) -> list:
+    # Shells that don't expand globs (cmd.exe) pass them through as-is
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        paths.extend(path for path in matches if path not in paths)
+    return paths
+
+
+def report_directories(paths: list, out: str) -> dict:
+    """A report directory per path, named after the file and kept unique."""
+    directories, taken = {}, set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        name, n = stem, 1
+        while name in taken:
+            n += 1
+            name = f'{stem}_{n}'
+        taken.add(name)
+        directories[path] = os.path.join(out, name)
+    return directories
+
+
+def start_diagnostics(trace: bool, profile: bool) -> tuple:
+    tracer = Tracer() if trace else None
+    use(tracer)
+    return tracer, Capture().start() if profile else None
+
+
+def write_diagnostics(directory: str, tracer, capture):
+    """Write the spans and profile started by start_diagnostics, if any,
+    into ``directory``."""
+    if capture is not None:
+        capture.stop()
+    if not os.path.isdir(directory):
+        return
+    if tracer is not None:
+        with open(os.path.join(directory, SPANS_FILE), 'w') as f:
+            f.write(to_json(tracer.otel()))
+    if capture is not None:
+        with open(os.path.join(directory, capture.file_name), 'wb') as f:
+            f.write(capture.dump())
+
+
+def profile_file(path: str, directory: str, options: dict) -> dict:
+    """Load, profile and write one file; returns its index entry."""
+    entry = {'path': path, 'report': directory}
+    tracer, capture = start_diagnostics(options['trace'], options['profile'])
+    start = time.perf_counter()
+    try:
+        df = read_table(path, path, options['columns'])
+        load_seconds = time.perf_counter() - start
+        profile = incremental = None
+        if options['state_dir']:
+            profile, incremental = profile_incrementally(
+                df, state_path(options['state_dir'], directory), options['stats_mode'],
+                options['partition_rows'])
+        report = profile_table(df, options['stats_mode'], options['workers'],
+                               options['fuzzy_columns'], options['fuzzy_threshold'],
+                               options['passes'], options['duplicates'], profile,
+                               options['max_key_size'], options['max_lhs'],
+                               options['exact_columns'])
+        report['seconds']['load'] = load_seconds
+        metadata = {'path': path, 'profiler_version': __version__}
+        if incremental:
+            report['seconds']['incremental'] = incremental.pop('seconds')
+            metadata['incremental'] = incremental
+        summary = write_report(report, directory, metadata)
+        entry.update(status='ok', rows=summary['rows'], columns=summary['columns'],
+                     overall_score=summary['table_summary']['Overall Score'])
+    except Exception as e:
+        entry.update(status='failed', error=f'{type(e).__name__}: {e}',
+                     traceback=traceback.format_exc())
+    entry['seconds'] = time.perf_counter() - start
+    write_diagnostics(directory, tracer, capture)
+    return entry
+
+
+def run(args) -> int:
+    paths = expand_paths(args.paths)
+    if not paths:
+        print("No files matched.", file=sys.stderr)
+        return 1
+    os.makedirs(args.out, exist_ok=True)
+    options = {
+        'columns': args.columns,
+        'stats_mode': ((True, args.distinct_error, args.quantile_error)
+                       if args.approximate else EXACT_STATS),
+        'workers': args.workers,
+        'fuzzy_columns': args.fuzzy_columns,
+        'fuzzy_threshold': args.fuzzy_threshold,
+        'passes': tuple(args.block) if args.block else None,
+        'duplicates': not args.no_duplicates,
+        'state_dir': args.state_dir,
+        'partition_rows': args.partition_rows,
+        'max_key_size': args.key_size,
+        'max_lhs': args.determinant_size,
+        'exact_columns': args.exact_columns,
+        'trace': args.trace,
+        'profile': args.profile,
+    }
+    directories = report_directories(paths, args.out)
+    jobs = max(1, min(args.jobs, len(paths)))
+    if jobs == 1:
+        results = (profile_file(path, directories[path], options) for path in paths)
+    else:
+        pool = get_pool(jobs)
+        futures = [pool.submit(profile_file, path, directories[path], options) for path in paths]
+        results = (future.result() for future in futures)
+
+    entries = []
+    for entry in results:
+        entries.append(entry)
+        print(f"{entry['status']:6} {entry['seconds']:8.2f}s  {entry['path']}"
+              + (f"  ({entry['error']})" if entry['status'] == 'failed' else ''),
+              file=sys.stderr)
+    with open(os.path.join(args.out, INDEX_FILE), 'w') as f:
+        f.write(to_json({'profiler_version': __version__, 'tables': entries}))
+    return int(any(entry['status'] == 'failed' for entry in entries))
+
+
+def match(args) -> int:
+    tracer, capture = start_diagnostics(args.trace, args.profile)
+    df1 = read_table(args.left, args.left)
+    df2 = read_table(args.right, args.right)
+    links = schema_links(df1, df2)
+    # Shared-name join keys, then the first shared columns
+    shared = [left for left, right in links['join_keys'] if left == right]
+    shared += [col for col in df1.columns if col in set(df2.columns) and col not in shared]
+    columns = args.columns or shared[:2]
+    block_columns = [column for _, column, _ in args.block or []]
+    missing = [col for col in [*columns, *block_columns]
+               if col not in df1.columns or col not in df2.columns]
+    if missing:
+        print(f"Not in both files: {', '.join(dict.fromkeys(missing))}", file=sys.stderr)
+        return 2
+    weights = {col: 5.0 for col in columns}
+    weights.update(dict(args.weight or []))
+    plan = blocking_plan(df1, df2, tuple(args.block or [('exact', col, ()) for col in columns[:1]]))
+    start = time.perf_counter()
+    matches = cross_source_matches(df1, df2, columns, weights, args.threshold, plan)
+    os.makedirs(args.out, exist_ok=True)
+    parquet_safe(matches).to_parquet(os.path.join(args.out, 'matches.parquet'), index=False)
+    with open(os.path.join(args.out, 'matches.json'), 'w') as f:
+        f.write(to_json({'left': args.left, 'right': args.right, 'columns': columns,
+                         'weights': weights, 'threshold': args.threshold,
+                         'candidate_pairs': plan.pair_count,
+                         'reduction_ratio': plan.reduction_ratio,
+                         'matches': len(matches), 'seconds': time.perf_counter() - start,
+                         'inclusion_dependencies': links['inclusions'],
+                         'join_keys': links['join_keys'],
+                         'profiler_version': __version__}))
+    write_diagnostics(args.out, tracer, capture)
+    print(f"{len(matches):,} matched pairs from {plan.pair_count:,} candidates", file=sys.stderr)
+    return 0
+
+
+def add_diagnostics_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--trace', action='store_true',
+                        help=f"write per-section timings as OpenTelemetry spans to {SPANS_FILE}")
+    parser.add_argument('--profile', action='store_true',
+                        help="write a cProfile (or pyinstrument) profile of the run")
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m profiler', description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="profile files into a report directory")
+    run_parser.add_argument('paths', nargs='+', help="files or glob patterns")
+    run_parser.add_argument('--out', required=True, help="report directory")
+    run_parser.add_argument('--jobs', type=int, default=DEFAULT_WORKERS,
+                            help="files profiled at once (default: CPU count)")
+    run_parser.add_argument('--workers', type=int, default=1,
+                            help="processes per file for per-column work")
+    run_parser.add_argument('--columns', nargs='+', help="only load these columns")
+    run_parser.add_argument('--approximate', action='store_true',
+                            help="HyperLogLog/KLL distinct counts and medians")
+    run_parser.add_argument('--distinct-error', type=float, default=0.01)
+    run_parser.add_argument('--quantile-error', type=float, default=0.01)
+    run_parser.add_argument('--key-size', type=int, default=DEFAULT_MAX_KEY_SIZE,
+                            help="most columns in a discovered primary key")
+    run_parser.add_argument('--determinant-size', type=int, default=DEFAULT_MAX_LHS,
+                            help="most columns determining another in a functional dependency")
+    run_parser.add_argument('--no-duplicates', action='store_true',
+                            help="skip section 12's duplicate detection")
+    run_parser.add_argument('--exact-columns', nargs='+',
+                            help="compare only these columns for exact duplicates")
+    run_parser.add_argument('--fuzzy-columns', nargs='+')
+    run_parser.add_argument('--fuzzy-threshold', type=float, default=DEFAULT_FUZZY_THRESHOLD)
+    run_parser.add_argument('--block', type=blocking_pass, action='append',
+                            help="blocking pass METHOD:COLUMN[:PARAM=VALUE,...] (repeatable)")
+    run_parser.add_argument('--state-dir',
+                            help="keep mergeable profile state here and re-profile incrementally")
+    run_parser.add_argument('--partition-rows', type=int, default=DEFAULT_PARTITION_ROWS,
+                            help="rows per incrementally profiled partition")
+    add_diagnostics_arguments(run_parser)
+    run_parser.set_defaults(func=run)
+
+    match_parser = commands.add_parser('match', help="match the rows of two files")
+    match_parser.add_argument('left')
+    match_parser.add_argument('right')
+    match_parser.add_argument('--out', required=True)
+    match_parser.add_argument('--columns', nargs='+', help="matching columns "
+                              "(default: suggested join keys, then shared columns)")
+    match_parser.add_argument('--weight', type=weight, action='append', help="COLUMN=WEIGHT")
+    match_parser.add_argument('--threshold', type=float, default=85)
+    match_parser.add_argument('--block', type=blocking_pass, action='append',
+                              help="blocking pass (default: exact on the first matching column)")
+    add_diagnostics_arguments(match_parser)
+    match_parser.set_defaults(func=match)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,250 @@
+"""Functional and inclusion dependency discovery (sections 8 and 13 of app.py).
+
+A functional dependency (FD) X -> A holds when rows that agree on the
+columns X also agree on A. Only minimal FDs are reported (no column of X
+can be left out) and only ones whose determinant isn't a key, since a key
+determines every column. Nulls count as one more value.
+
+FDs are found on the PLIs of profiler.keys: X -> A holds when A is constant
+within every group of X's PLI. Determinants are searched level by level up
+to ``max_lhs`` columns. A column that some smaller determinant (or X's own
+columns) already implies isn't checked again, and a determinant with a
+column the others determine, or with a unique subset, isn't extended.
+Candidates are first checked on a few rows of the PLI, which rules out most
+of them before the whole PLI is read.
+
+As with keys, the search runs on a row sample. FDs of the sample and
+determinants unique on the sample are verified on growing random subsets
+and the full table, and rows violating them join the sample until the
+sample's results hold on the full table.
+
+An inclusion dependency (IND) between two tables holds when every value of
+a column of one also appears in a column of the other, as a foreign key's
+values appear in the key it references. Each column is reduced once to the
+sorted 64-bit hashes of its distinct values; a containment check first
+compares sizes and the smallest and largest hashes, then probes a few
+spread-out values, and only then searches for the rest, block by block,
+stopping at the first miss.
+"""
+import numpy as np
+import pandas as pd
+
+from profiler.keys import (VERIFY_GROWTH, column_codes, column_pli, intersect,
+                           violating_rows)
+from profiler.profiling import text_values
+
+DEFAULT_MAX_LHS = 2
+DEFAULT_FD_SAMPLE_SIZE = 20_000
+# Rows of a PLI a candidate is checked on before the rest
+CHECK_ROWS = (256, 4096)
+# Values probed before an inclusion check searches for all of them
+PROBE_VALUES = 64
+PROBE_BLOCK = 1 << 16
+# Share of the referenced column's values an IND must cover to suggest it
+# as a join key; small ranges of codes fit inside any wide one otherwise
+JOIN_KEY_MIN_COVERAGE = 0.5
+
+
+def constant_in_groups(rows: np.ndarray, labels: np.ndarray, groups: int,
+                       codes: np.ndarray) -> np.ndarray:
+    """Whether each of ``rows`` has the ``codes`` value of the last row of
+    its group, i.e. all True when codes are constant within every group."""
+    values = codes[rows]
+    reference = np.empty(groups, dtype=values.dtype)
+    reference[labels] = values
+    return reference[labels] == values
+
+
+def dependents(pli: tuple, codes, candidates: list) -> list:
+    """The candidate columns that are constant within every group of ``pli``."""
+    rows, labels, groups, _ = pli
+    for limit in (*CHECK_ROWS, len(rows)):
+        candidates = [col for col in candidates if constant_in_groups(
+            rows[:limit], labels[:limit], groups, codes[col][0]).all()]
+        if not candidates or limit >= len(rows):
+            break
+    return candidates
+
+
+def violating_pair(pli: tuple, codes: np.ndarray) -> np.ndarray:
+    """Two rows in one group of ``pli`` with different ``codes``, if any."""
+    rows, labels, groups, _ = pli
+    same = constant_in_groups(rows, labels, groups, codes)
+    if same.all():
+        return rows[:0]
+    first = np.argmin(same)
+    group = labels == labels[first]
+    return rows[[first, np.argmax(group & same)]]
+
+
+def lhs_pli(lhs: tuple, codes, rows: int) -> tuple:
+    if not lhs:
+        # Every row in one group
+        return np.arange(rows), np.zeros(rows, dtype=np.int64), 1, rows
+    pli = column_pli(*codes[lhs[0]])
+    for col in lhs[1:]:
+        pli = intersect(pli, *codes[col])
+    return pli
+
+
+def sample_dependencies(codes: list, max_lhs: int) -> tuple:
+    """Minimal FDs of columns given as (codes, cardinality) pairs, as
+    {determinant: [dependents]} with columns as positions, and the minimal
+    determinants that are unique (and so left out). Constant columns are
+    the dependents of the empty determinant."""
+    constant = {col for col, (_, cardinality) in enumerate(codes) if cardinality <= 1}
+    level, unique = {}, []
+    for col in range(len(codes)):
+        if col in constant:
+            continue
+        pli = column_pli(*codes[col])
+        if len(pli[0]):
+            level[(col,)] = pli
+        else:
+            unique.append((col,))
+    determined, found = {(): constant}, {(): sorted(constant)}
+    for size in range(1, max_lhs + 1):
+        for lhs, pli in list(level.items()):
+            subsets = [lhs[:i] + lhs[i + 1:] for i in range(len(lhs))]
+            # A column the others determine: lhs is never a minimal determinant
+            if any(col in determined[subset] for col, subset in zip(lhs, subsets)):
+                del level[lhs]
+                continue
+            implied = set(lhs).union(*(determined[subset] for subset in subsets))
+            holding = dependents(pli, codes, [col for col in range(len(codes)) if col not in implied])
+            determined[lhs] = implied.union(holding)
+            if holding:
+                found[lhs] = holding
+        if size == max_lhs:
+            break
+        extended_level = {}
+        for lhs, pli in level.items():
+            for col in range(lhs[-1] + 1, len(codes)):
+                extended = lhs + (col,)
+                if not all(extended[:i] + extended[i + 1:] in level for i in range(size)):
+                    continue
+                child = intersect(pli, *codes[col])
+                if len(child[0]):
+                    extended_level[extended] = child
+                else:
+                    unique.append(extended)
+        level = extended_level
+    return found, unique
+
+
+def functional_dependencies(df: pd.DataFrame, max_lhs: int = DEFAULT_MAX_LHS,
+                            sample_size: int = DEFAULT_FD_SAMPLE_SIZE, seed: int = 0) -> list:
+    """Minimal FDs of ``df`` with determinants of up to ``max_lhs`` columns
+    that aren't keys, as (determinant tuple, dependent) pairs of column
+    names in table order."""
+    columns = list(df.columns)
+    if len(df) < 2 or not columns:
+        return []
+    shuffled = np.random.default_rng(seed).permutation(len(df))
+    sample = np.sort(shuffled[:sample_size])
+    subsets = [np.sort(shuffled[:size]) for size in
+               sample_size * VERIFY_GROWTH ** np.arange(1, 8) if size < len(df)]
+    codes, verified = {}, set()
+    while True:
+        part = df.iloc[sample]
+        found, unique = sample_dependencies([column_codes(part[col]) for col in columns], max_lhs)
+        # Determinants unique on the sample, which must be keys of the table
+        # too, and FDs to verify
+        checks = [(lhs, None) for lhs in unique if (lhs, None) not in verified]
+        checks += [(lhs, col) for lhs, cols in sorted(found.items()) for col in cols
+                   if (lhs, col) not in verified]
+        if len(sample) == len(df):
+            checks = []
+        for col in {col for lhs, dependent in checks for col in (*lhs, dependent)} - {None} - set(codes):
+            codes[col] = column_codes(df[columns[col]])
+        violations = []
+        for subset in [*subsets, None]:
+            subset_codes = codes if subset is None else {
+                col: (codes[col][0][subset], codes[col][1]) for col in codes}
+            passed, chain, plis = [], [], {}
+            for lhs, dependent in checks:
+                if dependent is None:
+                    rows = violating_rows(lhs, subset_codes, chain)
+                else:
+                    if lhs not in plis:
+                        plis[lhs] = lhs_pli(lhs, subset_codes, len(df) if subset is None else len(subset))
+                    rows = violating_pair(plis[lhs], subset_codes[dependent][0])
+                if len(rows):
+                    violations.append(rows if subset is None else subset[rows])
+                else:
+                    passed.append((lhs, dependent))
+            checks = passed
+        verified.update(checks)
+        if not violations:
+            return sorted(((tuple(columns[col] for col in lhs), columns[dependent])
+                           for lhs, dependents_ in found.items() if lhs
+                           for dependent in dependents_),
+                          key=lambda fd: (len(fd[0]), [columns.index(col) for col in fd[0]],
+                                          columns.index(fd[1])))
+        sample = np.union1d(sample, np.concatenate(violations))
+
+
+def value_set(series: pd.Series):
+    """('number' or 'text', sorted hashes of the distinct non-null values),
+    or None for boolean and constant columns. Numbers are hashed as floats, so
+    a column read as 1.0, 2.0 matches one read as 1, 2."""
+    values = pd.Series(series.dropna().unique())
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(values.dtype.categories.dtype)
+    if len(values) < 2 or pd.api.types.is_bool_dtype(values):
+        return None
+    if pd.api.types.is_numeric_dtype(values):
+        return 'number', np.unique(pd.util.hash_array(values.to_numpy(dtype=np.float64)))
+    return 'text', np.unique(pd.util.hash_array(text_values(values)))
+
+
+def contained(left: np.ndarray, right: np.ndarray) -> bool:
+    """Whether every hash in sorted ``left`` is in sorted ``right``."""
+    if len(left) > len(right) or left[0] < right[0] or left[-1] > right[-1]:
+        return False
+    step = max(len(left) // PROBE_VALUES, 1)
+    blocks = [left[::step], *(left[start:start + PROBE_BLOCK]
+                              for start in range(0, len(left), PROBE_BLOCK))]
+    for block in blocks:
+        found = right[np.minimum(np.searchsorted(right, block), len(right) - 1)]
+        if not np.array_equal(found, block):
+            return False
+    return True
+
+
+def inclusion_dependencies(df1: pd.DataFrame, df2: pd.DataFrame) -> list:
+    """Column pairs of the two tables with an IND in either direction, as
+    dicts with the columns, which directions hold, distinct counts, whether
+    each column is unique (no nulls or repeats) in its table and the share
+    of the larger value set the smaller covers."""
+    sets1 = {col: value_set(df1[col]) for col in df1.columns}
+    sets2 = {col: value_set(df2[col]) for col in df2.columns}
+    found = []
+    for col1, set1 in sets1.items():
+        for col2, set2 in sets2.items():
+            if set1 is None or set2 is None or set1[0] != set2[0]:
+                continue
+            left_in_right = contained(set1[1], set2[1])
+            right_in_left = contained(set2[1], set1[1])
+            if left_in_right or right_in_left:
+                found.append({
+                    'left': col1, 'right': col2,
+                    'left_in_right': left_in_right, 'right_in_left': right_in_left,
+                    'left_distinct': len(set1[1]), 'right_distinct': len(set2[1]),
+                    'left_unique': len(set1[1]) == len(df1),
+                    'right_unique': len(set2[1]) == len(df2),
+                    'coverage': (min(len(set1[1]), len(set2[1]))
+                                 / max(len(set1[1]), len(set2[1]))),
+                })
+    return found
+
+
+def join_keys(inclusions: list) -> list:
+    """INDs that reference a unique column and cover most of its values,
+    i.e. foreign key candidates, most distinct values first, as (left
+    column, right column) pairs."""
+    keys = [ind for ind in inclusions if ind['coverage'] >= JOIN_KEY_MIN_COVERAGE
+            and ((ind['left_in_right'] and ind['right_unique'])
+                 or (ind['right_in_left'] and ind['left_unique']))]
+    keys.sort(key=lambda ind: -min(ind['left_distinct'], ind['right_distinct']))
+    return [(ind['left'], ind['right']) for ind in keys]
@@ -0,0 +1,286 @@
+"""Fuzzy duplicate clustering (section 12 of app.py).
+
+Rows are compared within blocks. Each block is scored a slice of rows at a
+time as a matrix with ``process.cdist``; explicit candidate pairs from
+profiler.blocking are scored element-wise with ``process.cpdist``. Pairs at
+or above the threshold are merged with union-find, so the result is a set
+of duplicate groups rather than a flat set of matched rows.
+
+Scores are rapidfuzz's ``token_sort_ratio`` on the raw keys, as the old
+``process.extract`` loop computed them. Keys are token-sorted once up front
+so cdist can use the plain ``ratio``, and identical keys are grouped without
+being scored.
+
+Exact duplicates are found from one 64-bit hash per row, combined from a
+hash of each value (``pd.util.hash_pandas_object``, or of factorized codes
+for text) and grouped with a hash table instead of comparing rows. Text
+codes, numbers, booleans and timestamps hash without collisions within a
+column (pandas mixes their bits reversibly), so only the row combination,
+and the keyed hash of any other objects, can collide. Rows whose hash
+repeats are checked against a second row hash, combined differently from
+the values hashed again (other objects under a second key), and regrouped
+on both if it disagrees; a false group then needs both row hashes to
+collide. -0.0 is hashed as 0.0, as ``duplicated`` compares them equal.
+Groups come back as NumPy arrays: a group number per row and a size per
+group.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from profiler.blocking import BlockingPass, block_groups
+from profiler.jobs import Checkpoint
+from profiler.profiling import is_text_column, text_values
+from profiler.tracing import span
+
+# Cells of one cdist slice (float32, so 64 MB)
+MAX_BLOCK_CELLS = 1 << 24
+# Row hashes combine column hashes like tuple hashing does
+ROW_HASH_SEED = 0x345678
+ROW_HASH_MULTIPLIER = 1_000_003
+# pandas' SipHash key for the check hash of object values (16 bytes; the
+# first hash uses pandas' default key)
+CHECK_HASH_KEY = 'profiler.dupchk!'
+
+# What rapidfuzz splits tokens on in strings whose characters all fit in one
+# byte: Python's whitespace minus NEL and NBSP. Wider strings split like
+# str.split().
+_LATIN1_SEPARATORS = re.compile(r"[\t\n\x0b\x0c\r\x1c-\x1f ]+")
+
+
+class UnionFind:
+    """Disjoint sets over 0..n-1, merged a batch of pairs at a time."""
+
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+
+    def roots(self) -> np.ndarray:
+        # Pointer jumping until every element points at its root
+        parent = self.parent
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        self.parent = parent
+        return parent
+
+    def union(self, left: np.ndarray, right: np.ndarray):
+        left, right = np.asarray(left), np.asarray(right)
+        while len(left):
+            roots = self.roots()
+            a, b = roots[left], roots[right]
+            apart = a != b
+            if not apart.any():
+                break
+            left, right, a, b = left[apart], right[apart], a[apart], b[apart]
+            # Hook every larger root under the smallest root it is paired
+            # with. Parents only ever decrease, so no cycles can form.
+            np.minimum.at(self.parent, np.maximum(a, b), np.minimum(a, b))
+        return self
+
+    def cluster_ids(self) -> np.ndarray:
+        """Group number per element, numbered by first appearance; -1 for
+        elements that are in no group with anything else."""
+        roots = self.roots()
+        _, first, inverse, counts = np.unique(roots, return_index=True,
+                                              return_inverse=True, return_counts=True)
+        grouped = counts > 1
+        order = np.argsort(first[grouped], kind='stable')
+        numbers = np.full(len(counts), -1)
+        numbers[np.flatnonzero(grouped)[order]] = np.arange(grouped.sum())
+        return numbers[inverse]
+
+
+def duplicate_keys(df: pd.DataFrame, columns: list) -> pd.Series:
+    """The columns' values joined by spaces, with nulls as empty strings."""
+    def strings(series):
+        return pd.Series(np.where(series.isna().to_numpy(), '', text_values(series)),
+                         index=df.index, dtype=object)
+
+    keys = strings(df[columns[0]])
+    for col in columns[1:]:
+        keys = keys + ' ' + strings(df[col])
+    return keys
+
+
+def _token_sort(key: str) -> str:
+    if ('\xa0' in key or '\x85' in key) and max(key) <= '\xff':
+        tokens = [token for token in _LATIN1_SEPARATORS.split(key) if token]
+    else:
+        tokens = key.split()
+    return " ".join(sorted(tokens))
+
+
+def _sorted_tokens(keys) -> np.ndarray:
+    # token_sort_ratio(a, b) == ratio(sorted tokens of a, sorted tokens of b)
+    return np.array([_token_sort(key) for key in keys], dtype=object)
+
+
+def score_pairs(keys: np.ndarray, threshold: float, workers: int = -1):
+    """(i, j) with i < j for every pair of ``keys`` with ratio >= threshold."""
+    found_left, found_right = [], []
+    rows = max(1, MAX_BLOCK_CELLS // max(len(keys), 1))
+    for start in range(0, len(keys), rows):
+        # Only the upper triangle: row i against keys i+1 onwards
+        scores = process.cdist(keys[start:start + rows], keys[start:], scorer=fuzz.ratio,
+                               score_cutoff=threshold, workers=workers)
+        left, right = np.nonzero(scores)
+        upper = right > left
+        found_left.append(left[upper] + start)
+        found_right.append(right[upper] + start)
+    if not found_left:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(found_left), np.concatenate(found_right)
+
+
+def score_candidates(tokens: np.ndarray, left: np.ndarray, right: np.ndarray,
+                     threshold: float, workers: int = -1, progress=None,
+                     checkpoint: Checkpoint = None):
+    """The candidate pairs (left[k], right[k]) with ratio >= threshold.
+    Each chunk's matching pairs go to ``checkpoint``; chunks it already
+    holds are skipped."""
+    checkpoint = Checkpoint() if checkpoint is None else checkpoint
+    done = checkpoint.blocks
+    chunks = range(0, len(left), MAX_BLOCK_CELLS)
+    if progress is not None:
+        chunks = progress(chunks, len(chunks))
+    for chunk_number, start in enumerate(chunks):
+        if chunk_number < done:
+            continue
+        chunk = slice(start, start + MAX_BLOCK_CELLS)
+        scores = process.cpdist(tokens[left[chunk]], tokens[right[chunk]], scorer=fuzz.ratio,
+                                score_cutoff=threshold, workers=workers)
+        found = np.flatnonzero(scores) + start
+        checkpoint.add((left[found], right[found]) if len(found) else None)
+    parts = checkpoint.results()
+    if not parts:
+        return left[:0], right[:0]
+    return (np.concatenate([part[0] for part in parts]),
+            np.concatenate([part[1] for part in parts]))
+
+
+def duplicate_clusters(df: pd.DataFrame, columns: list, threshold: float,
+                       blocks: np.ndarray = None, candidates: tuple = None,
+                       workers: int = -1, progress=None,
+                       checkpoint: Checkpoint = None) -> pd.Series:
+    """Fuzzy duplicate group of every row (-1 if it has no duplicate).
+
+    Rows are only compared within the same ``blocks`` id (by default the
+    first character of the first column; -1 is no block), or, if given,
+    only as the ``candidates`` pairs of row positions. ``progress``
+    optionally wraps the block iterator, e.g.
+    ``lambda blocks, total: stqdm(blocks, total=total)``. Each block's pairs
+    of rows to merge go to ``checkpoint`` (profiler.jobs); blocks it already
+    holds are skipped.
+    """
+    clusters = UnionFind(len(df))
+    if not columns or not len(df):
+        return pd.Series(clusters.cluster_ids(), index=df.index)
+    with span("duplicate_keys", rows=len(df), columns=len(columns)):
+        keys = duplicate_keys(df, columns).to_numpy()
+
+    if candidates is not None:
+        with span("scoring", pairs=len(candidates[0])) as current:
+            codes, unique_keys = pd.factorize(keys)
+            tokens = _sorted_tokens(unique_keys)[codes]
+            matched = score_candidates(tokens, *candidates, threshold, workers, progress,
+                                       checkpoint)
+            current.count(matches=len(matched[0]))
+        with span("clustering", rows=len(df)):
+            clusters.union(*matched)
+            return pd.Series(clusters.cluster_ids(), index=df.index)
+
+    if blocks is None:
+        blocks = BlockingPass('prefix', columns[0]).block_keys(df)[0]
+    groups = block_groups(blocks).values()
+    checkpoint = Checkpoint() if checkpoint is None else checkpoint
+    done = checkpoint.blocks
+    with span("scoring", blocks=len(groups), resumed=done) as current:
+        if progress is not None:
+            groups = progress(groups, len(groups))
+        pairs = matches = 0
+        for block, positions in enumerate(groups):
+            if block < done:
+                continue
+            # Rows with the same key always match; score each distinct key once
+            codes, unique_keys = pd.factorize(keys[positions])
+            representative = positions[np.unique(codes, return_index=True)[1]]
+            first = representative[codes]
+            same = positions != first
+            left, right = score_pairs(_sorted_tokens(unique_keys), threshold, workers)
+            if same.any() or len(left):
+                checkpoint.add((np.concatenate([positions[same], representative[left]]),
+                                np.concatenate([first[same], representative[right]])))
+            else:
+                checkpoint.add()
+            pairs += len(unique_keys) * (len(unique_keys) - 1) // 2
+            matches += len(left)
+        current.count(pairs=pairs, matches=matches)
+    with span("clustering", rows=len(df)):
+        for left, right in checkpoint.results():
+            clusters.union(left, right)
+        return pd.Series(clusters.cluster_ids(), index=df.index)
+
+
+def value_hashes(series: pd.Series, hash_key: str = None) -> np.ndarray:
+    """A uint64 hash of each value, different for different values. Text
+    is factorized and its codes hashed: cheaper than hashing strings, and
+    exact for object columns mixing types, whose values pandas would hash
+    as strings. ``hash_key`` is the SipHash key for other objects."""
+    if is_text_column(series.dtype):
+        # Nulls all get code -1
+        return pd.util.hash_array(pd.factorize(series)[0].astype(np.uint64))
+    if series.dtype.kind == 'f':
+        # -0.0 + 0.0 is 0.0; the bits differ, so they would hash apart
+        series = series + 0.0
+    kwargs = {} if hash_key is None else {'hash_key': hash_key}
+    return pd.util.hash_pandas_object(series, index=False, **kwargs).to_numpy()
+
+
+def column_hashes(frame: pd.DataFrame, hash_key: str = None) -> list:
+    return [value_hashes(frame[col], hash_key) for col in frame.columns]
+
+
+def combine_hashes(hashes: list) -> np.ndarray:
+    """One hash per row from its columns' hashes (uint64 products wrap)."""
+    combined = np.full(len(hashes[0]), ROW_HASH_SEED, dtype=np.uint64)
+    for i, column in enumerate(hashes):
+        combined = (combined ^ column) * np.uint64(ROW_HASH_MULTIPLIER + 2 * i)
+    return combined
+
+
+def exact_duplicate_groups(df: pd.DataFrame, columns: list = None) -> tuple:
+    """Exact duplicate group of every row (-1 if no other row has the same
+    values), numbered by first appearance, and the size of each group.
+    ``columns`` restricts the comparison to those columns; nulls are equal
+    to each other, as in ``duplicated``."""
+    frame = df if columns is None else df[list(columns)]
+    groups = np.full(len(df), -1, dtype=np.int64)
+    if not len(df) or not len(frame.columns):
+        return groups, np.empty(0, dtype=np.int64)
+    hashes = column_hashes(frame)
+    labels, uniques = pd.factorize(combine_hashes(hashes))
+    rows = np.flatnonzero(np.bincount(labels)[labels] > 1)
+    if not len(rows):
+        return groups, np.empty(0, dtype=np.int64)
+    labels = labels[rows]
+    # The check hash rehashes the candidate rows' values (objects under
+    # another key) and mixes each column hash before combining them. Groups
+    # it splits are regrouped on both.
+    check = combine_hashes([pd.util.hash_array(column)
+                            for column in column_hashes(frame.iloc[rows], CHECK_HASH_KEY)])
+    reference = np.empty(len(uniques), dtype=np.uint64)
+    reference[labels] = check
+    if not (reference[labels] == check).all():
+        labels = pd.DataFrame({'first': labels, 'check': check}).groupby(
+            ['first', 'check'], sort=False).ngroup().to_numpy()
+    labels = pd.factorize(labels)[0]
+    sizes = np.bincount(labels)
+    repeated = sizes[labels] > 1
+    # Groups are numbered in order of their first row, as rows are ascending
+    numbers = np.cumsum(sizes > 1) - 1
+    groups[rows[repeated]] = numbers[labels[repeated]]
+    return groups, sizes[sizes > 1]
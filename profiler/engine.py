@@ -0,0 +1,382 @@
+"""Every section of the profiler as plain functions of a loaded frame.
+
+app.py's cached wrappers and the batch CLI (profiler.cli) call the same
+functions, so a nightly run writes exactly what the app would show. Each
+step takes the intermediate results it depends on (value frequencies,
+distinct counts, pattern hits, sketches) as optional arguments; the app passes in its cached copies,
+and ``profile_table`` computes each of them once and shares it.
+
+stats_mode is (approximate, distinct_error, quantile_error). In approximate
+mode distinct counts and medians come from HyperLogLog/KLL sketches built
+once per column. Distinct counts, top values, picklists and email domains
+share one value-count pass per column (``value_frequencies``, see
+profiler.values): a hash count in exact mode, a Space-Saving summary over
+the sketches in approximate mode.
+
+Each section function runs in a span (profiler.tracing), which records
+nothing unless the caller has made a tracer current.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from profiler.blocking import BlockingPass, plan_blocking
+from profiler.dependencies import (DEFAULT_MAX_LHS, functional_dependencies,
+                                   inclusion_dependencies, join_keys)
+from profiler.duplicates import duplicate_clusters, exact_duplicate_groups
+from profiler.keys import DEFAULT_MAX_KEY_SIZE, unique_column_combinations
+from profiler.matching import match_frames, match_table
+from profiler.parallel import map_columns
+from profiler.patterns import pattern_hits_by_column, pattern_table, quality_table
+from profiler.profiling import is_text_column, profiling_records
+from profiler.sketches import sketch_columns
+from profiler.tracing import span, traced
+from profiler.values import (column_frequencies, histograms, picklist_counts, top_values,
+                             value_counts)
+
+EXACT_STATS = (False, None, None)
+DEFAULT_FUZZY_THRESHOLD = 90
+# Section 3 shows an email domain breakdown for columns matching more often
+EMAIL_DOMAIN_MIN_PERCENT = 50
+DUPLICATE_TYPES = ["Exact", "Fuzzy", "Both"]
+
+
+@traced
+def column_sketches(df: pd.DataFrame, stats_mode: tuple) -> dict:
+    """Per-column sketches in approximate mode, None in exact mode."""
+    approximate, distinct_error, quantile_error = stats_mode
+    return sketch_columns(df, distinct_error, quantile_error) if approximate else None
+
+
+@traced
+def value_frequencies(df: pd.DataFrame, workers: int = 1, sketches: dict = None) -> dict:
+    """{column: Frequencies}, the one value-count pass per column shared by
+    the distinct counts and sections 3, 4 and 9; Space-Saving summaries if
+    ``sketches`` are given."""
+    return map_columns(column_frequencies, df, workers, sketches=sketches)
+
+
+@traced
+def distinct_counts(df: pd.DataFrame, workers: int = 1, sketches: dict = None,
+                    frequencies: dict = None) -> pd.Series:
+    """Distinct values per column: from ``frequencies`` if given, else
+    estimated from ``sketches`` if given, else counted."""
+    if frequencies is not None:
+        return pd.Series({col: frequencies[col].distinct for col in df.columns},
+                         index=df.columns, dtype=np.int64)
+    if sketches is None:
+        return map_columns(pd.DataFrame.nunique, df, workers)
+    return pd.Series({col: sketch.distinct_count() for col, sketch in sketches.items()},
+                     index=df.columns, dtype=np.int64)
+
+
+@traced
+def column_profiling(df: pd.DataFrame, distinct: pd.Series, workers: int = 1,
+                     sketches: dict = None) -> pd.DataFrame:
+    """Section 2's profiling table."""
+    medians = None
+    if sketches is not None:
+        medians = {col: sketch.median() for col, sketch in sketches.items()}
+    return pd.DataFrame(map_columns(profiling_records, df, workers,
+                                    unique_counts=distinct, medians=medians))
+
+
+@traced
+def pattern_hits(df: pd.DataFrame, workers: int = 1) -> dict:
+    """One pass over each column, shared by sections 3, 6 and 7."""
+    return map_columns(pattern_hits_by_column, df, workers)
+
+
+def email_columns(pattern_analysis: pd.DataFrame) -> list:
+    return pattern_analysis.loc[pattern_analysis['Email %'] > EMAIL_DOMAIN_MIN_PERCENT,
+                                'Column'].tolist()
+
+
+@traced
+def email_domains(df: pd.DataFrame, email_column, frequencies=None) -> pd.Series:
+    """Section 3's domain counts of an email column. Domains are extracted
+    from the distinct values only, counted by the column's ``frequencies``
+    when those hold every value."""
+    if frequencies is not None and frequencies.complete:
+        counts = frequencies.counts
+    else:
+        counts = value_counts(df[email_column])
+    domains = counts.index.astype(str).str.extract(r'@(.+)$', expand=False)
+    return (counts.groupby(domains.to_numpy()).sum().rename_axis('Email_Domain')
+            .rename('count').sort_values(ascending=False, kind='stable'))
+
+
+@traced
+def top_value_counts(df: pd.DataFrame, frequencies: dict) -> dict:
+    """Section 4's {column: most frequent values}."""
+    return top_values(df, frequencies)
+
+
+@traced
+def column_histograms(df: pd.DataFrame, workers: int = 1) -> dict:
+    """Section 4's {column: binned counts} of numeric columns."""
+    return map_columns(histograms, df, workers)
+
+
+@traced
+def null_percentages(df: pd.DataFrame) -> pd.Series:
+    return df.isnull().mean() * 100
+
+
+@traced
+def table_summary(df: pd.DataFrame, distinct: pd.Series) -> tuple:
+    """Section 6's (completeness, uniqueness) percentages."""
+    completeness = 100 - df.isnull().stack().mean() * 100
+    return completeness, distinct.mean() / len(df) * 100
+
+
+def table_scores(pattern_analysis: pd.DataFrame, completeness: float, uniqueness: float) -> dict:
+    """Section 6's metrics from the pattern table and table summary."""
+    validity = pattern_analysis[['Email %', 'Phone %', 'Date %']].mean().mean()
+    consistency = pattern_analysis[['Alphanumeric %']].mean().mean()
+    return {
+        "Completeness": completeness,
+        "Validity": validity,
+        "Uniqueness": uniqueness,
+        "Consistency": consistency,
+        "Overall Score": np.mean([completeness, validity, uniqueness, consistency]),
+    }
+
+
+@traced
+def quality_scores(df: pd.DataFrame, hits: dict, distinct: pd.Series) -> pd.DataFrame:
+    """Section 7's column-wise quality scores."""
+    return quality_table(hits, df.dtypes.to_dict(), distinct)
+
+
+@traced
+def primary_keys(df: pd.DataFrame, max_size: int = DEFAULT_MAX_KEY_SIZE) -> list:
+    """Section 8's minimal keys of up to ``max_size`` columns: column
+    combinations that are unique and never null (profiler.keys)."""
+    return unique_column_combinations(df, max_size)
+
+
+@traced
+def functional_dependency_table(df: pd.DataFrame, max_lhs: int = DEFAULT_MAX_LHS) -> pd.DataFrame:
+    """Section 8's minimal functional dependencies between non-key columns."""
+    return pd.DataFrame([{"Determinant": " + ".join(map(str, lhs)), "Dependent": rhs}
+                         for lhs, rhs in functional_dependencies(df, max_lhs)],
+                        columns=["Determinant", "Dependent"])
+
+
+@traced
+def schema_links(df1: pd.DataFrame, df2: pd.DataFrame) -> dict:
+    """Section 13's inclusion dependencies between df1 and df2 columns and
+    the (df1 column, df2 column) join keys they suggest."""
+    inclusions = inclusion_dependencies(df1, df2)
+    return {"inclusions": inclusions, "join_keys": join_keys(inclusions)}
+
+
+@traced
+def picklists(df: pd.DataFrame, frequencies: dict) -> dict:
+    """Section 9's {column: (distinct count, value counts)} of the text
+    columns with few enough values to be picklists."""
+    return {col: (frequencies[col].distinct, counts)
+            for col, counts in picklist_counts(df, frequencies).items()}
+
+
+@traced
+def match_rules(df: pd.DataFrame) -> pd.DataFrame:
+    """Section 10's suggested match rule per column."""
+    rules = []
+    for col in df.columns:
+        if col.lower() in ["email", "id", "phone"]:
+            match_type = "ExactMatch"
+        elif is_text_column(df[col].dtype) and df[col].str.len().mean() > 10:
+            match_type = "FuzzyMatch"
+        elif is_text_column(df[col].dtype):
+            match_type = "CompositeMatch"
+        else:
+            match_type = "ExactMatch"
+        rules.append({"Column": col, "Suggested Match Rule": match_type})
+    return pd.DataFrame(rules)
+
+
+def text_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if is_text_column(df[col].dtype)]
+
+
+def unique_text_columns(df: pd.DataFrame, distinct: pd.Series,
+                        stats_mode: tuple = EXACT_STATS) -> list:
+    """Text columns that look like identifiers; section 12 leaves them out
+    of fuzzy matching by default."""
+    columns = text_columns(df)
+    approximate, distinct_error, _ = stats_mode
+    if approximate:
+        # Within three standard errors of every row being distinct
+        non_null = df[columns].notna().all()
+        return [col for col in columns if non_null[col]
+                and distinct[col] >= len(df) * (1 - 3 * distinct_error)]
+    return [col for col in columns if distinct[col] == len(df)]
+
+
+def default_fuzzy_columns(df: pd.DataFrame, distinct: pd.Series,
+                          stats_mode: tuple = EXACT_STATS) -> list:
+    exclude = unique_text_columns(df, distinct, stats_mode)
+    return [col for col in text_columns(df) if col not in exclude]
+
+
+def exact_duplicates(df: pd.DataFrame, columns: list = None) -> tuple:
+    """Section 12's exact duplicate group per row (-1 for none) and the
+    size of each group, as NumPy arrays. ``columns`` restricts the
+    comparison to those columns."""
+    with span("exact_duplicates", rows=len(df)) as current:
+        groups, sizes = exact_duplicate_groups(df, columns)
+        current.count(groups=len(sizes), duplicate_rows=int(sizes.sum()))
+    return groups, sizes
+
+
+def blocking_passes(passes: tuple) -> list:
+    """BlockingPass objects from hashable (method, column, params) tuples."""
+    return [BlockingPass(method, column, **dict(params)) for method, column, params in passes]
+
+
+def blocking_plan(df1: pd.DataFrame, df2: pd.DataFrame, passes: tuple):
+    with span("blocking", rows=len(df1), passes=len(passes)) as current:
+        plan = plan_blocking(blocking_passes(passes), df1, df2)
+        current.count(pairs=plan.pair_count)
+    return plan
+
+
+@traced
+def fuzzy_duplicates(df: pd.DataFrame, columns: list, threshold: float, plan,
+                     progress=None, checkpoint=None) -> pd.Series:
+    """Section 12's fuzzy duplicate group per row (-1 for none)."""
+    return duplicate_clusters(df, list(columns), threshold,
+                              blocks=plan.blocks[0] if plan.blocks else None,
+                              candidates=plan.candidates, progress=progress,
+                              checkpoint=checkpoint)
+
+
+def duplicate_types(exact_groups: np.ndarray, fuzzy_clusters: pd.Series) -> pd.Series:
+    """'Exact', 'Fuzzy' or 'Both' (categorical) of every duplicate row, by
+    index label in table order."""
+    codes = ((exact_groups >= 0).astype(np.int8)
+             + 2 * (fuzzy_clusters.to_numpy() >= 0).astype(np.int8) - 1)
+    duplicate = codes >= 0
+    return pd.Series(pd.Categorical.from_codes(codes[duplicate], DUPLICATE_TYPES),
+                     index=fuzzy_clusters.index[duplicate], name="DuplicateType")
+
+
+def duplicate_summary(types: pd.Series, exact_groups: np.ndarray, fuzzy_clusters: pd.Series,
+                      rows: int) -> dict:
+    counts = types.value_counts()
+    return {
+        "exact": int(counts.get("Exact", 0)),
+        "fuzzy": int(counts.get("Fuzzy", 0)),
+        "both": int(counts.get("Both", 0)),
+        "exact_groups": int(exact_groups.max(initial=-1) + 1),
+        "fuzzy_groups": int(fuzzy_clusters.max() + 1) if len(fuzzy_clusters) else 0,
+        "total": len(types),
+        "total_percent": round(len(types) / rows * 100, 2) if rows else 0.0,
+    }
+
+
+@traced
+def cross_source_matches(df1: pd.DataFrame, df2: pd.DataFrame, match_columns: list,
+                         weights: dict, threshold: float, plan, progress=None,
+                         checkpoint=None) -> pd.DataFrame:
+    """Section 13's matched pairs of df1 and df2 rows."""
+    return match_frames(df1, df2, list(match_columns), weights, threshold,
+                        blocks=plan.blocks, candidates=plan.candidates, progress=progress,
+                        checkpoint=checkpoint)
+
+
+def partial_matches(df1: pd.DataFrame, df2: pd.DataFrame, match_columns: list,
+                    parts: list) -> pd.DataFrame:
+    """Section 13's matched pairs from the blocks a run has scored so far
+    (its checkpoint's results)."""
+    return match_table(df1, df2, list(match_columns), parts)
+
+
+@traced
+def profile_table(df: pd.DataFrame, stats_mode: tuple = EXACT_STATS, workers: int = 1,
+                  fuzzy_columns: list = None, fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD,
+                  passes: tuple = None, duplicates: bool = True, profile=None,
+                  max_key_size: int = DEFAULT_MAX_KEY_SIZE, max_lhs: int = DEFAULT_MAX_LHS,
+                  exact_columns: list = None) -> dict:
+    """Sections 2-10 and 12 of one table, each computed once.
+
+    ``fuzzy_columns`` and ``passes`` default to what section 12 preselects:
+    the non-identifier text columns, blocked on the first one's first
+    character. Exact duplicates compare ``exact_columns``, or all columns.
+    Section 11 needs a user-chosen status column and is left to the app.
+    Timings per step are kept under "seconds".
+
+    ``profile`` is a merged StreamingProfile of ``df`` (profiler.incremental);
+    sections 2, 3, 5, 6 and 7 and the distinct counts then come from it.
+    """
+    seconds = {}
+
+    def timed(name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds[name] = seconds.get(name, 0) + time.perf_counter() - start
+        return result
+
+    if profile is None:
+        sketches = timed("sketches", column_sketches, df, stats_mode) if stats_mode[0] else None
+        frequencies = timed("value_frequencies", value_frequencies, df, workers, sketches)
+        distinct = timed("distinct_counts", distinct_counts, df, frequencies=frequencies)
+        hits = timed("pattern_hits", pattern_hits, df, workers)
+        completeness, uniqueness = timed("table_summary", table_summary, df, distinct)
+        profiling = timed("column_profiling", column_profiling, df, distinct, workers, sketches)
+        nulls = timed("null_percentages", null_percentages, df)
+    else:
+        distinct = timed("distinct_counts", profile.distinct_counts)
+        frequencies = timed("value_frequencies", value_frequencies, df, workers)
+        hits = profile.pattern_hits()
+        completeness, uniqueness = profile.table_summary()
+        profiling = timed("column_profiling", profile.column_profiling)
+        nulls = profile.null_percentages()
+    patterns = pattern_table(hits)
+    report = {
+        "rows": len(df),
+        "columns": df.shape[1],
+        "column_profiling": profiling,
+        "pattern_analysis": patterns,
+        "email_domains": {col: timed("email_domains", email_domains, df, col, frequencies[col])
+                          for col in email_columns(patterns)},
+        "top_values": timed("top_values", top_value_counts, df, frequencies),
+        "null_percentages": nulls,
+        "table_summary": table_scores(patterns, completeness, uniqueness),
+        "quality_scores": quality_scores(df, hits, distinct),
+        "primary_keys": timed("primary_keys", primary_keys, df, max_key_size),
+        "functional_dependencies": timed("functional_dependencies",
+                                         functional_dependency_table, df, max_lhs),
+        "picklists": timed("picklists", picklists, df, frequencies),
+        "match_rules": timed("match_rules", match_rules, df),
+    }
+    if duplicates:
+        if fuzzy_columns is None:
+            fuzzy_columns = default_fuzzy_columns(df, distinct, stats_mode)
+        if passes is None:
+            passes = tuple(('prefix', col, (('length', 1),)) for col in fuzzy_columns[:1])
+        exact_groups, _ = timed("exact_duplicates", exact_duplicates, df, exact_columns)
+        plan = timed("blocking", blocking_plan, df, None, passes)
+        clusters = timed("fuzzy_duplicates", fuzzy_duplicates,
+                         df, fuzzy_columns, fuzzy_threshold, plan)
+        types = duplicate_types(exact_groups, clusters)
+        report["duplicates"] = {
+            "exact_columns": list(exact_columns) if exact_columns else None,
+            "fuzzy_columns": list(fuzzy_columns),
+            "threshold": fuzzy_threshold,
+            "candidate_pairs": plan.pair_count,
+            "reduction_ratio": plan.reduction_ratio,
+            **duplicate_summary(types, exact_groups, clusters, len(df)),
+        }
+        duplicate = (exact_groups >= 0) | (clusters.to_numpy() >= 0)
+        report["duplicate_rows"] = pd.DataFrame({
+            "Index": types.index, "DuplicateType": types.astype(str).to_numpy(),
+            "ExactGroup": pd.Series(exact_groups[duplicate]).where(
+                lambda group: group >= 0).astype("Int64").to_numpy(),
+            "FuzzyGroup": clusters[duplicate].where(
+                lambda group: group >= 0).astype("Int64").to_numpy()})
+    report["seconds"] = seconds
+    return report
@@ -0,0 +1,185 @@
+"""Incremental re-profiling of tables that grow by appended rows.
+
+A table is cut into partitions of ``partition_rows`` rows and each partition
+is profiled into its own StreamingProfile. Partitions are keyed by a hash of
+their rows. When the next version of the table is profiled, every partition
+whose rows are unchanged comes from the saved state, and only new or changed
+partitions are profiled. Appending rows changes at most the last, partial
+partition. The partition profiles are then merged.
+
+In exact mode each partition keeps full value counts per column. Distinct
+counts and medians of the merged profile then equal a full recompute, and
+so do sections 2, 3, 5, 6 and 7, except Date %: like the full recompute it
+is estimated from a sample (profiler.patterns.date_hits), but one taken per
+partition rather than across the column, so the two estimates can differ
+unless every sampled value parses or none does. Means and standard
+deviations are combined per partition, so they match up to floating-point
+rounding. In approximate stats_mode the partitions keep
+HyperLogLog/KLL/Space-Saving sketches instead, which are much smaller.
+
+The state of a dataset is pickled to one file. It records STATE_VERSION,
+the stats mode, the partition size and the type of each column's values; a
+state saved under different ones is discarded and rebuilt. A categorical
+counts as the type of its categories, so a column profiler.loading.categorize
+turns into a categorical in one version and not in the next keeps its
+partitions.
+"""
+import hashlib
+import os
+import pickle
+import re
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from profiler.engine import EXACT_STATS
+from profiler.sketches import hll_precision_for, kll_k_for
+from profiler.streaming import StreamingProfile
+
+STATE_VERSION = 2
+DEFAULT_PARTITION_ROWS = 100_000
+
+
+class ProfileState:
+    """Per-partition profiles of one version of a table."""
+
+    def __init__(self, stats_mode: tuple, partition_rows: int, columns: list):
+        self.version = STATE_VERSION
+        self.stats_mode = stats_mode
+        self.partition_rows = partition_rows
+        self.columns = columns
+        self.digests = []
+        self.partitions = {}
+
+    def matches(self, stats_mode: tuple, partition_rows: int, columns: list) -> bool:
+        return (self.version == STATE_VERSION and self.stats_mode == stats_mode
+                and self.partition_rows == partition_rows and self.columns == columns)
+
+
+def value_type(dtype) -> str:
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return str(dtype)
+
+
+def column_signature(df: pd.DataFrame) -> list:
+    return [(col, value_type(df[col].dtype)) for col in df.columns]
+
+
+def partition_digest(part: pd.DataFrame) -> str:
+    """Hash of a partition's values, written as an Arrow IPC stream.
+
+    Categoricals are hashed by value, since their categories (and codes)
+    change whenever a new version adds a value anywhere in the column, and
+    strings are hashed as large_string whichever Arrow type they load as.
+    Each array is copied out of the column's buffers first: a slice still
+    points into them, and the stream would otherwise carry rows beyond the
+    partition. Columns Arrow can't convert (objects of mixed types) are
+    hashed with ``pd.util.hash_pandas_object`` instead.
+    """
+    digest = hashlib.sha256()
+    arrays = {}
+    for col in part.columns:
+        series = part[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(series.dtype.categories.dtype)
+        try:
+            array = pa.Array.from_pandas(series)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            digest.update(str(col).encode())
+            digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+            continue
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        if pa.types.is_string(array.type):
+            array = array.cast(pa.large_string())
+        arrays[str(col)] = pa.concat_arrays([array])
+    table = pa.table(arrays)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    digest.update(sink.getvalue())
+    return digest.hexdigest()
+
+
+def empty_profile(stats_mode: tuple) -> StreamingProfile:
+    approximate, distinct_error, quantile_error = stats_mode
+    if approximate:
+        return StreamingProfile(hll_precision_for(distinct_error), kll_k=kll_k_for(quantile_error))
+    return StreamingProfile(exact=True)
+
+
+def update_state(df: pd.DataFrame, state: ProfileState = None, stats_mode: tuple = EXACT_STATS,
+                 partition_rows: int = DEFAULT_PARTITION_ROWS, progress=None):
+    """Profile ``df``, reusing the partitions ``state`` already has.
+
+    Returns (new state, merged StreamingProfile, partitions reused). The new
+    state only keeps the partitions of ``df``. ``progress`` optionally wraps
+    the partition iterator, e.g. ``lambda parts, total: stqdm(parts, total=total)``.
+    """
+    columns = column_signature(df)
+    if state is not None and not state.matches(stats_mode, partition_rows, columns):
+        state = None
+    new_state = ProfileState(stats_mode, partition_rows, columns)
+    profile = empty_profile(stats_mode)
+    reused = 0
+    starts = range(0, len(df), partition_rows)
+    if progress is not None:
+        starts = progress(starts, len(starts))
+    for start in starts:
+        part = df.iloc[start:start + partition_rows]
+        digest = partition_digest(part)
+        if digest in new_state.partitions:
+            part_profile = new_state.partitions[digest]
+        elif state is not None and digest in state.partitions:
+            part_profile = state.partitions[digest]
+            reused += 1
+        else:
+            part_profile = empty_profile(stats_mode).update(part)
+        new_state.digests.append(digest)
+        new_state.partitions[digest] = part_profile
+        profile.merge(part_profile)
+    # Reused partitions may have held a column as a categorical and it no
+    # longer is, or the other way round; report the dtype it has now
+    for col, accumulator in profile.columns.items():
+        accumulator.dtype = df[col].dtype
+    return new_state, profile, reused
+
+
+def state_path(directory: str, name: str) -> str:
+    """Where the state of dataset ``name`` lives in ``directory``."""
+    safe = re.sub(r'[^\w.-]+', '_', os.path.basename(name))
+    return os.path.join(directory, f'{safe}.profile-state')
+
+
+def load_state(path: str):
+    """The state saved at ``path``, or None if there is none or it can't
+    be read (e.g. written by another version)."""
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    return state if isinstance(state, ProfileState) else None
+
+
+def save_state(state: ProfileState, path: str):
+    # Written beside the target and renamed, so a crash never leaves a
+    # truncated state behind
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f'{path}.tmp{os.getpid()}'
+    with open(temporary, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def profile_incrementally(df: pd.DataFrame, path: str, stats_mode: tuple = EXACT_STATS,
+                          partition_rows: int = DEFAULT_PARTITION_ROWS, progress=None):
+    """Profile ``df`` against the state saved at ``path`` and save the new
+    state there. Returns the merged StreamingProfile and run statistics."""
+    start = time.perf_counter()
+    state, profile, reused = update_state(df, load_state(path), stats_mode, partition_rows, progress)
+    save_state(state, path)
+    return profile, {'partitions': len(state.digests), 'reused': reused,
+                     'seconds': time.perf_counter() - start}
@@ -0,0 +1,243 @@
+"""Background jobs for the app's slow sections (12 and 13, and the exact
+upgrade of the fast preview).
+
+A job runs one computation on a shared executor, so the script thread can
+finish the rest of the page and come back for the result on a later rerun.
+The computation gets the job's ``progress`` callback, with the same
+``progress(items, total)`` signature as the engine's, which counts the items
+handed out. The page reads the count to show how far along the job is; the
+worker thread never touches Streamlit itself. The computation runs in a
+span named after the job's label, recorded by the tracer that was current
+when it started (profiler.tracing).
+
+The executor's worker count is how many jobs the server runs at once; the
+rest wait in its queue. ``Job.cancel`` keeps a queued job from starting and
+stops a running one at its next block, where ``progress`` raises Cancelled.
+
+Block-by-block computations (duplicate clustering, cross-source matching)
+add each block's result to a Checkpoint. The page reads the results so far
+from it while the job runs. A checkpoint with a path is appended to that
+file every CHECKPOINT_SECONDS and when its job stops early, so the same
+computation started again (after a cancel, an error or a restart) skips the
+blocks already saved. A job's checkpoint file is removed once it succeeds,
+or by ``Job.cancel(discard=True)`` when nothing is going to resume it. ``sweep`` removes the files left by jobs that were never resumed.
+Only one checkpoint of a process writes a given file at a time; another
+one asking for it while that job runs is kept in memory only.
+"""
+import os
+import pickle
+import threading
+import time
+
+from profiler.tracing import in_context, span
+
+CHECKPOINT_SECONDS = 5
+# Checkpoint files untouched for this long are removed by sweep
+CHECKPOINT_MAX_AGE = 7 * 24 * 3600
+CHECKPOINT_SUFFIX = '.ckpt'
+
+_claimed_paths = set()
+_claimed_lock = threading.Lock()
+
+
+class Cancelled(Exception):
+    """Raised inside a job's computation once the job is cancelled."""
+
+
+class Checkpoint:
+    """The results of a computation's blocks so far, in block order, and
+    the number of blocks done; kept in ``path`` as well if given."""
+
+    def __init__(self, path: str = None):
+        if path is not None:
+            with _claimed_lock:
+                if path in _claimed_paths:
+                    path = None
+                else:
+                    _claimed_paths.add(path)
+        self.path = path
+        self.claimed = path is not None
+        self.blocks, self.parts = 0, []
+        self._unsaved, self._saved_at = [], time.monotonic()
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        # The file is a series of (blocks done, parts since the last record)
+        # pickles; a record cut short by a crash is dropped
+        with open(self.path, 'rb') as f:
+            while True:
+                end = f.tell()
+                try:
+                    blocks, parts = pickle.load(f)
+                except (EOFError, pickle.UnpicklingError):
+                    break
+                self.blocks = blocks
+                self.parts += parts
+        with open(self.path, 'r+b') as f:
+            f.truncate(end)
+
+    def add(self, part=None):
+        """Count one more block done, keeping its result ``part`` unless it
+        is None."""
+        with self._lock:
+            self.blocks += 1
+            if part is not None:
+                self.parts.append(part)
+                self._unsaved.append(part)
+        if self.path is not None and time.monotonic() - self._saved_at >= CHECKPOINT_SECONDS:
+            self.save()
+
+    def save(self):
+        """Append the blocks done since the last save to the file."""
+        if self.path is None:
+            return
+        with self._lock:
+            record, self._unsaved = (self.blocks, self._unsaved), []
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'ab') as f:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        self._saved_at = time.monotonic()
+
+    def results(self) -> list:
+        with self._lock:
+            return list(self.parts)
+
+    def remove(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def discard(self):
+        """Remove the file now, unless another checkpoint has claimed it
+        since this one was released."""
+        with _claimed_lock:
+            if self.path is not None and (self.claimed or self.path not in _claimed_paths):
+                self.remove()
+
+    def release(self):
+        """Let another checkpoint write this one's file."""
+        with _claimed_lock:
+            if self.claimed:
+                _claimed_paths.discard(self.path)
+                self.claimed = False
+
+
+class Job:
+    """One computation, the arguments it was started with (``key``) and how
+    far along it is."""
+
+    def __init__(self, key, label: str, checkpoint: Checkpoint = None):
+        self.key, self.label, self.checkpoint = key, label, checkpoint
+        self.completed, self.total = 0, None
+        self.started = None
+        self.future = None
+        self.discarded = False
+        self._cancelled = threading.Event()
+
+    def progress(self, items, total: int):
+        """Passes ``items`` through, counting them. A computation with
+        several phases calls it once per phase; each restarts the count."""
+        self.completed, self.total = 0, total
+        for item in items:
+            if self._cancelled.is_set():
+                raise Cancelled(self.label)
+            yield item
+            self.completed += 1
+
+    def cancel(self, discard: bool = False):
+        """Stop the job. With ``discard`` its checkpoint file is removed
+        instead of kept for resuming, whether the job is queued, running
+        (it removes the file again when it stops) or already over."""
+        self.discarded = discard
+        self._cancelled.set()
+        never_started = self.future.cancel()
+        if self.checkpoint is not None:
+            if discard:
+                self.checkpoint.discard()
+            # A job that never started never releases its checkpoint itself
+            if never_started:
+                self.checkpoint.release()
+
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def fraction(self) -> float:
+        if not self.total:
+            return 0.0
+        return min(self.completed / self.total, 1.0)
+
+    def queued(self) -> bool:
+        return self.started is None and not self.done()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def error(self):
+        if self.future.cancelled():
+            return Cancelled(self.label)
+        return self.future.exception() if self.future.done() else None
+
+    def result(self):
+        return self.future.result()
+
+    def elapsed(self) -> float:
+        """Seconds since the job left the queue."""
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+
+def _run(job: Job, function, *args):
+    job.started = time.monotonic()
+    try:
+        if job.cancelled():
+            raise Cancelled(job.label)
+        with span(job.label):
+            try:
+                result = function(*args, job.progress)
+            except BaseException:
+                if job.checkpoint is not None and not job.discarded:
+                    job.checkpoint.save()
+                raise
+        if job.checkpoint is not None:
+            job.checkpoint.remove()
+        return result
+    finally:
+        if job.checkpoint is not None:
+            if job.discarded:
+                job.checkpoint.remove()
+            job.checkpoint.release()
+
+
+def start(executor, key, label: str, function, *args, checkpoint: Checkpoint = None) -> Job:
+    """A Job running ``function(*args, progress)`` on ``executor``.
+    ``checkpoint``, which the computation is expected to be given in
+    ``args`` too, is saved if the job fails and removed once it succeeds."""
+    job = Job(key, label, checkpoint)
+    job.future = executor.submit(in_context(_run), job, function, *args)
+    return job
+
+
+def sweep(directory: str, max_age: float = CHECKPOINT_MAX_AGE) -> int:
+    """Remove the checkpoint files in ``directory`` not written for
+    ``max_age`` seconds, except those a running job holds. Returns how many
+    were removed."""
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in names:
+        path = os.path.join(directory, name)
+        if not name.endswith(CHECKPOINT_SUFFIX):
+            continue
+        with _claimed_lock:
+            if path in _claimed_paths:
+                continue
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+    return removed
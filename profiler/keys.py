@@ -0,0 +1,190 @@
+"""Composite primary key discovery (section 8 of app.py).
+
+A set of columns is a key when no two rows agree on all of them and none of
+them has nulls, i.e. a unique column combination (UCC). Only minimal keys
+are reported: ones that stop being unique when any column is left out.
+
+Combinations are checked on position list indexes (PLIs): the groups of rows
+that share a value, with single-row groups stripped since a unique row stays
+unique in every superset. Extending a PLI by a column only regroups the rows
+still in it, so PLIs shrink quickly as combinations grow.
+
+The lattice of combinations up to ``max_size`` columns is searched depth
+first on a row sample, with columns ordered by distinct count so prefixes
+are selective early. A combination isn't extended once it is unique, nor
+when the distinct counts of the columns that could still be added multiply
+to less than its largest group. Adding a column the combination already
+determines (one that splits none of its groups) never gives a minimal key
+and is skipped too.
+
+Keys of the sample are then verified on random subsets of growing size and
+finally the full table; each one that fails adds rows violating it to the
+sample, and the search reruns (as in HyUCC). Combinations that aren't
+unique on the sample aren't unique on the full table either, so once every
+minimal key of the sample verifies they are exactly the full table's
+minimal keys.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_KEY_SIZE = 3
+DEFAULT_KEY_SAMPLE_SIZE = 20_000
+# Duplicate groups of a failed key whose rows join the sample, two rows each
+VIOLATION_GROUPS = 8
+# Each verification subset is this many times larger than the last
+VERIFY_GROWTH = 4
+# Odd 64-bit constants for strip's hash filter
+HASH_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+
+
+def strip(rows: np.ndarray, labels: np.ndarray, size: int) -> tuple:
+    """The PLI of ``rows`` grouped by ``labels`` (all below ``size``): the
+    rows in groups of two or more, their dense group labels, the number of
+    groups and the size of the largest one."""
+    if size > max(4 * len(rows), 1 << 16):
+        # Too many labels to count directly. Rows alone in a bucket of a
+        # multiplicative hash can't share a label, so most are dropped
+        # before the exact (and much slower) factorize.
+        for multiplier in HASH_MULTIPLIERS:
+            bits = np.uint64(max(len(rows).bit_length() + 1, 16))
+            buckets = ((labels.astype(np.uint64) * np.uint64(multiplier))
+                       >> (np.uint64(64) - bits)).astype(np.intp)
+            crowded = np.bincount(buckets, minlength=1 << int(bits))[buckets] > 1
+            rows, labels = rows[crowded], labels[crowded]
+        labels, uniques = pd.factorize(labels)
+        size = len(uniques)
+    counts = np.bincount(labels, minlength=size)
+    repeated = counts > 1
+    keep = repeated[labels]
+    dense = np.cumsum(repeated) - 1
+    return rows[keep], dense[labels[keep]], int(repeated.sum()), int(counts.max(initial=0))
+
+
+def column_pli(codes: np.ndarray, cardinality: int) -> tuple:
+    return strip(np.arange(len(codes)), codes, cardinality)
+
+
+def intersect(pli: tuple, codes: np.ndarray, cardinality: int) -> tuple:
+    """``pli`` refined by a column's codes (indexed by row)."""
+    rows, labels, groups, _ = pli
+    return strip(rows, labels * cardinality + codes[rows], groups * cardinality)
+
+
+def column_codes(series: pd.Series) -> tuple:
+    """Integer codes of a column and its number of distinct values. Nulls
+    are coded like one more value."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    return codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0))), len(uniques)
+
+
+def sample_keys(codes: list, max_size: int) -> list:
+    """Minimal UCCs (as tuples of positions in ``codes``) of columns given
+    as (codes, cardinality) pairs, searched depth first."""
+    found = []
+    cardinalities = [cardinality for _, cardinality in codes]
+
+    def visit(combination, pli):
+        remaining = max_size - len(combination)
+        for column in range(combination[-1] + 1, len(codes)):
+            # Even the most distinct columns left can't split the largest
+            # group into single rows, and later columns have fewer values
+            if np.prod(cardinalities[column:column + remaining], dtype=float) < pli[3]:
+                break
+            extended = combination + (column,)
+            child = intersect(pli, *codes[column])
+            # The column is determined by the combination, so adding it
+            # never makes a minimal key
+            if len(child[0]) == len(pli[0]) and child[2] == pli[2]:
+                continue
+            if not len(child[0]):
+                found.append(extended)
+            elif len(extended) < max_size:
+                visit(extended, child)
+
+    for column, (column_codes_, cardinality) in enumerate(codes):
+        pli = column_pli(column_codes_, cardinality)
+        if not len(pli[0]):
+            found.append((column,))
+        elif max_size > 1:
+            visit((column,), pli)
+
+    minimal = []
+    for key in sorted(found, key=len):
+        if not any(set(smaller) <= set(key) for smaller in minimal):
+            minimal.append(key)
+    return minimal
+
+
+def violating_rows(key: tuple, codes: dict, chain: list) -> np.ndarray:
+    """Rows repeating a value of ``key`` on the full table, two from each
+    of VIOLATION_GROUPS duplicate groups; empty if ``key`` is unique.
+
+    ``codes`` holds the full table's column codes. ``chain`` holds the PLIs
+    of the last key's prefixes, so keys checked in sorted order share the
+    work on their common prefix.
+    """
+    shared = 0
+    while shared < min(len(chain), len(key) - 1) and chain[shared][0] == key[shared]:
+        shared += 1
+    del chain[shared:]
+    for col in key[shared:]:
+        pli = intersect(chain[-1][1], *codes[col]) if chain else column_pli(*codes[col])
+        chain.append((col, pli))
+    rows, labels = chain[-1][1][:2]
+    groups = labels < VIOLATION_GROUPS
+    return pd.Series(rows[groups]).groupby(labels[groups]).head(2).to_numpy()
+
+
+def verification_order(key: tuple, codes: dict) -> tuple:
+    """``key``'s most distinct column first, as its PLI is smallest, then
+    the others least distinct first, so label spaces stay small enough to
+    count directly until the last step."""
+    ordered = sorted(key, key=lambda col: codes[col][1])
+    return (ordered[-1], *ordered[:-1])
+
+
+def unique_column_combinations(df: pd.DataFrame, max_size: int = DEFAULT_MAX_KEY_SIZE,
+                               sample_size: int = DEFAULT_KEY_SAMPLE_SIZE,
+                               seed: int = 0) -> list:
+    """All minimal keys of ``df`` of up to ``max_size`` columns, as tuples
+    of column names in table order, smallest first."""
+    columns = [col for col in df.columns if not df[col].isna().any()]
+    if not len(df) or not columns:
+        return []
+    position = {col: i for i, col in enumerate(df.columns)}
+    shuffled = np.random.default_rng(seed).permutation(len(df))
+    sample = np.sort(shuffled[:sample_size])
+    # Keys are checked on ever larger random subsets before the full table,
+    # where most keys that only hold on the sample fail much more cheaply
+    subsets = [np.sort(shuffled[:size]) for size in
+               sample_size * VERIFY_GROWTH ** np.arange(1, 8) if size < len(df)]
+    codes, verified = {}, set()
+    while True:
+        part = df.iloc[sample]
+        factorized = {col: column_codes(part[col]) for col in columns}
+        order = sorted(columns, key=lambda col: -factorized[col][1])
+        keys = [tuple(sorted((order[i] for i in key), key=position.get))
+                for key in sample_keys([factorized[col] for col in order], max_size)]
+        unverified = [key for key in keys
+                      if len(sample) < len(df) and frozenset(key) not in verified]
+        needed = {col for key in unverified for col in key}
+        for col in needed - set(codes):
+            codes[col] = column_codes(df[col])
+        # Sorted so that keys share prefixes
+        unverified = sorted(verification_order(key, codes) for key in unverified)
+        violations = []
+        for subset in [*subsets, None]:
+            chain, passed = [], []
+            subset_codes = codes if subset is None else {
+                col: (codes[col][0][subset], codes[col][1]) for col in needed}
+            for key in unverified:
+                rows = violating_rows(key, subset_codes, chain)
+                if len(rows):
+                    violations.append(rows if subset is None else subset[rows])
+                else:
+                    passed.append(key)
+            unverified = passed
+        verified.update(map(frozenset, unverified))
+        if not violations:
+            return sorted(keys, key=lambda key: (len(key), [position[col] for col in key]))
+        sample = np.union1d(sample, np.concatenate(violations))
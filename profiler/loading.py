@@ -0,0 +1,149 @@
+"""Arrow-backed dataset loading.
+
+CSVs are parsed by pyarrow's multithreaded reader straight into
+pyarrow-backed columns (``string[pyarrow]``, ``int64[pyarrow]``,
+``timestamp[ns][pyarrow]``, ...). Strings then live in one contiguous Arrow
+buffer per column instead of one Python object per cell. String columns
+with few distinct values are converted to categoricals, which store each
+distinct value once.
+
+Parquet, Feather and Arrow IPC files are read with column projection, so
+only the requested columns are decoded. Files on the server's disk are
+memory-mapped; an uncompressed Feather/IPC file then loads without copying
+or parsing anything. Uploads are read from the bytes already in memory.
+"""
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from profiler.tracing import span
+from profiler.values import hash_counts
+
+# A string column becomes categorical when it has at most this many
+# distinct values per row, and at most CATEGORY_MAX_DISTINCT in all: a
+# dictionary that small pays for itself, and columns of mostly unique
+# values (emails, names) stay strings. Columns already past either limit in
+# their first CATEGORY_CHECK_ROWS rows are skipped without counting the
+# rest; that only decides how a column is stored, never what the sections
+# report.
+CATEGORY_MAX_RATIO = 0.05
+CATEGORY_MAX_DISTINCT = 10_000
+CATEGORY_CHECK_ROWS = 10_000
+
+FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'arrow',
+    '.arrow': 'arrow',
+    '.ipc': 'arrow',
+    '.xlsx': 'excel',
+}
+UPLOAD_TYPES = [extension[1:] for extension in FORMATS]
+
+
+def categorize(df: pd.DataFrame, max_ratio: float = CATEGORY_MAX_RATIO,
+               max_distinct: int = CATEGORY_MAX_DISTINCT) -> pd.DataFrame:
+    """``df`` with its low-cardinality string columns as categoricals."""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if not pd.api.types.is_string_dtype(series.dtype) or not len(series):
+            continue
+        head = series.iloc[:CATEGORY_CHECK_ROWS]
+        if head.nunique() > min(max_ratio * len(head), max_distinct):
+            continue
+        # The one hash count both decides and builds the categorical
+        codes, values, _ = hash_counts(series, sort=True)
+        if len(values) <= min(max_ratio * len(series), max_distinct):
+            categorical = pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(values))
+            columns[col] = pd.Series(categorical, index=series.index, name=col)
+    return df.assign(**columns) if columns else df
+
+
+def read_csv(source, categories: bool = True, **read_csv_kwargs) -> pd.DataFrame:
+    """Read a CSV with pyarrow into Arrow-backed (and categorical) columns."""
+    df = pd.read_csv(source, engine='pyarrow', dtype_backend='pyarrow', **read_csv_kwargs)
+    return categorize(df) if categories else df
+
+
+def file_format(name: str) -> str:
+    """'csv', 'parquet', 'arrow' or 'excel', from the file name."""
+    extension = os.path.splitext(name)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported file type {extension or name!r}; "
+                         f"expected one of {', '.join(FORMATS)}")
+    return FORMATS[extension]
+
+
+def _is_path(source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def _open(source):
+    # Paths are memory-mapped; uploads are wrapped without a copy
+    if _is_path(source):
+        return pa.memory_map(os.fspath(source))
+    return pa.BufferReader(source.getbuffer())
+
+
+def _ipc_reader(source):
+    # .arrow files come in both the IPC file (Feather V2) and stream formats
+    try:
+        return pa.ipc.open_file(_open(source))
+    except pa.ArrowInvalid:
+        return pa.ipc.open_stream(_open(source))
+
+
+def _pandas_type(arrow_type):
+    # Dictionary columns become pandas categoricals, everything else stays
+    # Arrow-backed
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def table_columns(source, name: str) -> list:
+    """Column names of a file, read from its header or schema only."""
+    kind = file_format(name)
+    if kind == 'parquet':
+        return pq.read_schema(_open(source)).names
+    if kind == 'arrow':
+        return _ipc_reader(source).schema.names
+    if not _is_path(source):
+        source.seek(0)
+    if kind == 'csv':
+        return list(pd.read_csv(source, nrows=0).columns)
+    return list(pd.read_excel(source, nrows=0).columns)
+
+
+def read_table(source, name: str, columns=None, categories: bool = True) -> pd.DataFrame:
+    """Load a CSV, Parquet, Feather/Arrow IPC or xlsx file (path or upload)
+    into Arrow-backed columns, reading only ``columns`` if given."""
+    with span("load", format=file_format(name)) as current:
+        df = _read_table(source, name, columns, categories)
+        current.count(rows=len(df), columns=df.shape[1])
+    return df
+
+
+def _read_table(source, name: str, columns, categories: bool) -> pd.DataFrame:
+    kind = file_format(name)
+    columns = list(columns) if columns else None
+    if kind == 'parquet':
+        table = pq.read_table(_open(source), columns=columns)
+    elif kind == 'arrow':
+        try:
+            table = feather.read_table(_open(source), columns=columns, memory_map=_is_path(source))
+        except pa.ArrowInvalid:
+            table = _ipc_reader(source).read_all()
+            table = table.select(columns) if columns else table
+    else:
+        if not _is_path(source):
+            source.seek(0)
+        if kind == 'csv':
+            return read_csv(source, categories, usecols=columns)
+        df = pd.read_excel(source, usecols=columns, dtype_backend='pyarrow')
+        return categorize(df) if categories else df
+    df = table.to_pandas(types_mapper=_pandas_type)
+    return categorize(df) if categories else df
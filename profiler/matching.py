@@ -0,0 +1,233 @@
+"""Blocked, vectorized cross-source matching (section 13 of app.py).
+
+Blocks of rows are scored as matrices with ``process.cdist``; explicit
+candidate pairs from profiler.blocking are scored element-wise with
+``process.cpdist``. Both give the scores the old per-pair loop did.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import process
+from rapidfuzz.distance import Indel
+
+from profiler.blocking import BlockingPass, block_groups
+from profiler.jobs import Checkpoint
+from profiler.profiling import text_values
+from profiler.tracing import span
+
+# Same character handling as fuzzywuzzy's token_sort_ratio: drop latin-1
+# extras (force_ascii), replace non-word characters with spaces, lower, strip.
+_NON_ASCII = dict((i, None) for i in range(128, 256))
+_NON_WORD = re.compile(r"(?ui)\W")
+
+DEFAULT_BLOCK_SIZE = 2048
+
+
+def _token_sort_key(value: str) -> str:
+    value = _NON_WORD.sub(" ", value.translate(_NON_ASCII)).lower().strip()
+    return " ".join(sorted(value.split()))
+
+
+def normalize_column(series: pd.Series) -> np.ndarray:
+    # The old compute_similarity did str(value).strip().lower() per pair
+    # before fuzzywuzzy's own processing; do both once per column instead.
+    values = pd.Series(text_values(series)).str.strip().str.lower()
+    return np.array([_token_sort_key(v) for v in values], dtype=object)
+
+
+def column_cutoffs(weights: dict, threshold: float) -> dict:
+    # A pair can only reach the weighted threshold if every column scores at
+    # least this much, assuming all other columns score a perfect 100.
+    total = sum(weights.values())
+    return {col: max(0.0, 100 - (100 - threshold) * total / w)
+            for col, w in weights.items()}
+
+
+def _lengths(values: np.ndarray) -> np.ndarray:
+    return np.fromiter((len(v) for v in values), dtype=np.int64, count=len(values))
+
+
+def _cutoff(len_left: np.ndarray, len_right: np.ndarray, min_score: float) -> int:
+    max_lensum = (len_left.max(initial=0) + len_right.max(initial=0))
+    return int(max_lensum * (100 - min_score + 0.5) / 100)
+
+
+def _ratios(d: np.ndarray, len_left: np.ndarray, len_right: np.ndarray) -> np.ndarray:
+    # Integer token_sort_ratio, computed exactly as fuzzywuzzy with
+    # python-Levenshtein does: round(100 * (lensum - indel) / lensum).
+    lensum = len_left + len_right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.rint(100 * ((lensum - d) / lensum))
+    # Empty vs. non-empty scores 0, identical strings (including two empty
+    # ones) score 100.
+    ratio[(len_left == 0) | (len_right == 0)] = 0
+    ratio[d == 0] = 100
+    return ratio
+
+
+def _column_scores(left: np.ndarray, right: np.ndarray, min_score: float,
+                   workers: int) -> np.ndarray:
+    # token_sort_ratio matrix of left against right
+    len_left, len_right = _lengths(left), _lengths(right)
+    cutoff = _cutoff(len_left, len_right, min_score)
+    dist = process.cdist(left, right, scorer=Indel.distance, dtype=np.int32,
+                         score_cutoff=cutoff, workers=workers)
+
+    # Anything past the cutoff can't reach min_score, so only the surviving
+    # cells are converted to ratios.
+    scores = np.zeros(dist.shape, dtype=np.int64)
+    rows, cols = np.nonzero(dist <= cutoff)
+    scores[rows, cols] = _ratios(dist[rows, cols], len_left[rows], len_right[cols])
+    return scores
+
+
+def _pair_scores(left: np.ndarray, right: np.ndarray, min_score: float,
+                 workers: int) -> np.ndarray:
+    # token_sort_ratio of left[k] against right[k]
+    len_left, len_right = _lengths(left), _lengths(right)
+    cutoff = _cutoff(len_left, len_right, min_score)
+    dist = process.cpdist(left, right, scorer=Indel.distance, dtype=np.int32,
+                          score_cutoff=cutoff, workers=workers)
+    scores = np.zeros(len(dist), dtype=np.int64)
+    near = np.flatnonzero(dist <= cutoff)
+    scores[near] = _ratios(dist[near], len_left[near], len_right[near])
+    return scores
+
+
+def _keep_scores(weighted: np.ndarray, total_weight: float, threshold: float):
+    # Keep everything that could round up to the threshold, then round the
+    # survivors with Python's round() so scores match compute_similarity.
+    found = np.nonzero(weighted >= (threshold - 0.01) * total_weight)
+    scores = np.array([round(t / total_weight, 2) for t in weighted[found].tolist()],
+                      dtype=np.float64)
+    keep = scores >= threshold
+    return tuple(positions[keep] for positions in found), scores[keep]
+
+
+def score_block(left: dict, right: dict, weights: dict, threshold: float,
+                workers: int = -1):
+    """Return (left_pos, right_pos, score) for pairs scoring >= threshold."""
+    cutoffs = column_cutoffs(weights, threshold)
+    weighted = None
+    for col, w in weights.items():
+        col_scores = _column_scores(left[col], right[col], cutoffs[col], workers)
+        weighted = col_scores * w if weighted is None else weighted + col_scores * w
+    (rows, cols), scores = _keep_scores(weighted, sum(weights.values()), threshold)
+    return rows, cols, scores
+
+
+def score_candidates(left: dict, right: dict, weights: dict, threshold: float,
+                     workers: int = -1):
+    """Return (pair_pos, score) for the aligned pairs scoring >= threshold."""
+    cutoffs = column_cutoffs(weights, threshold)
+    weighted = None
+    for col, w in weights.items():
+        col_scores = _pair_scores(left[col], right[col], cutoffs[col], workers)
+        weighted = col_scores * w if weighted is None else weighted + col_scores * w
+    (pairs,), scores = _keep_scores(weighted, sum(weights.values()), threshold)
+    return pairs, scores
+
+
+def iter_blocks(blocks: tuple, block_size: int = DEFAULT_BLOCK_SIZE):
+    """Yield (positions1, positions2) pairs of row positions to compare,
+    for the block ids of both frames' rows."""
+    groups1, groups2 = block_groups(blocks[0]), block_groups(blocks[1])
+    for key, pos1 in groups1.items():
+        pos2 = groups2.get(key)
+        if pos2 is None:
+            continue
+        for start1 in range(0, len(pos1), block_size):
+            for start2 in range(0, len(pos2), block_size):
+                yield pos1[start1:start1 + block_size], pos2[start2:start2 + block_size]
+
+
+def count_blocks(blocks: tuple, block_size: int = DEFAULT_BLOCK_SIZE) -> int:
+    sizes1 = np.bincount(blocks[0][blocks[0] >= 0])
+    sizes2 = np.bincount(blocks[1][blocks[1] >= 0], minlength=len(sizes1))[:len(sizes1)]
+    return int((np.ceil(sizes1 / block_size) * np.ceil(sizes2 / block_size)).sum())
+
+
+def iter_candidates(candidates: tuple, chunk_size: int = DEFAULT_BLOCK_SIZE ** 2):
+    """Yield (positions1, positions2) chunks of aligned candidate pairs."""
+    for start in range(0, len(candidates[0]), chunk_size):
+        yield candidates[0][start:start + chunk_size], candidates[1][start:start + chunk_size]
+
+
+def match_frames(df1: pd.DataFrame, df2: pd.DataFrame, match_columns: list,
+                 weights: dict, threshold: float, block_col=None, blocks: tuple = None,
+                 candidates: tuple = None, block_size: int = DEFAULT_BLOCK_SIZE,
+                 workers: int = -1, progress=None, checkpoint: Checkpoint = None) -> pd.DataFrame:
+    """Weighted token_sort_ratio matching of df1 against df2.
+
+    Rows are compared within equal ``block_col`` values, within equal
+    ``blocks`` ids (one array per frame, -1 for no block), or only as the
+    ``candidates`` pairs of row positions; by default every pair is.
+
+    Returns one row per pair scoring >= threshold with the same columns the
+    old iterrows loop produced (DF1_Index, DF2_Index, Score, <col>_1, <col>_2),
+    sorted by Score descending. ``progress`` optionally wraps the block
+    iterator, e.g. ``lambda blocks, total: stqdm(blocks, total=total)``.
+    Each block's matches go to ``checkpoint`` (profiler.jobs) as
+    (df1 positions, df2 positions, scores); blocks it already holds are
+    skipped.
+    """
+    weights = {col: weights[col] for col in match_columns}
+    if not weights or sum(weights.values()) == 0:
+        return pd.DataFrame()
+
+    with span("normalizing", rows=len(df1) + len(df2), columns=len(match_columns)):
+        norm1 = {col: normalize_column(df1[col]) for col in match_columns}
+        norm2 = {col: normalize_column(df2[col]) for col in match_columns}
+
+    if candidates is not None:
+        chunks = iter_candidates(candidates)
+        total = -(-len(candidates[0]) // DEFAULT_BLOCK_SIZE ** 2)
+    else:
+        if blocks is None:
+            blocks = (BlockingPass('exact', block_col).block_keys(df1, df2) if block_col
+                      else (np.zeros(len(df1), dtype=np.int64), np.zeros(len(df2), dtype=np.int64)))
+        chunks = iter_blocks(blocks, block_size)
+        total = count_blocks(blocks, block_size)
+    if progress is not None:
+        chunks = progress(chunks, total)
+
+    checkpoint = Checkpoint() if checkpoint is None else checkpoint
+    done = checkpoint.blocks
+    with span("scoring", blocks=total, resumed=done) as current:
+        compared = 0
+        for block, (pos1, pos2) in enumerate(chunks):
+            if block < done:
+                continue
+            left = {col: values[pos1] for col, values in norm1.items()}
+            right = {col: values[pos2] for col, values in norm2.items()}
+            if candidates is not None:
+                pairs, scores = score_candidates(left, right, weights, threshold, workers)
+                rows = cols = pairs
+                compared += len(pos1)
+            else:
+                rows, cols, scores = score_block(left, right, weights, threshold, workers)
+                compared += len(pos1) * len(pos2)
+            checkpoint.add((pos1[rows], pos2[cols], scores) if len(scores) else None)
+        parts = checkpoint.results()
+        current.count(pairs=compared, matches=sum(len(part[2]) for part in parts))
+    return match_table(df1, df2, match_columns, parts)
+
+
+def match_table(df1: pd.DataFrame, df2: pd.DataFrame, match_columns: list,
+                parts: list) -> pd.DataFrame:
+    """The matched pairs of ``parts`` ((df1 positions, df2 positions,
+    scores) per block) as match_frames returns them; also what the app
+    shows of a matching job that is still running."""
+    if not parts:
+        return pd.DataFrame()
+    pos1 = np.concatenate([part[0] for part in parts])
+    pos2 = np.concatenate([part[1] for part in parts])
+    results = {
+        "DF1_Index": df1.index.to_numpy()[pos1],
+        "DF2_Index": df2.index.to_numpy()[pos2],
+        "Score": np.concatenate([part[2] for part in parts]),
+    }
+    results.update({f"{col}_1": df1[col].to_numpy()[pos1] for col in match_columns})
+    results.update({f"{col}_2": df2[col].to_numpy()[pos2] for col in match_columns})
+    return pd.DataFrame(results).sort_values(by="Score", ascending=False)
@@ -0,0 +1,230 @@
+"""Column-parallel execution of the per-column section computations.
+
+``map_columns`` splits a frame's columns into contiguous groups and runs a
+function on each group in a process pool. Each group's function sees an
+ordinary DataFrame holding just its columns. The results are combined in
+column order, so the output is the same as calling the function on the
+whole frame; with one worker, or for small frames, it is exactly that call.
+The pools are kept between calls. One broken by a dead worker is replaced,
+and its tasks are run again once.
+
+Columns are not pickled per task. They are written once to a shared memory
+block as an Arrow IPC file. Each worker maps the block and reads only its
+own columns, so numeric, datetime and Arrow-backed columns come back
+without a copy. Columns Arrow can't round-trip exactly (mixed-type objects,
+categoricals and other extension dtypes) are pickled instead.
+"""
+import contextlib
+import gc
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Below this many cells, starting tasks costs more than it saves
+MIN_PARALLEL_CELLS = 1_000_000
+
+_ARROW_DTYPES = {np.dtype(t) for t in (
+    'int8', 'int16', 'int32', 'int64', 'uint8', 'uint16', 'uint32', 'uint64',
+    'float32', 'float64', 'bool', 'datetime64[ns]')}
+
+_pools = {}
+_pools_lock = threading.Lock()
+_main_lock = threading.Lock()
+
+
+def _null_kind(series: pd.Series):
+    # Arrow turns every null into None on the way back; remember whether
+    # the column's nulls were NaN so astype(str) still gives "nan"
+    nulls = series[series.isna()]
+    if not len(nulls):
+        return 'none'
+    if all(value is None for value in nulls):
+        return 'none'
+    if all(isinstance(value, float) for value in nulls):
+        return 'nan'
+    return None
+
+
+def _arrow_nulls(series: pd.Series):
+    """How ``series`` travels through Arrow: None if it must be pickled,
+    'arrow' if it is Arrow-backed already, otherwise the kind of null to
+    restore ('none' or 'nan')."""
+    if isinstance(series.dtype, pd.ArrowDtype):
+        return 'arrow'
+    if series.dtype in _ARROW_DTYPES:
+        return 'none'
+    if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+        return _null_kind(series)
+    return None
+
+
+class SharedFrame:
+    """A DataFrame's columns written once to shared memory for the workers."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.names = list(df.columns)
+        self.nan_nulls = set()
+        self.arrow_backed = set()
+        self.pickled = {}
+        arrays, fields = [], []
+        for position in range(df.shape[1]):
+            series = df.iloc[:, position]
+            nulls = _arrow_nulls(series)
+            if nulls is None:
+                self.pickled[position] = series.reset_index(drop=True)
+                continue
+            if nulls == 'nan':
+                self.nan_nulls.add(position)
+            if nulls == 'arrow':
+                self.arrow_backed.add(position)
+            arrays.append(pa.Array.from_pandas(series))
+            fields.append(str(position))
+        table = pa.table(arrays, names=fields)
+
+        sink = pa.MockOutputStream()
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        self.size = sink.size()
+        self.shm = shared_memory.SharedMemory(create=True, size=max(self.size, 1))
+        buffer = pa.py_buffer(self.shm.buf)
+        with pa.ipc.new_file(pa.FixedSizeBufferWriter(buffer), table.schema) as writer:
+            writer.write_table(table)
+        del buffer
+
+    def task(self, positions: list) -> tuple:
+        """What a worker needs to rebuild the columns at ``positions``."""
+        return (self.shm.name, self.size, positions, [self.names[p] for p in positions],
+                [p for p in positions if p in self.nan_nulls],
+                [p for p in positions if p in self.arrow_backed],
+                {p: self.pickled[p] for p in positions if p in self.pickled})
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _run_group(func, task: tuple, kwargs: dict):
+    shm_name, size, positions, names, nan_nulls, arrow_backed, pickled = task
+    # Workers share the parent's resource tracker, so attaching doesn't
+    # make them owners of the block
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        table = pa.ipc.open_file(pa.py_buffer(shm.buf)[:size]).read_all()
+        columns = []
+        for position in positions:
+            if position in pickled:
+                columns.append(pickled[position])
+                continue
+            if position in arrow_backed:
+                columns.append(table.column(str(position)).to_pandas(types_mapper=pd.ArrowDtype))
+                continue
+            series = table.column(str(position)).to_pandas()
+            if position in nan_nulls:
+                series = series.where(series.notna(), np.nan)
+            columns.append(series)
+        frame = pd.concat(columns, axis=1)
+        frame.columns = pd.Index(names, dtype=object)
+        del table, columns
+        return func(frame, **kwargs)
+    finally:
+        frame = series = None
+        gc.collect()
+        try:
+            shm.close()
+        except BufferError:
+            # A view into the block is still alive; the mapping goes away
+            # with the worker instead
+            pass
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """A process pool per worker count, kept for the life of the process
+    or until a worker dies (see drop_pool)."""
+    # The script thread and background jobs ask at the same time
+    with _pools_lock:
+        if workers not in _pools:
+            # fork is unsafe from a threaded server like Streamlit's
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() \
+                else 'spawn'
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(method))
+        return _pools[workers]
+
+
+def drop_pool(workers: int, pool: ProcessPoolExecutor):
+    """Forget ``pool``, broken by a dead worker (e.g. killed for running
+    out of memory), so the next get_pool starts a fresh one."""
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@contextlib.contextmanager
+def _without_main():
+    # New workers re-import the parent's __main__ before running anything.
+    # Under Streamlit that is the app script itself, so hide it while tasks
+    # are submitted (the only time the pool starts workers).
+    with _main_lock:
+        main = sys.modules['__main__']
+        sys.modules['__main__'] = types.ModuleType('__main__')
+        try:
+            yield
+        finally:
+            sys.modules['__main__'] = main
+
+
+def _combine(results: list):
+    first = results[0]
+    if isinstance(first, list):
+        return [item for result in results for item in result]
+    if isinstance(first, dict):
+        return {key: value for result in results for key, value in result.items()}
+    if isinstance(first, pd.Series):
+        return pd.concat(results)
+    raise TypeError(f"Cannot combine results of type {type(first).__name__}")
+
+
+def map_columns(func, df: pd.DataFrame, workers: int = DEFAULT_WORKERS, **kwargs):
+    """``func(df, **kwargs)``, computed over groups of columns in parallel.
+
+    ``func`` must be a module-level function whose result for a frame is the
+    concatenation of its results for the frame's columns: a list with one
+    entry per column, a dict keyed by column, or a Series indexed by column.
+    """
+    workers = max(1, min(workers, df.shape[1]))
+    if workers == 1 or df.size < MIN_PARALLEL_CELLS:
+        return func(df, **kwargs)
+    # A few groups per worker keeps them busy when columns differ in cost
+    groups = [group.tolist() for group in np.array_split(np.arange(df.shape[1]), workers * 4)
+              if len(group)]
+    with SharedFrame(df) as shared:
+        # A pool whose worker died fails every task; run them once more on
+        # a fresh pool before giving up
+        for attempt in range(2):
+            pool = get_pool(workers)
+            try:
+                with _without_main():
+                    futures = [pool.submit(_run_group, func, shared.task(group), kwargs)
+                               for group in groups]
+                return _combine([future.result() for future in futures])
+            except BrokenProcessPool:
+                drop_pool(workers, pool)
+                if attempt:
+                    raise
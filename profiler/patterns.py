@@ -0,0 +1,186 @@
+"""Pattern analysis (section 3 of app.py) and the pattern checks sections 6
+and 7 reuse.
+
+Each column is converted to strings once and every pattern is checked in a
+single pass with one precompiled regex. The email, phone and numeric
+patterns can never match the same string (only emails contain "@", only
+phones start with "+"), so they fit in one alternation. A numeric match
+with exactly ten characters and no fraction is also what section 7's
+``\\d{10}`` phone check looks for. Numeric, bool and datetime columns
+don't need the strings at all, because their ``str()`` form is known.
+
+Date detection infers one format from the first non-null value, the same
+way ``pd.to_datetime`` does, and parses an evenly spaced sample of the
+column with it.
+
+``pattern_hits`` returns raw match counts rather than percentages so that
+results for separate chunks of a column can be added up.
+"""
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from profiler.profiling import is_datetime_column, is_text_column, text_values
+
+EMAIL_PATTERN = r"[^@]+@[^@]+\.[^@]+"
+PHONE_PATTERN = r"^\+\d{1,3}\s?\d{9,}$"
+PHONE_DIGITS_PATTERN = r"\d{10}"
+NUMERIC_PATTERN = r"^\d+(\.\d+)?$"
+
+# The three fullmatch patterns above as one alternation (anchors dropped,
+# fullmatch supplies them)
+_COMBINED = re.compile(
+    r"(?P<email>[^@]+@[^@]+\.[^@]+)"
+    r"|(?P<phone>\+\d{1,3}\s?\d{9,})"
+    r"|(?P<numeric>\d+(?P<fraction>\.\d+)?)")
+
+DATE_SAMPLE_SIZE = 2000
+
+HIT_FIELDS = ['rows', 'nulls', 'email', 'phone', 'phone_digits', 'date', 'numeric',
+              'alphanumeric', 'alnum_with_nulls']
+
+
+def _string_hits(strings: np.ndarray, not_null: np.ndarray, check_alnum: bool) -> dict:
+    match = _COMBINED.fullmatch
+    email = phone = numeric = phone_digits = alphanumeric = alnum_with_nulls = 0
+    for value, present in zip(strings, not_null):
+        found = match(value)
+        if found is not None:
+            kind = found.lastgroup
+            if kind == 'email':
+                email += 1
+            elif kind == 'phone':
+                phone += 1
+            else:
+                numeric += 1
+                if len(value) == 10 and found.group('fraction') is None:
+                    phone_digits += 1
+        # Section 7 counts "nan" as alphanumeric; section 3 drops nulls first
+        if check_alnum and value.isalnum():
+            alnum_with_nulls += 1
+            alphanumeric += present
+    return {'email': email, 'phone': phone, 'numeric': numeric,
+            'phone_digits': phone_digits, 'alphanumeric': int(alphanumeric),
+            'alnum_with_nulls': alnum_with_nulls}
+
+
+def _number_hits(values: np.ndarray) -> dict:
+    # str() of a number never contains "@" or "+", so only the numeric
+    # pattern can match: non-negative integers, and non-negative floats
+    # that repr prints without an exponent (1e-4 <= x < 1e16, or 0.0).
+    if values.dtype.kind in 'iu':
+        numeric = values >= 0
+        phone_digits = int(((values >= 10**9) & (values < 10**10)).sum())
+    else:
+        numeric = np.isfinite(values) & ~np.signbit(values) & (
+            (values == 0) | ((values >= 1e-4) & (values < 1e16)))
+        phone_digits = 0  # floats always print with a fraction or exponent
+    return {'email': 0, 'phone': 0, 'numeric': int(numeric.sum()),
+            'phone_digits': phone_digits, 'alphanumeric': 0, 'alnum_with_nulls': 0}
+
+
+def _sample(values: pd.Series, size: int) -> np.ndarray:
+    # Only the sampled values are converted, not the whole column
+    if len(values) <= size:
+        return values.to_numpy()
+    return values.iloc[np.linspace(0, len(values) - 1, size).astype(np.intp)].to_numpy()
+
+
+def date_hits(series: pd.Series, sample_size: int = DATE_SAMPLE_SIZE) -> int:
+    """Estimated number of values ``pd.to_datetime(errors='coerce')`` parses."""
+    values = series.dropna()
+    if not len(values):
+        return 0
+    sample = pd.Series(_sample(values, sample_size))
+    first = sample[0]
+    date_format = guess_datetime_format(first) if isinstance(first, str) else None
+    with warnings.catch_warnings():
+        # Without a format pandas falls back to dateutil, which warns about
+        # the format and about strings like "5H1MY" it reads as timezones
+        warnings.simplefilter("ignore", UserWarning)
+        warnings.simplefilter("ignore", FutureWarning)
+        parsed = pd.to_datetime(sample, format=date_format, errors='coerce')
+    parsed_share = parsed.notna().mean()
+    return len(values) if parsed_share == 1 else int(round(parsed_share * len(values)))
+
+
+def pattern_hits(series: pd.Series, date_sample_size: int = DATE_SAMPLE_SIZE) -> dict:
+    not_null = series.notna().to_numpy()
+    text = is_text_column(series.dtype)
+    datetime = is_datetime_column(series.dtype)
+    kind = series.dtype.kind
+    if text:
+        hits = _string_hits(text_values(series), not_null, check_alnum=True)
+    elif kind in 'iuf':
+        hits = _number_hits(series.dropna().to_numpy())
+    elif kind in 'bmM' or datetime:
+        # "True"/"False" and timestamps match none of the patterns
+        hits = _number_hits(np.empty(0, dtype=np.int64))
+    else:
+        hits = _string_hits(text_values(series), not_null, check_alnum=False)
+
+    hits['rows'] = len(series)
+    hits['nulls'] = int(len(series) - not_null.sum())
+    if not text:
+        # Section 7 only checks consistency of text columns
+        hits['alnum_with_nulls'] = len(series)
+    hits['date'] = date_hits(series, date_sample_size) \
+        if text or datetime else 0
+    return hits
+
+
+def add_hits(left: dict, right: dict) -> dict:
+    return {field: left.get(field, 0) + right.get(field, 0) for field in HIT_FIELDS}
+
+
+def _percent(count, rows):
+    return count / rows * 100 if rows else float('nan')
+
+
+def pattern_table(hits_by_column: dict) -> pd.DataFrame:
+    """Section 3's pattern_analysis frame from per-column hit counts."""
+    columns = list(hits_by_column)
+    hits = [hits_by_column[col] for col in columns]
+    return pd.DataFrame({
+        "Column": columns,
+        "Email %": [_percent(h['email'], h['rows']) for h in hits],
+        "Phone %": [_percent(h['phone'], h['rows']) for h in hits],
+        "Date %": [_percent(h['date'], h['rows']) for h in hits],
+        "Numeric %": [_percent(h['numeric'], h['rows']) for h in hits],
+        "Alphanumeric %": [_percent(h['alphanumeric'], h['rows']) for h in hits],
+    })
+
+
+def quality_table(hits_by_column: dict, dtypes: dict, distinct_counts: dict) -> pd.DataFrame:
+    """Section 7's column-wise quality scores from the same hit counts."""
+    quality_scores = []
+    for col, hits in hits_by_column.items():
+        rows, dtype = hits['rows'], dtypes[col]
+        non_null = _percent(rows - hits['nulls'], rows)
+        if is_text_column(dtype) and col.lower() == "email":
+            valid = _percent(hits['email'], rows)
+        elif is_text_column(dtype) and "phone" in col.lower():
+            valid = _percent(hits['phone_digits'], rows)
+        elif is_datetime_column(dtype):
+            valid = non_null
+        else:
+            valid = 100
+        quality_scores.append({
+            "Column": col,
+            "Completeness %": non_null,
+            "Validity %": valid,
+            "Uniqueness %": _percent(distinct_counts[col], rows),
+            "Consistency %": _percent(hits['alnum_with_nulls'], rows) if is_text_column(dtype) else 100
+        })
+    return pd.DataFrame(quality_scores)
+
+
+def pattern_hits_by_column(df: pd.DataFrame) -> dict:
+    return {col: pattern_hits(df[col]) for col in df.columns}
+
+
+def pattern_analysis(df: pd.DataFrame) -> pd.DataFrame:
+    return pattern_table(pattern_hits_by_column(df))
@@ -0,0 +1,178 @@
+"""Column profiling (section 2 of app.py)."""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+NUMERIC_STATS = ['mean', 'median', 'std']
+
+
+# Columns can be NumPy-backed (pd.read_csv's defaults), Arrow-backed
+# (profiler.loading) or categorical. These predicates and conversions treat
+# a column the same whichever way it was loaded.
+def is_numeric_column(dtype) -> bool:
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def is_bool_column(dtype) -> bool:
+    return pd.api.types.is_bool_dtype(dtype)
+
+
+def is_datetime_column(dtype) -> bool:
+    if isinstance(dtype, pd.ArrowDtype):
+        return pa.types.is_timestamp(dtype.pyarrow_dtype) or pa.types.is_date(dtype.pyarrow_dtype)
+    return pd.api.types.is_datetime64_any_dtype(dtype)
+
+
+def is_text_column(dtype) -> bool:
+    """Object, string (e.g. string[pyarrow]) and categorical text columns:
+    the columns the sections treat as text."""
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return dtype == object or pd.api.types.is_string_dtype(dtype)
+
+
+def numpy_values(series: pd.Series) -> np.ndarray:
+    """The column's values as pd.read_csv's defaults would hold them: Arrow
+    nulls become NaN, so integers with nulls come back as float64."""
+    if isinstance(series.dtype, pd.ArrowDtype) and series.dtype.kind not in 'mM':
+        return series.to_numpy(na_value=np.nan)
+    return series.to_numpy()
+
+
+def _arrow_strings(series: pd.Series):
+    # The column as an Arrow string array, for Arrow types whose values
+    # Arrow prints the way str() does; None for anything else
+    if not isinstance(series.dtype, pd.ArrowDtype):
+        return None
+    arrow_type = series.dtype.pyarrow_dtype
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pa.array(series)
+    if pa.types.is_date(arrow_type):
+        return pc.cast(pa.array(series), pa.string())
+    return None
+
+
+def text_values(series: pd.Series) -> np.ndarray:
+    """``astype(str)`` of the column as an object array, with nulls as "nan"."""
+    strings = _arrow_strings(series)
+    if strings is not None:
+        return strings.fill_null('nan').to_numpy(zero_copy_only=False)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Each category is converted once; code -1 (null) picks the last entry
+        categories = text_values(pd.Series(series.cat.categories))
+        return np.append(categories, 'nan').astype(object)[series.cat.codes.to_numpy()]
+    return pd.Series(numpy_values(series)).astype(str).to_numpy()
+
+
+# 10, 100, ..., 10**19: the number of powers <= |x| is its digit count - 1
+_POWERS_OF_TEN = 10 ** np.arange(1, 20, dtype=np.uint64)
+
+
+def _integer_lengths(values: np.ndarray) -> np.ndarray:
+    # len(str(x)) for integers without building the strings
+    magnitudes = np.abs(values.astype(np.int64)).astype(np.uint64) \
+        if values.dtype.kind == 'i' else values.astype(np.uint64)
+    digits = np.searchsorted(_POWERS_OF_TEN, magnitudes, side='right') + 1
+    return digits + (values < 0)
+
+
+def _string_lengths(strings: np.ndarray) -> np.ndarray:
+    return np.fromiter(map(len, strings), dtype=np.int64, count=len(strings))
+
+
+def text_lengths(series: pd.Series) -> np.ndarray:
+    """Length of ``str(value)`` for every row, as ``astype(str).map(len)``."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        lengths = text_lengths(pd.Series(series.cat.categories))
+        return np.append(lengths, len('nan'))[series.cat.codes.to_numpy()]
+    strings = _arrow_strings(series)
+    if strings is not None:
+        lengths = pc.utf8_length(strings).fill_null(len('nan'))
+        return lengths.to_numpy(zero_copy_only=False).astype(np.int64)
+    values = numpy_values(series)
+    kind = values.dtype.kind
+    if kind == 'b':
+        return np.where(values, 4, 5)
+    if kind in 'iu':
+        return _integer_lengths(values)
+    if kind == 'f':
+        lengths = np.empty(len(values), dtype=np.int64)
+        # Whole numbers below 1e16 print as "<int>.0" (the sign bit keeps "-0.0")
+        integral = np.isfinite(values) & (np.floor(values) == values) & (np.abs(values) < 1e16)
+        whole = values[integral]
+        lengths[integral] = _integer_lengths(np.abs(whole).astype(np.int64)) \
+            + np.signbit(whole) + 2
+        # Everything else is converted once per distinct bit pattern
+        rest = values[~integral]
+        codes, uniques = pd.factorize(rest.view(f'i{rest.itemsize}'))
+        unique_strings = pd.Series(uniques.view(values.dtype)).astype(str).to_numpy()
+        lengths[~integral] = _string_lengths(unique_strings)[codes]
+        return lengths
+    return _string_lengths(text_values(series))
+
+
+def column_profiling(df: pd.DataFrame, unique_counts=None, medians=None) -> pd.DataFrame:
+    """Section 2's profiling table.
+
+    ``unique_counts`` and ``medians`` (column -> value) let callers pass in
+    results they already have, e.g. sketch estimates in approximate mode;
+    otherwise they are computed exactly.
+    """
+    return pd.DataFrame(profiling_records(df, unique_counts, medians))
+
+
+def profiling_records(df: pd.DataFrame, unique_counts=None, medians=None) -> list:
+    """column_profiling's rows, one dict per column.
+
+    Each row depends only on its own column, so the records for a frame can
+    be built from those of any split of its columns.
+    """
+    row_count = len(df)
+    if unique_counts is None:
+        unique_counts = df.nunique()
+    null_counts = df.isnull().sum()
+
+    # Numeric stats for every numeric column come from batched frame-wide
+    # calls. min/max go per dtype so integer columns keep integer extremes.
+    numeric_columns = [col for col in df.columns if is_numeric_column(df[col].dtype)]
+    stats = NUMERIC_STATS if medians is None else [s for s in NUMERIC_STATS if s != 'median']
+    numeric_stats = df[numeric_columns].agg(stats) if numeric_columns else None
+    columns_by_dtype = {}
+    for col in numeric_columns:
+        columns_by_dtype.setdefault(df[col].dtype, []).append(col)
+    extremes = {}
+    for columns in columns_by_dtype.values():
+        extremes.update(zip(columns, zip(df[columns].min(), df[columns].max())))
+
+    profiling_data = []
+    for column in df.columns:
+        lengths = text_lengths(df[column])
+        unique_values = unique_counts[column]
+        null_count = null_counts[column]
+        if column in extremes:
+            min_value, max_value = extremes[column]
+            mean_value = numeric_stats.at['mean', column]
+            std_dev_value = numeric_stats.at['std', column]
+            median_value = numeric_stats.at['median', column] if medians is None else medians[column]
+        else:
+            min_value = max_value = mean_value = median_value = std_dev_value = None
+
+        profiling_data.append({
+            'Column Name': column,
+            'Data Type': df[column].dtype,
+            'Unique Values': unique_values,
+            'Uniqueness %': (unique_values / row_count) * 100,
+            'Null Count': null_count,
+            'Null %': (null_count / row_count) * 100,
+            'Min Length': lengths.min() if lengths.size else np.nan,
+            'Max Length': lengths.max() if lengths.size else np.nan,
+            'Avg Length': lengths.mean() if lengths.size else np.nan,
+            'Min Value': min_value,
+            'Max Value': max_value,
+            'Mean': mean_value,
+            'Median': median_value,
+            'Std Dev': std_dev_value
+        })
+
+    return profiling_data
@@ -0,0 +1,39 @@
+"""Bounded payloads for what app.py sends to the browser.
+
+Streamlit serializes every dataframe and chart it draws into the page, so a
+table or chart built straight from a column grows with the data: all the
+distinct values of a high-cardinality column, every domain of an email
+column. The helpers here cut results down on the server first, to the top
+values plus an "Other" entry holding the rest of the count, to head slices
+of tables, and to rows taken from the head of a frame before filtering it.
+Numeric distributions are drawn from profiler.values' pre-binned
+histograms rather than from the values.
+"""
+import pandas as pd
+
+# Rows of a table drawn in the page
+MAX_TABLE_ROWS = 1_000
+# Bars or slices of a chart of values
+MAX_CHART_CATEGORIES = 20
+# Rows of the head a preview filters, so it never reads the whole table
+PREVIEW_SCAN_ROWS = 1_000
+
+
+def top_with_other(counts: pd.Series, n: int) -> pd.Series:
+    """The first ``n`` of descending value ``counts`` and one "Other"
+    entry with the sum of the rest, so the total is unchanged."""
+    if len(counts) <= n:
+        return counts
+    rest = counts.iloc[n:]
+    top = counts.iloc[:n]
+    top.index = top.index.astype(object)
+    other = pd.Series([rest.sum()], index=[f"Other ({len(rest):,} values)"])
+    return pd.concat([top, other]).rename_axis(counts.index.name).rename(counts.name)
+
+
+def complete_rows(df: pd.DataFrame, rows: int = 5) -> pd.DataFrame:
+    """Up to ``rows`` rows without nulls from the head of ``df``, or just
+    its first rows when every row scanned has a null."""
+    head = df.head(PREVIEW_SCAN_ROWS)
+    complete = head.dropna().head(rows)
+    return complete if len(complete) else head.head(rows)
@@ -0,0 +1,82 @@
+"""Writing a profile_table report to disk.
+
+Scalars and short lists go to ``report.json``; every table goes to its own
+Parquet file next to it. Per-column tables (top values, picklists, email
+domains) are stacked into one long table with a "Column" column. Values of
+mixed type (Min/Max across columns, top values) are stored as strings, since
+a Parquet column holds a single type.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+REPORT_FILE = 'report.json'
+TABLES = ('column_profiling', 'pattern_analysis', 'quality_scores', 'functional_dependencies',
+          'match_rules', 'duplicate_rows')
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+        return str(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return str(value)
+
+
+def to_json(data: dict) -> str:
+    return json.dumps(data, indent=2, default=_json_default)
+
+
+def parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` with columns Parquet can't hold as one type (dtype objects,
+    mixed values) as strings, nulls kept."""
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) not in (
+                'string', 'empty', 'bytes', 'boolean', 'integer', 'floating'):
+            columns[col] = series.map(str, na_action='ignore')
+    return df.assign(**columns) if columns else df
+
+
+def stack_tables(tables: dict, value_name: str = 'Value') -> pd.DataFrame:
+    """One long frame from {column: frame}, tagged with a "Column" column."""
+    frames = [frame.astype({value_name: object}).assign(Column=col)
+              for col, frame in tables.items()]
+    if not frames:
+        return pd.DataFrame(columns=['Column', value_name, 'Count'])
+    stacked = pd.concat(frames, ignore_index=True)
+    return stacked[['Column', *[c for c in stacked.columns if c != 'Column']]]
+
+
+def write_report(report: dict, directory: str, metadata: dict = None) -> dict:
+    """Write ``report`` into ``directory``; returns what went to report.json."""
+    os.makedirs(directory, exist_ok=True)
+    tables = {name: report[name] for name in TABLES if name in report}
+    tables['top_values'] = stack_tables(report['top_values'])
+    tables['picklists'] = stack_tables({col: counts for col, (_, counts) in report['picklists'].items()})
+    tables['email_domains'] = stack_tables(
+        {col: counts.rename_axis('Value').reset_index(name='Count')
+         for col, counts in report['email_domains'].items()})
+    tables['null_percentages'] = report['null_percentages'].rename_axis('Column').reset_index(name='Null %')
+    for name, table in tables.items():
+        parquet_safe(table).to_parquet(os.path.join(directory, f'{name}.parquet'), index=False)
+
+    summary = {
+        **(metadata or {}),
+        'rows': report['rows'],
+        'columns': report['columns'],
+        'table_summary': report['table_summary'],
+        'primary_keys': report['primary_keys'],
+        'picklist_sizes': {col: size for col, (size, _) in report['picklists'].items()},
+        'duplicates': report.get('duplicates'),
+        'seconds': report['seconds'],
+        'tables': {name: f'{name}.parquet' for name in tables},
+    }
+    with open(os.path.join(directory, REPORT_FILE), 'w') as f:
+        f.write(to_json(summary))
+    return summary
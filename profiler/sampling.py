@@ -0,0 +1,188 @@
+"""Fast preview: profile a reproducible row sample with confidence intervals.
+
+The sample goes through the same column_profiling, pattern and top-value
+code as the full table. The functions here scale the results back to the
+full row count and attach intervals:
+
+- shares (null %, pattern %, top-value frequency) get a Wilson score
+  interval,
+- means get a normal interval,
+- medians get a distribution-free interval between two order statistics,
+- distinct counts are estimated with GEE (Charikar et al., 2000), which is
+  bounded below by the distinct values seen in the sample and above by
+  treating every value seen once as a scaled-up run of new values. A
+  column with no repeats in the sample is estimated at that upper bound.
+
+All intervals use the finite population correction, so they shrink to
+zero width as the sample approaches the whole table.
+"""
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from profiler.patterns import pattern_hits_by_column, pattern_table
+from profiler.profiling import column_profiling, is_bool_column, is_numeric_column
+from profiler.values import value_counts
+
+DEFAULT_SAMPLE_SIZE = 100_000
+DEFAULT_CONFIDENCE = 0.95
+
+
+def sample_rows(df: pd.DataFrame, size: int = DEFAULT_SAMPLE_SIZE, seed: int = 0,
+                stratify_by=None) -> pd.DataFrame:
+    """A reproducible random sample of ``size`` rows, in the table's order.
+
+    With ``stratify_by`` every value of that column keeps its share of the
+    rows (proportional allocation), so small groups aren't lost by chance.
+    """
+    if len(df) <= size:
+        return df
+    if stratify_by is None:
+        return df.sample(n=size, random_state=seed).sort_index()
+    return df.groupby(stratify_by, dropna=False, sort=False, observed=True, group_keys=False).sample(
+        frac=size / len(df), random_state=seed).sort_index()
+
+
+def _z(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def _fpc(sample_rows: int, population_rows: int) -> float:
+    if population_rows <= 1:
+        return 0.0
+    return np.sqrt(max(population_rows - sample_rows, 0) / (population_rows - 1))
+
+
+def proportion_interval(successes, sample_rows: int, population_rows: int,
+                        confidence: float = DEFAULT_CONFIDENCE):
+    """Wilson score interval for a share, in percent."""
+    p = np.asarray(successes, dtype=np.float64) / sample_rows
+    z = _z(confidence)
+    denominator = 1 + z ** 2 / sample_rows
+    centre = (p + z ** 2 / (2 * sample_rows)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / sample_rows
+                             + z ** 2 / (4 * sample_rows ** 2)) / denominator
+    half_width *= _fpc(sample_rows, population_rows)
+    return np.clip(centre - half_width, 0, 1) * 100, np.clip(centre + half_width, 0, 1) * 100
+
+
+def mean_interval(series: pd.Series, population_rows: int,
+                  confidence: float = DEFAULT_CONFIDENCE):
+    values = series.dropna()
+    if len(values) < 2:
+        return np.nan, np.nan
+    half_width = (_z(confidence) * values.std() / np.sqrt(len(values))
+                  * _fpc(len(series), population_rows))
+    return values.mean() - half_width, values.mean() + half_width
+
+
+def median_interval(series: pd.Series, confidence: float = DEFAULT_CONFIDENCE):
+    # Ranks n/2 -+ z*sqrt(n)/2 bracket the population median
+    values = np.sort(series.dropna().to_numpy(dtype=np.float64))
+    n = len(values)
+    if not n:
+        return np.nan, np.nan
+    spread = _z(confidence) * np.sqrt(n) / 2
+    low = int(np.clip(np.floor(n / 2 - spread), 0, n - 1))
+    high = int(np.clip(np.ceil(n / 2 + spread), 0, n - 1))
+    return values[low], values[high]
+
+
+def distinct_estimate(series: pd.Series, population_rows: int):
+    """GEE estimate of the full column's distinct count, with its bounds."""
+    counts = series.value_counts(dropna=True)
+    seen = len(counts)
+    singletons = int((counts == 1).sum())
+    scale = population_rows / len(series) if len(series) else 1.0
+    upper = scale * singletons + seen - singletons
+    if singletons == len(series.dropna()):
+        # Nothing repeats in the sample: the column looks like a key, where
+        # GEE badly underestimates
+        return int(round(upper)), seen, int(round(upper))
+    estimate = np.sqrt(scale) * singletons + seen - singletons
+    return int(round(estimate)), seen, int(round(upper))
+
+
+def _format_interval(low, high, digits: int = 2) -> str:
+    if pd.isna(low) or pd.isna(high):
+        return ""
+    return f"{low:.{digits}f} – {high:.{digits}f}"
+
+
+def preview_column_profiling(sample: pd.DataFrame, population_rows: int,
+                             confidence: float = DEFAULT_CONFIDENCE) -> pd.DataFrame:
+    """Section 2's frame for the full table, estimated from ``sample``.
+
+    Counts are scaled to ``population_rows``; min/max values and lengths are
+    those of the sample.
+    """
+    n = len(sample)
+    estimates = {col: distinct_estimate(sample[col], population_rows) for col in sample.columns}
+    profiling_df = column_profiling(sample, unique_counts=pd.Series(
+        {col: estimate for col, (estimate, _, _) in estimates.items()}))
+    profiling_df['Uniqueness %'] = profiling_df['Unique Values'] / population_rows * 100
+    null_counts = sample.isnull().sum().to_numpy()
+    profiling_df['Null Count'] = np.rint(null_counts / n * population_rows).astype(np.int64)
+
+    null_low, null_high = proportion_interval(null_counts, n, population_rows, confidence)
+    profiling_df['Unique Values CI'] = [
+        f"{low:,} – {high:,}" for _, low, high in estimates.values()]
+    profiling_df['Null % CI'] = [_format_interval(low, high)
+                                 for low, high in zip(null_low, null_high)]
+    mean_ci, median_ci = [], []
+    for col in sample.columns:
+        if is_numeric_column(sample[col].dtype):
+            mean_ci.append(_format_interval(*mean_interval(sample[col], population_rows, confidence)))
+            median_ci.append(_format_interval(*median_interval(sample[col], confidence)))
+        else:
+            mean_ci.append("")
+            median_ci.append("")
+    profiling_df['Mean CI'] = mean_ci
+    profiling_df['Median CI'] = median_ci
+    return profiling_df
+
+
+def preview_pattern_analysis(sample: pd.DataFrame, population_rows: int,
+                             confidence: float = DEFAULT_CONFIDENCE):
+    """Section 3's frame from ``sample`` plus a frame of intervals, and the
+    sample's pattern hits for sections 6 and 7."""
+    hits_by_column = pattern_hits_by_column(sample)
+    intervals = {"Column": list(hits_by_column)}
+    for label, field in (("Email % CI", 'email'), ("Phone % CI", 'phone'),
+                         ("Date % CI", 'date'), ("Numeric % CI", 'numeric'),
+                         ("Alphanumeric % CI", 'alphanumeric')):
+        low, high = proportion_interval([hits[field] for hits in hits_by_column.values()],
+                                        len(sample), population_rows, confidence)
+        intervals[label] = [_format_interval(lo, hi) for lo, hi in zip(low, high)]
+    return pattern_table(hits_by_column), pd.DataFrame(intervals), hits_by_column
+
+
+def preview_top_values(sample: pd.DataFrame, population_rows: int, n: int = 5,
+                       confidence: float = DEFAULT_CONFIDENCE) -> dict:
+    """Section 4's top values with counts scaled to the full table."""
+    top_values = {}
+    scale = population_rows / len(sample)
+    for col in sample.columns:
+        if is_bool_column(sample[col].dtype):
+            continue
+        counts = value_counts(sample[col].dropna()).head(n)
+        low, high = proportion_interval(counts.to_numpy(), len(sample), population_rows, confidence)
+        top_values[col] = pd.DataFrame({
+            "Value": counts.index,
+            "Count": np.rint(counts.to_numpy() * scale).astype(np.int64),
+            "Count CI": [_format_interval(lo * population_rows / 100, hi * population_rows / 100, 0)
+                         for lo, hi in zip(low, high)],
+        })
+    return top_values
+
+
+def preview_null_percentages(sample: pd.DataFrame, population_rows: int,
+                             confidence: float = DEFAULT_CONFIDENCE) -> pd.DataFrame:
+    null_counts = sample.isnull().sum()
+    low, high = proportion_interval(null_counts.to_numpy(), len(sample), population_rows, confidence)
+    return pd.DataFrame({
+        "Column": null_counts.index,
+        "Null %": null_counts.to_numpy() / len(sample) * 100,
+        "Null % CI": [_format_interval(lo, hi) for lo, hi in zip(low, high)],
+    })
@@ -0,0 +1,232 @@
+"""Mergeable, bounded-memory summaries of a column.
+
+Each sketch takes a chunk of values at a time and can be merged with another
+sketch of the same kind, so a column can be profiled chunk by chunk or
+partition by partition and combined afterwards.
+"""
+import numpy as np
+import pandas as pd
+
+from profiler.profiling import is_numeric_column
+
+
+def hash_values(series: pd.Series) -> np.ndarray:
+    """64-bit hashes of the non-null values in ``series``.
+
+    Numbers are hashed as float64 so that 5 read as int64 in one chunk and as
+    5.0 in another still hash the same.
+    """
+    values = series.dropna()
+    if values.dtype.kind in 'iuf':
+        values = values.astype(np.float64)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision one-byte registers."""
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"precision must be between 4 and 18, got {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, series: pd.Series):
+        self.update_hashes(hash_values(series))
+        return self
+
+    def update_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return self
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        # Rank = position of the first set bit in the remaining 64 - p bits.
+        # The guard bit keeps the rank at most 64 - p + 1.
+        rest = (hashes << np.uint64(p)) | np.uint64(1 << (p - 1))
+        high = (rest >> np.uint64(32)).astype(np.float64)
+        low = (rest & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        with np.errstate(divide='ignore'):
+            leading_zeros = np.where(high > 0, 31 - np.floor(np.log2(high)),
+                                     63 - np.floor(np.log2(low)))
+        np.maximum.at(self.registers, index, (leading_zeros + 1).astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class SpaceSaving:
+    """Heavy-hitter counter keeping at most ``capacity`` values.
+
+    Counts are upper bounds; ``errors`` holds how much each count may be
+    overestimated by. Values whose true frequency exceeds total / capacity
+    are always retained.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+
+    def _floor(self) -> int:
+        # Count assumed for values not in the summary
+        return int(self.counts.min()) if len(self.counts) >= self.capacity else 0
+
+    def update(self, series: pd.Series):
+        # A chunk's exact counts, cut to the top ``capacity`` values, form a
+        # summary of their own that is merged like any other.
+        other = SpaceSaving(self.capacity)
+        other.counts = series.dropna().value_counts().head(self.capacity).astype(np.int64)
+        other.errors = pd.Series(0, index=other.counts.index, dtype=np.int64)
+        return self.merge(other)
+
+    def merge(self, other: "SpaceSaving"):
+        floor, other_floor = self._floor(), other._floor()
+        counts = self.counts.add(other.counts, fill_value=0)
+        errors = self.errors.add(other.errors, fill_value=0)
+        missing_here = ~counts.index.isin(self.counts.index)
+        missing_there = ~counts.index.isin(other.counts.index)
+        counts[missing_here] += floor
+        errors[missing_here] += floor
+        counts[missing_there] += other_floor
+        errors[missing_there] += other_floor
+
+        # Positions, not labels: an index of booleans would be taken as a mask
+        keep = np.argsort(-counts.to_numpy(), kind='stable')[:self.capacity]
+        self.counts = counts.iloc[keep].astype(np.int64)
+        self.errors = errors.reindex(counts.index).iloc[keep].astype(np.int64)
+        return self
+
+    def top(self, n: int) -> pd.Series:
+        return self.counts.sort_values(ascending=False, kind='stable').head(n)
+
+
+class KLL:
+    """KLL quantile sketch over floats.
+
+    Keeps O(k) values in compactors whose capacities shrink by 2/3 per level
+    below the top one. The normalized rank error is about 3.3 / k (k=200
+    gives roughly 1.65% with 99% confidence).
+    """
+
+    # Values are folded in at most this many at a time so that a single
+    # compaction never has to sort the whole column
+    BATCH_SIZE = 1 << 16
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        if k < 8:
+            raise ValueError(f"k must be at least 8, got {k}")
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self) -> float:
+        return 3.3 / self.k
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(8, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, series: pd.Series):
+        values = pd.to_numeric(series.dropna(), errors='coerce').dropna().to_numpy(dtype=np.float64)
+        for start in range(0, len(values), self.BATCH_SIZE):
+            batch = values[start:start + self.BATCH_SIZE]
+            self.levels[0] = np.concatenate([self.levels[0], batch])
+            self.count += len(batch)
+            self._compress()
+        return self
+
+    def merge(self, other: "KLL"):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind; every other item of the rest
+                # moves up a level with double the weight.
+                leftover, items = items[:len(items) % 2], items[len(items) % 2:]
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = leftover
+            level += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return np.nan
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 1 << level, dtype=np.int64)
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(items[order][min(position, len(items) - 1)])
+
+
+def hll_precision_for(relative_error: float) -> int:
+    # Standard error of HyperLogLog is 1.04 / sqrt(2 ** precision)
+    return int(np.clip(np.ceil(np.log2((1.04 / relative_error) ** 2)), 4, 18))
+
+
+def kll_k_for(rank_error: float) -> int:
+    return max(8, int(np.ceil(3.3 / rank_error)))
+
+
+class ColumnSketch:
+    """Distinct-count and (for numeric columns) quantile sketch of a column."""
+
+    def __init__(self, distinct: HyperLogLog, quantiles: KLL = None, non_null: int = 0):
+        self.distinct = distinct
+        self.quantiles = quantiles
+        self.non_null = non_null
+
+    def distinct_count(self) -> int:
+        # The HyperLogLog estimate can overshoot the number of non-null values
+        return min(self.distinct.count(), self.non_null)
+
+    def median(self):
+        return self.quantiles.quantile(0.5) if self.quantiles is not None else None
+
+
+def sketch_columns(df: pd.DataFrame, distinct_error: float = 0.01,
+                   quantile_error: float = 0.01) -> dict:
+    """One ColumnSketch per column, to be shared by every section that needs
+    distinct counts or medians."""
+    precision = hll_precision_for(distinct_error)
+    k = kll_k_for(quantile_error)
+    sketches = {}
+    for col in df.columns:
+        series = df[col]
+        quantiles = KLL(k).update(series) if is_numeric_column(series.dtype) else None
+        sketches[col] = ColumnSketch(HyperLogLog(precision).update(series), quantiles,
+                                     int(series.notna().sum()))
+    return sketches
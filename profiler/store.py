@@ -0,0 +1,170 @@
+"""Persistent store of section results, shared by sessions and restarts.
+
+The app's in-memory caches die with the server process and aren't shared
+between processes; this store keeps results in a directory instead. An
+entry is keyed by a hash of the dataset fingerprint (the upload's content
+hash), the section, its parameters, the profiler version and
+STORE_VERSION, so a new release or other settings never read old results.
+
+Each result is pickled to its own file. An SQLite index (``index.sqlite``)
+keeps every entry's size, SHA-256 checksum and last access time; SQLite's
+locking lets several sessions and processes share one store. Reads verify
+the checksum and drop entries that fail it or whose file is gone. Writes
+go to a temporary file renamed into place, then evict the least recently
+used entries until the store fits in ``max_bytes``. The index and the
+entries live in a STORE_SUBDIRECTORY of the directory given, which the store
+owns: a store whose index can't be read empties that subdirectory and
+starts over, and leaves the rest of the directory alone.
+
+Entries are unpickled when read, and unpickling runs code, so the
+directory must only be writable by users trusted to run code in the app.
+The checksums guard against torn and corrupted files, not against files
+written on purpose.
+"""
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from profiler import __version__
+from profiler.tracing import span
+
+STORE_VERSION = 1
+INDEX_FILE = 'index.sqlite'
+STORE_SUBDIRECTORY = 'profiler-results'
+DEFAULT_MAX_BYTES = 2 * 2 ** 30
+# Seconds a write waits for another process holding the index
+LOCK_TIMEOUT = 30
+
+_MISSING = object()
+
+
+class ResultStore:
+    """Section results pickled under ``directory``, at most ``max_bytes``
+    of them."""
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory, self.max_bytes = directory, max_bytes
+        # Times this object has emptied the store, so in-memory caches of its
+        # results can tell their entries are gone
+        self.generation = 0
+        self._files = os.path.join(directory, STORE_SUBDIRECTORY)
+        os.makedirs(self._files, exist_ok=True)
+        try:
+            self._create_index()
+        except sqlite3.DatabaseError:
+            self._reset()
+
+    @contextmanager
+    def _connect(self):
+        # One connection per operation, so the store can be used from any
+        # thread; committed on success and always closed
+        connection = sqlite3.connect(os.path.join(self._files, INDEX_FILE),
+                                     timeout=LOCK_TIMEOUT)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _create_index(self):
+        with self._connect() as index:
+            index.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                          "size INTEGER, checksum TEXT, accessed REAL)")
+
+    def _reset(self):
+        # Only the store's own files: the index, entries and temporary files
+        # of writes cut short
+        for name in os.listdir(self._files):
+            if name.startswith(INDEX_FILE) or '.pkl' in name:
+                os.remove(os.path.join(self._files, name))
+        self._create_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._files, f'{key}.pkl')
+
+    def key(self, fingerprint: str, name: str, params=()) -> str:
+        return hashlib.sha256(repr((STORE_VERSION, __version__, fingerprint, name, params))
+                              .encode()).hexdigest()
+
+    def get(self, key: str, default=None):
+        """The result stored under ``key``, or ``default`` if there is none
+        or it fails its integrity check (and is then dropped)."""
+        with self._connect() as index:
+            row = index.execute("SELECT checksum FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            if hashlib.sha256(data).hexdigest() != row[0]:
+                raise ValueError("checksum mismatch")
+            value = pickle.loads(data)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError,
+                ImportError):
+            self.discard(key)
+            return default
+        with self._connect() as index:
+            index.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+        return value
+
+    def put(self, key: str, value):
+        """Store ``value`` under ``key``, unless it alone exceeds max_bytes."""
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            return
+        temporary = f'{self._path(key)}.tmp{os.getpid()}_{threading.get_ident()}'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, self._path(key))
+        with self._connect() as index:
+            index.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                          (key, len(data), hashlib.sha256(data).hexdigest(), time.time()))
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the rest fit in max_bytes."""
+        with self._connect() as index:
+            rows = index.execute("SELECT key, size FROM entries ORDER BY accessed DESC").fetchall()
+        total, dropped = 0, []
+        for key, size in rows:
+            total += size
+            if total > self.max_bytes:
+                dropped.append(key)
+        for key in dropped:
+            self.discard(key)
+
+    def discard(self, key: str):
+        with self._connect() as index:
+            index.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._connect() as index:
+            keys = [key for key, in index.execute("SELECT key FROM entries")]
+        for key in keys:
+            self.discard(key)
+        self.generation += 1
+
+    def stats(self) -> dict:
+        with self._connect() as index:
+            entries, size = index.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
+
+    def get_or_compute(self, fingerprint: str, name: str, params, compute):
+        """The stored result of section ``name``, or ``compute()`` stored."""
+        key = self.key(fingerprint, name, params)
+        with span("result_store", section=name) as current:
+            value = self.get(key, _MISSING)
+            current.count(hit=value is not _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
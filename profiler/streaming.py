@@ -0,0 +1,260 @@
+"""Chunked profiling for CSVs that don't fit in memory.
+
+The file is read ``chunksize`` rows at a time and every column is folded
+into a ``ColumnAccumulator``. Memory stays bounded by the chunk size plus a
+fixed-size summary per column. Accumulators merge, so partial profiles
+(e.g. one per file partition) can be combined. ``stream_csv`` yields the
+running profile after each chunk so callers can show partial results.
+
+Distinct counts come from HyperLogLog, medians from a KLL sketch and top
+values from a Space-Saving summary, so all three are estimates. With
+``exact=True`` each accumulator keeps the column's full value counts
+instead, which merge exactly; profiler.incremental uses that to reproduce a
+full profile from saved per-partition state.
+"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from profiler.patterns import add_hits, pattern_hits, pattern_table, quality_table
+from profiler.profiling import is_numeric_column, text_lengths
+from profiler.sketches import KLL, HyperLogLog, SpaceSaving
+from profiler.values import add_counts, counts_median, mergeable_counts
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def _combined_dtype(left, right):
+    if left is None:
+        return right
+    if left == right:
+        return left
+    if isinstance(left, pd.CategoricalDtype) and isinstance(right, pd.CategoricalDtype):
+        # Parts of one column profiled against different versions of its
+        # categories; the latest is the column's dtype
+        return right
+    # Chunks of the same column can parse differently (e.g. an all-null
+    # chunk comes back as float64); widen the same way a full read would.
+    if is_numeric_column(left) and is_numeric_column(right):
+        return np.result_type(left, right)
+    return np.dtype(object)
+
+
+class ColumnAccumulator:
+    def __init__(self, name, hll_precision: int = 14, top_k: int = 1000, kll_k: int = 200,
+                 exact: bool = False):
+        self.name = name
+        self.dtype = None
+        self.rows = 0
+        self.nulls = 0
+        # Length stats over str(value) of every row, as column_profiling does
+        self.min_length = None
+        self.max_length = None
+        self.length_sum = 0
+        # Numeric stats over the non-null values (Welford / Chan et al.)
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min_value = None
+        self.max_value = None
+        self.hits = add_hits({}, {})
+        self.exact = exact
+        if exact:
+            # Value counts of each merged part, added up when first needed
+            self.count_parts = []
+        else:
+            self.distinct = HyperLogLog(hll_precision)
+            self.quantiles = KLL(kll_k)
+            self.top_values = SpaceSaving(top_k)
+
+    def update(self, series: pd.Series):
+        self.dtype = _combined_dtype(self.dtype, series.dtype)
+        self.rows += len(series)
+        self.nulls += int(series.isnull().sum())
+
+        lengths = text_lengths(series)
+        if lengths.size:
+            self._merge_lengths(int(lengths.min()), int(lengths.max()), int(lengths.sum()))
+
+        if is_numeric_column(series.dtype):
+            values = series.dropna().to_numpy(dtype=np.float64)
+            if values.size:
+                self._merge_moments(values.size, values.mean(),
+                                    ((values - values.mean()) ** 2).sum())
+                self._merge_extremes(series.min(), series.max())
+                if not self.exact:
+                    self.quantiles.update(series)
+
+        self.hits = add_hits(self.hits, pattern_hits(series))
+        if self.exact:
+            self.count_parts.append(mergeable_counts(series))
+        else:
+            self.distinct.update(series)
+            self.top_values.update(series)
+        return self
+
+    def merge(self, other: "ColumnAccumulator"):
+        self.dtype = _combined_dtype(self.dtype, other.dtype)
+        self.rows += other.rows
+        self.nulls += other.nulls
+        if other.min_length is not None:
+            self._merge_lengths(other.min_length, other.max_length, other.length_sum)
+        if other.numeric_count:
+            self._merge_moments(other.numeric_count, other.mean, other.m2)
+            self._merge_extremes(other.min_value, other.max_value)
+        self.hits = add_hits(self.hits, other.hits)
+        if self.exact:
+            self.count_parts.extend(other.count_parts)
+        else:
+            self.distinct.merge(other.distinct)
+            self.quantiles.merge(other.quantiles)
+            self.top_values.merge(other.top_values)
+        return self
+
+    def _merge_lengths(self, min_length, max_length, length_sum):
+        self.min_length = min_length if self.min_length is None else min(self.min_length, min_length)
+        self.max_length = max_length if self.max_length is None else max(self.max_length, max_length)
+        self.length_sum += length_sum
+
+    def _merge_moments(self, count, mean, m2):
+        total = self.numeric_count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.numeric_count * count / total
+        self.numeric_count = total
+
+    def _merge_extremes(self, min_value, max_value):
+        self.min_value = min_value if self.min_value is None else min(self.min_value, min_value)
+        self.max_value = max_value if self.max_value is None else max(self.max_value, max_value)
+
+    @property
+    def numeric(self) -> bool:
+        return self.dtype is not None and is_numeric_column(self.dtype)
+
+    def value_counts(self) -> pd.Series:
+        if len(self.count_parts) > 1:
+            self.count_parts = [add_counts(self.count_parts)]
+        return self.count_parts[0] if self.count_parts else pd.Series(dtype=np.int64)
+
+    def distinct_count(self) -> int:
+        if self.exact:
+            return len(self.value_counts())
+        # The HyperLogLog estimate can overshoot the number of non-null values
+        return min(self.distinct.count(), self.rows - self.nulls)
+
+    def median(self):
+        if self.exact:
+            return counts_median(self.value_counts())
+        return self.quantiles.quantile(0.5)
+
+    def top(self, n: int) -> pd.Series:
+        if self.exact:
+            return self.value_counts().sort_values(ascending=False, kind='stable').head(n)
+        return self.top_values.top(n)
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.numeric_count - 1) if self.numeric_count > 1 else np.nan
+
+    def profile_row(self) -> dict:
+        unique_values = self.distinct_count()
+        numeric = self.numeric and self.numeric_count
+        return {
+            'Column Name': self.name,
+            'Data Type': self.dtype,
+            'Unique Values': unique_values,
+            'Uniqueness %': unique_values / self.rows * 100 if self.rows else np.nan,
+            'Null Count': self.nulls,
+            'Null %': self.nulls / self.rows * 100 if self.rows else np.nan,
+            'Min Length': self.min_length,
+            'Max Length': self.max_length,
+            'Avg Length': self.length_sum / self.rows if self.rows else np.nan,
+            'Min Value': self.min_value if numeric else None,
+            'Max Value': self.max_value if numeric else None,
+            'Mean': self.mean if numeric else None,
+            'Median': self.median() if numeric else None,
+            'Std Dev': np.sqrt(self.variance) if numeric else None,
+        }
+
+
+class StreamingProfile:
+    """Per-column accumulators for a whole table, with section outputs."""
+
+    def __init__(self, hll_precision: int = 14, top_k: int = 1000, kll_k: int = 200,
+                 exact: bool = False):
+        self.hll_precision = hll_precision
+        self.top_k = top_k
+        self.kll_k = kll_k
+        self.exact = exact
+        self.rows = 0
+        self.chunks = 0
+        self.columns = {}
+
+    def update(self, chunk: pd.DataFrame):
+        self.rows += len(chunk)
+        self.chunks += 1
+        for col in chunk.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnAccumulator(col, self.hll_precision, self.top_k,
+                                                      self.kll_k, self.exact)
+            self.columns[col].update(chunk[col])
+        return self
+
+    def merge(self, other: "StreamingProfile"):
+        self.rows += other.rows
+        self.chunks += other.chunks
+        for col, accumulator in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(accumulator)
+            else:
+                # Later merges update it in place; leave other's untouched
+                self.columns[col] = copy.deepcopy(accumulator)
+        return self
+
+    # ---- Section outputs, in the same shape app.py renders ----
+
+    def column_profiling(self) -> pd.DataFrame:
+        return pd.DataFrame([acc.profile_row() for acc in self.columns.values()])
+
+    def pattern_hits(self) -> dict:
+        return {col: acc.hits for col, acc in self.columns.items()}
+
+    def distinct_counts(self) -> pd.Series:
+        return pd.Series({col: acc.distinct_count() for col, acc in self.columns.items()},
+                         index=list(self.columns), dtype='int64')
+
+    def pattern_analysis(self) -> pd.DataFrame:
+        return pattern_table(self.pattern_hits())
+
+    def top_values(self, n: int = 5) -> dict:
+        return {col: acc.top(n).rename_axis("Value").reset_index(name="Count")
+                for col, acc in self.columns.items() if acc.dtype != bool}
+
+    def null_percentages(self) -> pd.Series:
+        return pd.Series({col: acc.nulls / acc.rows * 100 if acc.rows else np.nan
+                          for col, acc in self.columns.items()})
+
+    def table_summary(self):
+        cells = sum(acc.rows for acc in self.columns.values())
+        nulls = sum(acc.nulls for acc in self.columns.values())
+        if not cells:
+            # No rows (e.g. a header-only CSV): no rate is defined
+            return np.nan, np.nan
+        completeness = 100 - nulls / cells * 100
+        uniqueness = np.mean([acc.distinct_count() for acc in self.columns.values()]) / self.rows * 100
+        return completeness, uniqueness
+
+    def quality_scores(self) -> pd.DataFrame:
+        return quality_table(self.pattern_hits(),
+                             {col: acc.dtype for col, acc in self.columns.items()},
+                             self.distinct_counts())
+
+
+def stream_csv(source, chunksize: int = DEFAULT_CHUNKSIZE, hll_precision: int = 14,
+               top_k: int = 1000, kll_k: int = 200, **read_csv_kwargs):
+    """Profile a CSV chunk by chunk, yielding the running StreamingProfile."""
+    profile = StreamingProfile(hll_precision, top_k, kll_k)
+    with pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield profile.update(chunk)
@@ -0,0 +1,290 @@
+"""Spans for timing the profiler's sections and its matching stages.
+
+``span(name, **counts)`` is a context manager recording the wall time, CPU
+time and peak memory of the code inside it, plus any counts (rows, pairs,
+blocks) given up front or added with ``Span.count``. Spans go to the Tracer
+made current with ``use``; without one they record nothing, so library
+code can open them unconditionally. The current tracer and span live in
+context variables: a thread started through ``in_context`` (as
+profiler.jobs does) records into the tracer and under the span that were
+current when it was started.
+
+CPU time is the whole process's, so it includes other threads running at
+the same time. Peak memory is the process's resident high-water mark when
+the span ends; with ``Tracer(memory=True)`` tracemalloc also gives the most
+memory Python and NumPy held (not Arrow) while the span ran, at the cost of
+slowing everything down while it traces. tracemalloc is process-wide, so it
+runs while any tracer has ``memory`` on and stops once none has.
+
+Spans export as plain records or in OpenTelemetry's OTLP JSON layout.
+``Capture`` profiles a stretch of code with pyinstrument when it is
+installed and cProfile otherwise.
+"""
+import contextvars
+import cProfile
+import functools
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+from profiler import __version__
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+MAX_SPANS = 2000
+SERVICE_NAME = 'data-profiler'
+
+_tracer = contextvars.ContextVar('tracer', default=None)
+_span = contextvars.ContextVar('span', default=None)
+
+# Tracers with memory on, and whether they started tracemalloc (rather than
+# e.g. PYTHONTRACEMALLOC). Reentrant, as a tracer may be collected while a
+# thread holds it.
+_memory_tracers = 0
+_started_tracemalloc = False
+_memory_lock = threading.RLock()
+
+
+def _count_memory_tracer(change: int):
+    global _memory_tracers, _started_tracemalloc
+    with _memory_lock:
+        _memory_tracers += change
+        if _memory_tracers and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracemalloc = True
+        elif not _memory_tracers and _started_tracemalloc:
+            tracemalloc.stop()
+            _started_tracemalloc = False
+
+
+def peak_rss_mb():
+    """The process's resident memory high-water mark, or None where the
+    resource module is missing (Windows)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 2 ** 10
+
+
+class Span:
+    """One timed stretch of code and its counts."""
+
+    def __init__(self, name: str, parent, counts: dict):
+        self.name, self.counts = name, counts
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.thread = threading.current_thread().name
+        self.start_ns = time.time_ns()
+        self.wall = self.cpu = None
+        self.peak_rss_mb = self.traced_peak_mb = None
+
+    def count(self, **counts):
+        self.counts.update(counts)
+
+    def record(self) -> dict:
+        return {
+            'name': self.name, 'span_id': self.span_id, 'parent_id': self.parent_id,
+            'trace_id': self.trace_id, 'thread': self.thread,
+            'start': pd.Timestamp(self.start_ns, unit='ns', tz='UTC').isoformat(),
+            'wall_seconds': self.wall, 'cpu_seconds': self.cpu,
+            'peak_rss_mb': self.peak_rss_mb, 'traced_peak_mb': self.traced_peak_mb,
+            **self.counts,
+        }
+
+
+class _NoSpan:
+    # What span() yields without a current tracer
+    def count(self, **counts):
+        pass
+
+
+class Tracer:
+    """The last ``max_spans`` finished spans, oldest first."""
+
+    def __init__(self, memory: bool = False, max_spans: int = MAX_SPANS):
+        self._memory = False
+        self.memory = memory
+        self.spans = deque(maxlen=max_spans)
+
+    @property
+    def memory(self) -> bool:
+        """Whether spans record tracemalloc's peak as well."""
+        return self._memory
+
+    @memory.setter
+    def memory(self, memory: bool):
+        memory = bool(memory)
+        if memory != self._memory:
+            self._memory = memory
+            _count_memory_tracer(1 if memory else -1)
+
+    def __del__(self):
+        # A session that ends with memory on no longer needs tracemalloc
+        if getattr(self, '_memory', False):
+            _count_memory_tracer(-1)
+
+    def clear(self):
+        self.spans.clear()
+
+    def records(self) -> list:
+        return [span.record() for span in list(self.spans)]
+
+    def table(self) -> pd.DataFrame:
+        """One row per span, newest first, with the counts as columns."""
+        records = self.records()[::-1]
+        return pd.DataFrame(records).drop(columns=['span_id', 'parent_id', 'trace_id'],
+                                          errors='ignore').convert_dtypes()
+
+    def otel(self) -> dict:
+        """The spans as an OTLP JSON export request."""
+        spans = []
+        for span in list(self.spans):
+            attributes = {'thread.name': span.thread, 'cpu.seconds': span.cpu,
+                          'memory.peak_rss_mb': span.peak_rss_mb,
+                          'memory.traced_peak_mb': span.traced_peak_mb, **span.counts}
+            spans.append({
+                'traceId': span.trace_id, 'spanId': span.span_id,
+                'parentSpanId': span.parent_id or '', 'name': span.name, 'kind': 1,
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.start_ns + int(span.wall * 1e9)),
+                'attributes': [{'key': key, 'value': _otel_value(value)}
+                               for key, value in attributes.items() if value is not None],
+            })
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}},
+                {'key': 'service.version', 'value': {'stringValue': __version__}}]},
+            'scopeSpans': [{'scope': {'name': 'profiler.tracing'}, 'spans': spans}],
+        }]}
+
+
+def _otel_value(value) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def use(tracer):
+    """Make ``tracer`` (or None) current for this thread's context."""
+    _tracer.set(tracer)
+
+
+def in_context(function):
+    """``function`` bound to the current tracer and span, for running on
+    another thread."""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(function, *args, **kwargs)
+
+
+@contextmanager
+def span(name: str, **counts):
+    """A span under the current one, recorded by the current tracer."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield _NoSpan()
+        return
+    parent = _span.get()
+    current = Span(name, parent, counts)
+    tracing = tracer.memory and tracemalloc.is_tracing()
+    if tracing:
+        # Fold the allocations so far into the parent's peak before resetting
+        if parent is not None:
+            parent.traced_peak_mb = max(parent.traced_peak_mb or 0,
+                                        tracemalloc.get_traced_memory()[1] / 2 ** 20)
+        tracemalloc.reset_peak()
+    token = _span.set(current)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield current
+    finally:
+        current.wall = time.perf_counter() - wall
+        current.cpu = time.process_time() - cpu
+        current.peak_rss_mb = peak_rss_mb()
+        if tracing:
+            current.traced_peak_mb = max(current.traced_peak_mb or 0,
+                                         tracemalloc.get_traced_memory()[1] / 2 ** 20)
+            if parent is not None:
+                parent.traced_peak_mb = max(parent.traced_peak_mb or 0, current.traced_peak_mb)
+        _span.reset(token)
+        tracer.spans.append(current)
+
+
+def traced(function):
+    """``function`` run in a span named after it, with the row count of a
+    DataFrame first argument."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        counts = {'rows': len(args[0])} if args and isinstance(args[0], pd.DataFrame) else {}
+        with span(function.__name__, **counts):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+class Capture:
+    """A pyinstrument or cProfile profile of the code between ``start`` and
+    ``stop`` on the calling thread."""
+
+    def __init__(self):
+        self.profiler = pyinstrument.Profiler() if pyinstrument else cProfile.Profile()
+
+    @property
+    def tool(self) -> str:
+        return 'pyinstrument' if pyinstrument else 'cProfile'
+
+    @property
+    def file_name(self) -> str:
+        return 'profile.html' if pyinstrument else 'profile.prof'
+
+    def start(self):
+        if pyinstrument:
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+        return self
+
+    def stop(self):
+        if pyinstrument:
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+        return self
+
+    def text(self, limit: int = 30) -> str:
+        """The slowest calls, by cumulative time."""
+        if pyinstrument:
+            return self.profiler.output_text()
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def dump(self) -> bytes:
+        """pyinstrument's HTML page, or cProfile's stats in the file format
+        pstats and snakeviz read."""
+        if pyinstrument:
+            return self.profiler.output_html().encode()
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
@@ -0,0 +1,169 @@
+"""Value counts and histograms per column (sections 3, 4 and 9 of app.py).
+
+Top values, picklists, distinct counts and email domains all come from one
+value-count pass per column, ``value_frequencies``. In exact mode it hash
+counts the column: ``pd.factorize`` gives each value a code and
+``np.bincount`` counts the codes, so no per-value Series is built beyond the
+FREQUENCY_KEEP most frequent values it keeps. Given a column sketch
+(approximate mode) it feeds the column chunk by chunk to a Space-Saving
+summary of FREQUENCY_KEEP heavy hitters instead and takes the distinct count
+from the sketch's HyperLogLog, so memory stays bounded however many
+distinct values there are.
+"""
+import numpy as np
+import pandas as pd
+
+from profiler.profiling import is_bool_column, is_numeric_column, is_text_column
+from profiler.sketches import SpaceSaving
+
+HISTOGRAM_BINS = 30
+# Most frequent values the shared pass keeps per column: a full picklist
+# table and section 4's top values both fit
+FREQUENCY_KEEP = 1_000
+# Rows the Space-Saving summary takes at a time in approximate mode
+FREQUENCY_CHUNK_ROWS = 1 << 20
+# A text column with more distinct values than this isn't a picklist
+PICKLIST_MAX_DISTINCT = 100
+
+
+def value_counts(series: pd.Series) -> pd.Series:
+    """``series.value_counts()`` without the zero counts a categorical
+    reports for categories that don't occur."""
+    counts = series.value_counts()
+    return counts[counts > 0] if isinstance(series.dtype, pd.CategoricalDtype) else counts
+
+
+def hash_counts(series: pd.Series, sort: bool = False) -> tuple:
+    """(codes, values, counts) of ``series``: each row's code (-1 for
+    nulls), the distinct values, sorted if ``sort``, and their counts."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, values = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, values = pd.factorize(series, sort=sort)
+    counts = np.bincount(codes[codes >= 0], minlength=len(values))
+    return codes, values, counts
+
+
+class Frequencies:
+    """The shared value counts of one column: its most frequent values in
+    ``counts`` (descending), and its numbers of distinct and non-null
+    values. ``exact`` is False when ``counts`` are Space-Saving upper bounds
+    and ``distinct`` a HyperLogLog estimate."""
+
+    def __init__(self, counts: pd.Series, distinct: int, non_null: int, exact: bool = True):
+        self.counts, self.distinct, self.non_null, self.exact = counts, distinct, non_null, exact
+
+    @property
+    def complete(self) -> bool:
+        """Whether ``counts`` holds every value of the column."""
+        return self.exact and len(self.counts) == self.distinct
+
+    def top(self, n: int = 5) -> pd.DataFrame:
+        return self.counts.head(n).rename_axis("Value").reset_index(name="Count")
+
+    def table(self, n: int = FREQUENCY_KEEP) -> pd.DataFrame:
+        """The ``n`` most frequent values, then one "Other" row with the
+        count of the rest."""
+        table = self.top(n)
+        rest = self.distinct - len(table)
+        if rest <= 0:
+            return table
+        other = pd.DataFrame({"Value": [f"Other ({rest:,} values)"],
+                              "Count": [max(self.non_null - int(table["Count"].sum()), 0)]})
+        return pd.concat([table.astype({"Value": object}), other], ignore_index=True)
+
+    def is_picklist(self, max_distinct: int = PICKLIST_MAX_DISTINCT) -> bool:
+        return 0 < self.distinct <= max_distinct
+
+
+def value_frequencies(series: pd.Series, keep: int = FREQUENCY_KEEP, sketch=None) -> Frequencies:
+    """One column's value counts, from a Space-Saving summary and the
+    distinct count of ``sketch`` (a ColumnSketch) if given."""
+    if sketch is not None:
+        summary = SpaceSaving(keep)
+        for start in range(0, len(series), FREQUENCY_CHUNK_ROWS):
+            summary.update(series.iloc[start:start + FREQUENCY_CHUNK_ROWS])
+        counts = summary.top(keep)
+        if isinstance(counts.index, pd.CategoricalIndex):
+            counts.index = counts.index.astype(series.dtype.categories.dtype)
+        # A summary that never filled up never dropped a value
+        if len(counts) < keep:
+            return Frequencies(counts, len(counts), int(counts.sum()))
+        return Frequencies(counts, max(sketch.distinct_count(), keep), sketch.non_null,
+                           exact=False)
+    _, values, counts = hash_counts(series)
+    present = np.flatnonzero(counts)
+    if len(present) > keep:
+        present = present[np.argpartition(-counts[present], keep - 1)[:keep]]
+    # Descending counts, ties in order of first appearance
+    order = present[np.lexsort((present, -counts[present]))]
+    return Frequencies(pd.Series(counts[order], index=pd.Index(values.take(order))),
+                       int(np.count_nonzero(counts)), int(counts.sum()))
+
+
+def column_frequencies(df: pd.DataFrame, keep: int = FREQUENCY_KEEP, sketches: dict = None) -> dict:
+    """{column: Frequencies} of every column of ``df``."""
+    return {col: value_frequencies(df[col], keep, sketches[col] if sketches else None)
+            for col in df.columns}
+
+
+def top_values(df: pd.DataFrame, frequencies: dict, n: int = 5) -> dict:
+    """Section 4's most frequent values of every non-bool column."""
+    return {col: frequencies[col].top(n) for col in df.columns if not is_bool_column(df[col].dtype)}
+
+
+def histogram(series: pd.Series, bins: int = HISTOGRAM_BINS) -> pd.DataFrame:
+    """Counts of a numeric column's finite values in ``bins`` equal-width
+    bins, as Bin (a "start – end" label) and Count columns."""
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return pd.DataFrame({"Bin": [], "Count": []})
+    counts, edges = np.histogram(values, bins=bins)
+    labels = [f"{start:.4g} – {end:.4g}" for start, end in zip(edges[:-1], edges[1:])]
+    return pd.DataFrame({"Bin": labels, "Count": counts})
+
+
+def histograms(df: pd.DataFrame, bins: int = HISTOGRAM_BINS) -> dict:
+    """Section 4's {column: histogram} of every numeric column."""
+    return {col: histogram(df[col], bins) for col in df.columns if is_numeric_column(df[col].dtype)}
+
+
+def picklist_counts(df: pd.DataFrame, frequencies: dict,
+                    max_distinct: int = PICKLIST_MAX_DISTINCT) -> dict:
+    """Section 9's full value counts of the text columns with at most
+    ``max_distinct`` values."""
+    return {col: frequencies[col].table() for col in df.columns
+            if is_text_column(df[col].dtype) and frequencies[col].is_picklist(max_distinct)}
+
+
+def mergeable_counts(series: pd.Series) -> pd.Series:
+    """``value_counts`` with a plain (non-categorical) index, so counts of
+    different parts of a column can be added with ``add_counts``."""
+    counts = value_counts(series)
+    if isinstance(counts.index, pd.CategoricalIndex):
+        counts.index = counts.index.astype(series.dtype.categories.dtype)
+    return counts
+
+
+def add_counts(parts: list) -> pd.Series:
+    """The value counts of a column from those of its parts."""
+    if len(parts) == 1:
+        return parts[0]
+    codes, values = pd.factorize(pd.concat([part.index.to_series() for part in parts],
+                                           ignore_index=True))
+    counts = np.bincount(codes, weights=np.concatenate([part.to_numpy() for part in parts]))
+    return pd.Series(counts.astype(np.int64), index=pd.Index(values))
+
+
+def counts_median(counts: pd.Series) -> float:
+    """Median of the values behind numeric value counts, as Series.median
+    would give it."""
+    counts = counts.sort_index()
+    total = counts.sum()
+    if not total:
+        return np.nan
+    ends = np.cumsum(counts.to_numpy())
+    values = counts.index.to_numpy(dtype=np.float64)
+    low, high = np.searchsorted(ends, [(total - 1) // 2, total // 2], side='right')
+    return (values[low] + values[high]) / 2